@@ -13,6 +13,7 @@ from .models import ProposalTag
 from .models import Record
 from .models import JobseekerHistoryNotification
 from .models import JobLoading
+from .models import JobLoadingBatch
 
 
 admin.site.register(Organization)
@@ -28,3 +29,4 @@ admin.site.register(ProposalTag)
 admin.site.register(Record)
 admin.site.register(JobseekerHistoryNotification)
 admin.site.register(JobLoading)
+admin.site.register(JobLoadingBatch)
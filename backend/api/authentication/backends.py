@@ -0,0 +1,30 @@
+from rest_framework import exceptions
+from rest_framework_jwt import authentication
+from rest_framework_jwt.compat import gettext_lazy as _
+
+from .users import resolve_user
+
+
+class JSONWebTokenAuthentication(authentication.JSONWebTokenAuthentication):
+    """JSONWebTokenAuthentication resolving the user and organization in one lookup.
+
+    drf-jwt loads the user by natural key after the username handler has
+    already looked it up, and every view then loads ``request.user.organization``
+    again. Here the user is fetched once with its organization and cached
+    briefly by username.
+    """
+
+    def authenticate_credentials(self, payload):
+        username = self.jwt_get_username_from_payload(payload)
+
+        if not username:
+            msg = _("Invalid payload.")
+            raise exceptions.AuthenticationFailed(msg)
+
+        user = resolve_user(username)
+
+        if not user.is_active:
+            msg = _("User account is disabled.")
+            raise exceptions.AuthenticationFailed(msg)
+
+        return user
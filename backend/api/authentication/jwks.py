@@ -0,0 +1,116 @@
+import json
+import logging
+import threading
+import time
+
+import jwt
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSKeyStore:
+    """Process-wide cache of the issuer's signing keys, keyed by ``kid``.
+
+    - Keys are parsed into ``RSAAlgorithm`` public keys once per fetch.
+    - After ``ttl`` seconds the cached keys are stale: they are still served while
+      a background refresh runs, and are dropped once older than ``max_stale``.
+    - An unknown ``kid`` triggers a synchronous refresh. Refreshes of either kind
+      hit the issuer at most once every ``min_refresh_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        jwks_url,
+        ttl=600,
+        max_stale=3600,
+        min_refresh_interval=30,
+        timeout=5,
+    ):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+
+        self._keys = {}
+        self._fetched_at = None
+        self._last_refresh_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+    def get_key(self, kid):
+        now = time.monotonic()
+        with self._lock:
+            age = None if self._fetched_at is None else now - self._fetched_at
+            if age is not None and age > self.max_stale:
+                # 発行元に長時間接続できない場合、古い鍵は使わない
+                self._keys = {}
+                self._fetched_at = None
+                age = None
+            key = self._keys.get(kid)
+            if key is not None:
+                self._stats["hits"] += 1
+            else:
+                self._stats["misses"] += 1
+
+        if key is not None:
+            if age > self.ttl:
+                self._refresh_in_background()
+            return key
+
+        self._refresh()
+        with self._lock:
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError("Public key not found.")
+        return key
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, keys=len(self._keys))
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = None
+            self._last_refresh_at = None
+
+    def _refresh_in_background(self):
+        if self._refresh_lock.locked():
+            return
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self):
+        with self._refresh_lock:
+            now = time.monotonic()
+            if (
+                self._last_refresh_at is not None
+                and now - self._last_refresh_at < self.min_refresh_interval
+            ):
+                return
+            self._last_refresh_at = now
+
+            try:
+                response = requests.get(self.jwks_url, timeout=self.timeout)
+                response.raise_for_status()
+                keys = {
+                    jwk["kid"]: jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
+                    for jwk in response.json()["keys"]
+                }
+            except Exception as e:
+                logger.warning(f"Failed to refresh JWKS from {self.jwks_url}: {e}")
+                with self._lock:
+                    self._stats["refresh_errors"] += 1
+                return
+
+            with self._lock:
+                self._keys = keys
+                self._fetched_at = time.monotonic()
+                self._stats["refreshes"] += 1
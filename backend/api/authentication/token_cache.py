@@ -0,0 +1,77 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of already verified tokens.
+
+    Entries are keyed by the SHA-256 digest of the raw token, so the tokens
+    themselves are never kept in memory, and expire at the token's ``exp`` or
+    after ``max_ttl`` seconds, whichever comes first.
+    """
+
+    def __init__(self, maxsize=1024, max_ttl=300, report_interval=1000):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self.report_interval = report_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, token):
+        digest = self._digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[0] <= now:
+                del self._entries[digest]
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._entries.move_to_end(digest)
+            lookups = self._stats["hits"] + self._stats["misses"]
+
+        if self.report_interval and lookups % self.report_interval == 0:
+            logger.info(f"Verified token cache: {self.stats()}")
+
+        return None if entry is None else dict(entry[1])
+
+    def set(self, token, payload):
+        expires_at = time.time() + self.max_ttl
+        if payload.get("exp") is not None:
+            expires_at = min(expires_at, payload["exp"])
+
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (expires_at, dict(payload))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                size=len(self._entries),
+                hit_rate=self._stats["hits"] / lookups if lookups else 0.0,
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _digest(token):
+        if isinstance(token, str):
+            token = token.encode()
+        return hashlib.sha256(token).digest()
@@ -0,0 +1,88 @@
+import copy
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+
+
+def copy_user(user):
+    """Copies ``user`` and the organization loaded with it."""
+    user = copy.copy(user)
+    # copy.copy は fields_cache を複製するが、組織のインスタンス自体は共有したままになる.
+    organization = user._state.fields_cache.get("organization")
+    if organization is not None:
+        user.organization = copy.copy(organization)
+    return user
+
+
+class UserCache:
+    """Short-lived cache of users (with their organization) keyed by username.
+
+    Cached users are handed out as copies (together with their organization)
+    so that a request modifying ``request.user`` never changes what other
+    requests see.
+    """
+
+    def __init__(self, ttl=60, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, username):
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[username]
+                return None
+        return copy_user(entry[1])
+
+    def set(self, user):
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                self._entries.clear()
+            self._entries[user.get_username()] = (
+                time.monotonic() + self.ttl,
+                copy_user(user),
+            )
+
+    def evict(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def evict_organization(self, organization_id):
+        with self._lock:
+            for username, (_, user) in list(self._entries.items()):
+                if user.organization_id == organization_id:
+                    del self._entries[username]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def resolve_user(username):
+    """Returns the user for ``username`` with its organization loaded.
+
+    Users are created on their first login, as RemoteUserBackend did.
+    """
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+
+    User = get_user_model()
+    try:
+        user = User.objects.select_related("organization").get(
+            **{User.USERNAME_FIELD: username}
+        )
+    except User.DoesNotExist:
+        user, _ = User.objects.get_or_create(**{User.USERNAME_FIELD: username})
+
+    user_cache.set(user)
+    return user
@@ -0,0 +1,57 @@
+from django.db.models import Q
+from psycopg2.extras import NumericRange
+
+
+# int4range (Job.salary_range) で表せる値
+SALARY_RANGE_MIN = -(2**31)
+SALARY_RANGE_MAX = 2**31 - 1
+
+
+def job_salary_range(min_salary, max_salary):
+    """Returns the inclusive ``[min_salary, max_salary]`` range stored in ``Job.salary_range``.
+
+    A missing bound is open-ended and jobs without any bound have no range.
+    A minimum above the maximum is stored swapped; ``filter_jobs_by_salary``
+    checks the columns as well, so such jobs match as they did before.
+    """
+    if min_salary is None and max_salary is None:
+        return None
+    if min_salary is not None and max_salary is not None and min_salary > max_salary:
+        min_salary, max_salary = max_salary, min_salary
+    return NumericRange(min_salary, max_salary, "[]")
+
+
+def filter_jobs_by_salary(queryset, min_salary=None, max_salary=None):
+    """Filters jobs whose salary range overlaps ``(min_salary, max_salary)``.
+
+    Both bounds are exclusive, as before: a job matches when its minimum is
+    below ``max_salary`` and its maximum above ``min_salary``, a missing bound
+    on either side being open-ended. The overlap with ``Job.salary_range``
+    lets the GiST index narrow the jobs down, and the columns are then
+    compared as before.
+    """
+    min_salary = int(min_salary) if min_salary is not None else None
+    max_salary = int(max_salary) if max_salary is not None else None
+
+    if min_salary is not None and max_salary is not None and min_salary > max_salary:
+        return queryset.none()
+
+    # salary_range は下限が上限より大きい求人を入れ替えて保存しているため、列同士でも比較する
+    columns = Q()
+    if min_salary is not None:
+        columns &= Q(max_salary__gt=min_salary) | Q(max_salary__isnull=True)
+    if max_salary is not None:
+        columns &= Q(min_salary__lt=max_salary) | Q(min_salary__isnull=True)
+
+    # int4range に収まらない値は、その側を上限・下限なしにするか端に寄せる (絞り込みは列同士の比較で行う)
+    lower = min_salary + 1 if min_salary is not None else None
+    if lower is not None:
+        lower = None if lower < SALARY_RANGE_MIN else min(lower, SALARY_RANGE_MAX)
+    upper = max_salary
+    if upper is not None:
+        upper = None if upper > SALARY_RANGE_MAX else max(upper, SALARY_RANGE_MIN)
+
+    if lower is not None and upper is not None and lower >= upper:
+        # 間に整数がなく範囲で表せないので、列同士の比較だけで絞り込む
+        return queryset.filter(columns, salary_range__isnull=False)
+    return queryset.filter(columns, salary_range__overlap=NumericRange(lower, upper))
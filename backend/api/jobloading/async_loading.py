@@ -0,0 +1,197 @@
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import logging
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+import openai
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from ..models import JobCategory
+from . import cache, fetcher, progress, semaphore, steps
+from .browser_pool import browser_pool
+from .prompt import constructPrompt, content_token_budget, gpt_messages, gpt_model
+from .result import JobLoadingResult
+
+# API キーごとに同時に呼び出す GPT の上限. Redis で数えるため、すべてのワーカーの合計
+gpt_concurrency = getattr(settings, 'JOBLOADING_GPT_CONCURRENCY', 8)
+gpt_timeout = 300
+# 呼び出し中にワーカーが止まっても、この時間が過ぎれば枠を空ける
+gpt_lease_seconds = gpt_timeout + 30
+# 枠が空いているかを確認する間隔
+slot_poll_seconds = 0.5
+# 1件ごとの上限 (同期実行の soft_time_limit と同じ). ホストや GPT の枠が空くのを待つ時間は含まない
+load_timeout = 600
+rest_get_timeout = 60
+
+# Redis・BeautifulSoup など、ブロックする処理はスレッドで実行する
+def in_thread(func):
+    return sync_to_async(func, thread_sensitive=False)
+
+# DB への書き込みは Django の既定どおり1つのスレッドで行う
+in_db_thread = sync_to_async
+
+# 実行中の1件の load_timeout. 取り込みごとに別のタスクで実行するため、取り込みごとの値になる
+item_timeout = contextvars.ContextVar('item_timeout', default=None)
+
+
+class AsyncJobLoader:
+    """Runs many job loadings on one event loop.
+
+    Pages are fetched with aiohttp and the model is called with
+    ``openai.ChatCompletion.acreate``. At most ``domain_concurrency`` requests
+    per host run at a time within the loader (``batch.dispatch`` gives each
+    host to a single task), and at most ``gpt_concurrency`` calls per API key
+    across all workers. Processing the HTML, Redis and the database run in
+    threads, so the loop is only waiting on network I/O.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, job_category_names: list, token_budget: int):
+        self.session = session
+        self.job_category_names = job_category_names
+        self.token_budget = token_budget
+        self.host_semaphores = {}
+
+    def host_semaphore(self, source_url: str) -> asyncio.Semaphore:
+        host = urlparse(source_url).netloc.lower()
+        if host not in self.host_semaphores:
+            limit = fetcher.domain_concurrency.get(host, fetcher.default_domain_concurrency)
+            self.host_semaphores[host] = asyncio.Semaphore(limit)
+        return self.host_semaphores[host]
+
+    @contextlib.asynccontextmanager
+    async def gpt_slot(self, api_key: str):
+        # キーそのものは Redis に保存しない
+        name = f'gpt:{hashlib.sha256(api_key.encode()).hexdigest()[:16]}'
+        token = await in_thread(semaphore.acquire)(name, gpt_concurrency, gpt_lease_seconds)
+        while token is None:
+            await asyncio.sleep(slot_poll_seconds)
+            token = await in_thread(semaphore.acquire)(name, gpt_concurrency, gpt_lease_seconds)
+        try:
+            yield
+        finally:
+            await in_thread(semaphore.release)(name, token)
+
+    @contextlib.asynccontextmanager
+    async def waiting(self, slot):
+        """Enters ``slot`` without counting the wait against the item's ``load_timeout``."""
+        timeout = item_timeout.get()
+        if timeout is None or timeout.when() is None:
+            async with slot:
+                yield
+            return
+
+        loop = asyncio.get_running_loop()
+        remaining = timeout.when() - loop.time()
+        timeout.reschedule(None)
+        async with slot:
+            timeout.reschedule(loop.time() + remaining)
+            yield
+
+    async def load(self, job_loading_id, source_url):
+        result = JobLoadingResult(job_loading_id, source_url)
+        try:
+            async with asyncio.timeout(load_timeout) as timeout:
+                item_timeout.set(timeout)
+                await self._load(result)
+        except TimeoutError:
+            if not result.error_message:
+                # 取得・解析の途中ではなく、1件ごとの上限を超えた
+                result.add_telemetry_error_detail(f'Timed out after {load_timeout} seconds')
+                result.set_error_message("タイムアウトしました。")
+            await in_db_thread(result.save_error)()
+        except Exception:
+            logging.exception(f'Job loading {job_loading_id} failed: {source_url}')
+            await in_db_thread(result.save_error)()
+
+    async def _load(self, result: JobLoadingResult):
+        steps.check_url(result)
+
+        await in_thread(result.publish_stage)(progress.STAGE_FETCHING)
+        with steps.fetching(result):
+            content = await self.fetch(result.source_url, result)
+
+        prompt = constructPrompt(content, self.job_category_names)
+        jobloading = await in_thread(steps.get_cached_extraction)(result, prompt)
+        is_cached = jobloading is not None
+        if not is_cached:
+            await in_thread(result.publish_stage)(progress.STAGE_CALLING_GPT)
+            with steps.calling_gpt(result):
+                jobloadingJsonStr = await self.call_gpt(prompt, result)
+
+            await in_thread(result.publish_stage)(progress.STAGE_PARSING)
+            jobloading = steps.parse(result, jobloadingJsonStr)
+
+        await in_db_thread(steps.save)(result, jobloading)
+
+        # 保存できた結果だけを再利用する
+        if not is_cached:
+            await in_thread(cache.set_extraction)(gpt_model, prompt, jobloading)
+
+    async def fetch(self, source_url: str, result: JobLoadingResult) -> str:
+        page = await in_thread(cache.get_page)(source_url)
+        if page is not None and cache.is_fresh(page):
+            return await in_thread(fetcher.use_fresh_page)(page, source_url, result, self.token_budget)
+
+        result.set_telemetry('fetch_cache', 'miss')
+        scraping_target = fetcher.match_scraping_url(source_url)
+        if scraping_target is not None:
+            result.set_telemetry('fetch_method', 'Scraping')
+            ready_selector = scraping_target[1]
+            async with self.waiting(self.host_semaphore(source_url)):
+                scraped, browser_wait_time_ms = await browser_pool.run_async(
+                    lambda page: fetcher.scrape_page(page, source_url, ready_selector), fetcher.scraping_timeout
+                )
+            return await in_thread(fetcher.process_scraped)(
+                source_url, result, self.token_budget, scraped, browser_wait_time_ms
+            )
+
+        result.set_telemetry('fetch_method', 'REST GET')
+        async with self.waiting(self.host_semaphore(source_url)):
+            async with self.session.get(
+                source_url,
+                headers=fetcher.request_headers(page),
+                timeout=aiohttp.ClientTimeout(total=rest_get_timeout),
+            ) as response:
+                logging.info(f'GET {source_url} {response.status}')
+                if page is None or response.status != 304:
+                    response.raise_for_status()
+                html_content = await response.text()
+        return await in_thread(fetcher.process_response)(
+            source_url, result, self.token_budget, page, response.status, html_content, response.headers
+        )
+
+    async def call_gpt(self, prompt: str, result: JobLoadingResult) -> str:
+        api_key = settings.OPENAI_API_KEY
+        async with self.waiting(self.gpt_slot(api_key)):
+            openai_start_time = time.time()
+            logging.info(
+                f"Call OpenAI API for {result.source_url} (jobloading_id: {result.jobloading_id}): {prompt}"
+            )
+            response = await openai.ChatCompletion.acreate(
+                model=gpt_model,
+                temperature=0,
+                messages=gpt_messages(prompt),
+                api_key=api_key,
+                request_timeout=gpt_timeout,
+            )
+        return result.set_gpt_response(response, openai_start_time)
+
+
+async def run_job_loadings(items):
+    """Loads ``items`` (``[job_loading_id, source_url]`` pairs) concurrently."""
+    try:
+        job_category_names = await in_db_thread(list)(JobCategory.objects.values_list("name", flat=True))
+        token_budget = await in_thread(content_token_budget)(job_category_names)
+        async with aiohttp.ClientSession() as session:
+            # openai も同じセッション (接続プール) を使う
+            openai.aiosession.set(session)
+            loader = AsyncJobLoader(session, job_category_names, token_budget)
+            await asyncio.gather(*(loader.load(job_loading_id, source_url) for job_loading_id, source_url in items))
+    finally:
+        await in_db_thread(close_old_connections)()
@@ -0,0 +1,79 @@
+from urllib.parse import urlparse
+
+from celery import chain, group
+from django.conf import settings
+
+from ..tasks import exec_job_loading_in_batch, exec_job_loadings_async
+from .async_loading import load_timeout
+from .fetcher import default_domain_concurrency, domain_concurrency
+
+# True の場合、一括取り込みはまとめて1つのタスクに渡し、ワーカーのイベントループで並行に実行する
+async_mode = getattr(settings, 'JOBLOADING_ASYNC', False)
+async_chunk_size = getattr(settings, 'JOBLOADING_ASYNC_CHUNK_SIZE', 50)
+# 1つのタスクで同じドメインを順に実行する件数の上限. 超える分は後続のタスクで実行する
+async_max_lane_length = getattr(settings, 'JOBLOADING_ASYNC_MAX_LANE_LENGTH', 5)
+# タスク全体の soft_time_limit に、順に実行する件数分の load_timeout に加えて見込む時間
+async_margin_seconds = 300
+
+def group_by_domain(job_loadings) -> dict:
+    by_domain = {}
+    for job_loading in job_loadings:
+        by_domain.setdefault(urlparse(job_loading.source_url).netloc.lower(), []).append(job_loading)
+    return by_domain
+
+def plan_lanes(job_loadings) -> list:
+    """Splits ``job_loadings`` into lanes whose job loadings run one after another.
+
+    Each domain gets at most its concurrency limit of lanes and its job
+    loadings are spread over them round-robin, in the requested order.
+    """
+    lanes = []
+    for domain, items in group_by_domain(job_loadings).items():
+        limit = domain_concurrency.get(domain, default_domain_concurrency)
+        lanes.extend(items[i::limit] for i in range(min(limit, len(items))))
+    return lanes
+
+def plan_chunks(job_loadings) -> list:
+    """Splits ``job_loadings`` into sequences of chunks for ``exec_job_loadings_async``.
+
+    The chunks of a sequence run one after another and a domain is never in
+    two sequences, so the per-host limit of the running task holds for the
+    whole batch. Domains are packed into chunks of up to ``async_chunk_size``
+    job loadings; a larger domain, or one that would run more than
+    ``async_max_lane_length`` job loadings per lane, gets its own sequence.
+    """
+    packed = []
+    sequences = []
+    for domain, items in group_by_domain(job_loadings).items():
+        limit = domain_concurrency.get(domain, default_domain_concurrency)
+        size = min(async_chunk_size, limit * async_max_lane_length)
+        if len(items) > size:
+            sequences.append([items[i:i + size] for i in range(0, len(items), size)])
+        elif packed and len(packed[-1]) + len(items) <= async_chunk_size:
+            packed[-1].extend(items)
+        else:
+            packed.append(list(items))
+    return [[chunk] for chunk in packed] + sequences
+
+def async_time_limits(chunk) -> dict:
+    # 同じドメインは上限の数ずつ順に実行されるため、最も長いレーンの件数分の時間を見込む
+    soft_time_limit = max(len(lane) for lane in plan_lanes(chunk)) * load_timeout + async_margin_seconds
+    return {'soft_time_limit': soft_time_limit, 'time_limit': soft_time_limit + 30}
+
+def dispatch(job_loadings):
+    if async_mode:
+        # 同じドメインは同時に1つのタスクでのみ実行し、タスク内の上限で抑える
+        group([
+            chain([
+                exec_job_loadings_async.si([[str(x.id), x.source_url] for x in chunk]).set(**async_time_limits(chunk))
+                for chunk in sequence
+            ])
+            for sequence in plan_chunks(job_loadings)
+        ]).apply_async()
+        return
+
+    # レーンごとに chain で順に実行し、レーン同士は group で並行に実行する
+    group([
+        chain([exec_job_loading_in_batch.si(str(x.id), x.source_url) for x in lane])
+        for lane in plan_lanes(job_loadings)
+    ]).apply_async()
@@ -0,0 +1,200 @@
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from pyppeteer import launch
+
+# 同時に開くページ数の上限 (ワーカープロセスごと)
+max_pages = getattr(settings, 'JOBLOADING_BROWSER_MAX_PAGES', 2)
+# この枚数のページを開いたら、またはメモリ使用量がこの値を超えたらブラウザを起動し直す
+pages_per_browser = getattr(settings, 'JOBLOADING_BROWSER_PAGES_PER_BROWSER', 100)
+max_browser_rss_mb = getattr(settings, 'JOBLOADING_BROWSER_MAX_RSS_MB', 1024)
+health_check_timeout = 5
+
+launch_options = {
+    'headless': True,
+    'args': ['--no-sandbox', '--disable-setuid-sandbox'],
+    'logLevel': logging.WARNING,
+    # 終了はプールが行う. pyppeteer のシグナルハンドラは Celery のものを上書きしてしまう
+    'handleSIGINT': False,
+    'handleSIGTERM': False,
+    'handleSIGHUP': False,
+}
+
+def process_tree_rss_mb(pid: int):
+    """Returns the RSS of ``pid`` and its descendants in MB, or None where /proc is unavailable."""
+    try:
+        children = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # comm は空白を含みうるので、最後の ')' 以降を読む
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+
+        rss_pages = 0
+        targets = [pid]
+        while targets:
+            target = targets.pop()
+            try:
+                with open(f'/proc/{target}/statm') as f:
+                    rss_pages += int(f.read().split()[1])
+            except (OSError, IndexError, ValueError):
+                pass
+            targets.extend(children.get(target, []))
+        return rss_pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError):
+        return None
+
+class BrowserPool:
+    """Keeps a headless Chromium alive per worker process and lends out its pages.
+
+    pyppeteer objects are bound to the event loop they were created on, so the
+    browser lives on a dedicated loop thread and ``run`` submits work to it
+    from the (synchronous) Celery task. The browser is health-checked before
+    use and recycled, once idle, after ``pages_per_browser`` pages or when its
+    process tree exceeds ``max_browser_rss_mb``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.loop = None
+        self.semaphore = None
+        self.browser = None
+        self.idle_pages = []
+        self.opened_pages = 0
+        self.pages_in_use = 0
+
+    def ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self.lock:
+            # fork 後の子プロセスには親のスレッドがないので作り直す
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.loop = asyncio.new_event_loop()
+                self.semaphore = None
+                self.browser = None
+                self.idle_pages = []
+                self.opened_pages = 0
+                self.pages_in_use = 0
+                threading.Thread(target=self.loop.run_forever, name='browser-pool', daemon=True).start()
+            return self.loop
+
+    def run(self, scrape, timeout: float):
+        """Runs ``await scrape(page)`` on a pooled page and returns ``(result, wait_ms)``.
+
+        ``wait_ms`` is the time spent waiting for a free page, including a
+        browser (re)start when one was needed.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._run(scrape), self.ensure_loop())
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f'Scraping did not finish in {timeout} seconds')
+        except BaseException:
+            # SoftTimeLimitExceeded など. ページはプール側で破棄される
+            future.cancel()
+            raise
+
+    async def run_async(self, scrape, timeout: float):
+        """Like ``run``, but awaitable from another event loop."""
+        future = asyncio.run_coroutine_threadsafe(self._run(scrape), self.ensure_loop())
+        try:
+            # キャンセルされた場合はプール側のコルーチンもキャンセルされる
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f'Scraping did not finish in {timeout} seconds')
+
+    async def _run(self, scrape):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(max_pages)
+
+        requested_at = time.monotonic()
+        async with self.semaphore:
+            page = await self._acquire_page()
+            wait_ms = round((time.monotonic() - requested_at) * 1000)
+            try:
+                result = await scrape(page)
+            except BaseException:
+                await self._release_page(page, reuse=False)
+                raise
+            await self._release_page(page, reuse=True)
+            return result, wait_ms
+
+    async def _acquire_page(self):
+        if self.browser is not None and self.pages_in_use == 0 and await self._should_recycle():
+            await self._close_browser()
+        if self.browser is None:
+            logging.info('Launching a headless browser for the pool')
+            self.browser = await launch(**launch_options)
+            self.idle_pages = []
+            self.opened_pages = 0
+
+        self.pages_in_use += 1
+        self.opened_pages += 1
+        if self.idle_pages:
+            return self.idle_pages.pop()
+        try:
+            return await self.browser.newPage()
+        except BaseException:
+            self.pages_in_use -= 1
+            raise
+
+    async def _release_page(self, page, reuse: bool):
+        self.pages_in_use -= 1
+        if reuse:
+            try:
+                # 前のサイトの状態を残さないよう空ページに戻してから使い回す
+                await asyncio.wait_for(page.goto('about:blank'), health_check_timeout)
+                self.idle_pages.append(page)
+                return
+            except Exception as e:
+                logging.warning(f'Failed to reset a pooled page: {e}')
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def _should_recycle(self) -> bool:
+        if self.opened_pages >= pages_per_browser:
+            logging.info(f'Recycling the browser after {self.opened_pages} pages')
+            return True
+        rss_mb = process_tree_rss_mb(self.browser.process.pid)
+        if rss_mb is not None and rss_mb > max_browser_rss_mb:
+            logging.info(f'Recycling the browser using {round(rss_mb)} MB')
+            return True
+        try:
+            await asyncio.wait_for(self.browser.version(), health_check_timeout)
+        except Exception as e:
+            logging.warning(f'Recycling an unresponsive browser: {e}')
+            return True
+        return False
+
+    async def _close_browser(self):
+        browser, self.browser, self.idle_pages = self.browser, None, []
+        try:
+            await asyncio.wait_for(browser.close(), health_check_timeout)
+        except Exception as e:
+            logging.warning(f'Failed to close the browser, killing it: {e}')
+            browser.process.kill()
+
+    def close(self):
+        if self.browser is None or self.pid != os.getpid():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_browser(), self.loop).result(health_check_timeout * 2)
+        except Exception:
+            pass
+
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import redis
+from django.conf import settings
+
+from .progress import get_client
+
+# 取得したページ. 検証子 (ETag/Last-Modified) があれば期限後も条件付き GET で再利用する
+page_ttl_seconds = getattr(settings, 'JOBLOADING_PAGE_CACHE_TTL_SECONDS', 86400)
+# この間は取得し直さない (再試行や、同じ求人を複数の担当者が取り込む場合)
+page_fresh_seconds = getattr(settings, 'JOBLOADING_PAGE_CACHE_FRESH_SECONDS', 600)
+# プロンプト -> 解析結果. 同じ内容・同じ職種カテゴリなら GPT を呼ばない
+extraction_ttl_seconds = getattr(settings, 'JOBLOADING_EXTRACTION_CACHE_TTL_SECONDS', 7 * 86400)
+# 種類ごとの件数の上限. 超えた分は最後に使われたのが古いものから消す
+max_entries = getattr(settings, 'JOBLOADING_CACHE_MAX_ENTRIES', 5000)
+# 種類ごとの合計サイズ (圧縮後) の上限. Celery のブローカーと同じ Redis を使い切らないようにする
+max_bytes = getattr(settings, 'JOBLOADING_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+max_html_bytes = 2 * 1024 * 1024
+
+key_prefix = 'jobloading:cache'
+
+# 内容に影響しない計測用のクエリ
+tracking_params = ('utm_', 'fbclid', 'gclid')
+
+def normalize_url(url: str) -> str:
+    parsed = urlsplit(url.strip())
+    netloc = parsed.netloc.lower()
+    if (parsed.scheme.lower(), netloc.rsplit(':', 1)[-1]) in (('http', '80'), ('https', '443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not name.lower().startswith(tracking_params)
+    )
+    return urlunsplit((parsed.scheme.lower(), netloc, parsed.path or '/', urlencode(query), ''))
+
+def digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def index_key(kind: str) -> str:
+    return f'{key_prefix}:{kind}:index'
+
+def sizes_key(kind: str) -> str:
+    return f'{key_prefix}:{kind}:sizes'
+
+def total_key(kind: str) -> str:
+    return f'{key_prefix}:{kind}:total'
+
+def entry_key(kind: str, text: str) -> str:
+    return f'{key_prefix}:{kind}:{digest(text)}'
+
+def get_entry(kind: str, text: str) -> bytes:
+    key = entry_key(kind, text)
+    try:
+        pipeline = get_client().pipeline()
+        pipeline.get(key)
+        # 最後に使われた時刻. 上限を超えたときはこれが古いものから消す
+        pipeline.zadd(index_key(kind), {key: time.time()}, xx=True)
+        value, _ = pipeline.execute()
+        return value
+    except redis.RedisError as e:
+        logging.warning(f'Failed to read the job loading cache: {e}')
+        return None
+
+# 保存・索引・サイズの集計・削除を1回でまとめて行う (途中で他のワーカーが割り込まない)
+set_entry_script = """
+local index, sizes, total, key = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local value, ttl, now = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3])
+local max_entries, max_bytes = tonumber(ARGV[4]), tonumber(ARGV[5])
+local function forget(name)
+    local size = redis.call('HGET', sizes, name)
+    if size then
+        redis.call('DECRBY', total, size)
+        redis.call('HDEL', sizes, name)
+    end
+    redis.call('ZREM', index, name)
+end
+-- 期限切れで消えたキーを索引・集計からも外す
+for _, name in ipairs(redis.call('ZRANGEBYSCORE', index, '-inf', now - ttl)) do
+    forget(name)
+end
+forget(key)
+redis.call('SET', key, value, 'EX', ttl)
+redis.call('ZADD', index, now, key)
+redis.call('HSET', sizes, key, #value)
+local used = redis.call('INCRBY', total, #value)
+while redis.call('ZCARD', index) > max_entries or used > max_bytes do
+    local oldest = redis.call('ZRANGE', index, 0, 0)[1]
+    if not oldest then
+        break
+    end
+    forget(oldest)
+    redis.call('DEL', oldest)
+    used = tonumber(redis.call('GET', total))
+end
+"""
+
+def set_entry(kind: str, text: str, value: bytes, ttl_seconds: int):
+    """Stores ``value`` and evicts the least recently used entries of ``kind``
+    until both ``max_entries`` and ``max_bytes`` hold."""
+    key = entry_key(kind, text)
+    try:
+        get_client().register_script(set_entry_script)(
+            keys=[index_key(kind), sizes_key(kind), total_key(kind), key],
+            args=[value, ttl_seconds, time.time(), max_entries, max_bytes],
+        )
+    except redis.RedisError as e:
+        # キャッシュに書けなくても取り込み自体は続ける
+        logging.warning(f'Failed to write the job loading cache: {e}')
+
+def get_page(source_url: str) -> dict:
+    value = get_entry('page', normalize_url(source_url))
+    return None if value is None else json.loads(zlib.decompress(value))
+
+def set_page(source_url: str, html_content: str, fetch_method: str, etag: str = None, last_modified: str = None, processed_content: str = None, token_budget: int = None):
+    page = {
+        'fetched_at': time.time(),
+        'fetch_method': fetch_method,
+        'etag': etag,
+        'last_modified': last_modified,
+        'html_content': html_content,
+        'processed_content': processed_content,
+        'token_budget': token_budget,
+    }
+    value = zlib.compress(json.dumps(page, ensure_ascii=False).encode())
+    if len(value) > max_html_bytes:
+        return
+    set_entry('page', normalize_url(source_url), value, page_ttl_seconds)
+
+def is_fresh(page: dict) -> bool:
+    return time.time() - page['fetched_at'] < page_fresh_seconds
+
+def validator_headers(page: dict) -> dict:
+    headers = {}
+    if page.get('etag'):
+        headers['If-None-Match'] = page['etag']
+    if page.get('last_modified'):
+        headers['If-Modified-Since'] = page['last_modified']
+    return headers
+
+def get_extraction(model: str, prompt: str) -> dict:
+    value = get_entry('extraction', f'{model}\n{prompt}')
+    return None if value is None else json.loads(value)
+
+def set_extraction(model: str, prompt: str, jobloading: dict):
+    value = json.dumps(jobloading, ensure_ascii=False).encode()
+    set_entry('extraction', f'{model}\n{prompt}', value, extraction_ttl_seconds)
@@ -0,0 +1,153 @@
+import asyncio
+import io
+import json
+import logging
+import re
+import time
+from urllib.parse import parse_qs
+
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from ..authentication.backends import JSONWebTokenAuthentication
+from ..models import JobLoading
+from . import progress
+
+# GET /api/agent/v1/job_loadings/<id>/events/
+path_pattern = re.compile(r'^/api/agent/v1/job_loadings/(?P<id>[0-9a-fA-F-]{36})/events/?$')
+
+# プロキシに切断されないよう、通知がない間も定期的にコメント行を送る
+keepalive_seconds = 15
+# タスクのタイムアウト (hard_time_limit) を過ぎたら閉じる. クライアントは再接続する
+max_stream_seconds = 660
+
+
+def match(scope) -> str:
+    if scope['type'] != 'http' or scope['method'] != 'GET':
+        return None
+    matched = path_pattern.match(scope['path'])
+    return matched['id'] if matched else None
+
+
+def load_job_loading(scope, jobloading_id):
+    """Authenticates the request like the DRF views and returns the organization's job loading."""
+    # EventSource はヘッダーを付けられないので ?token= も受け付ける
+    token = parse_qs(scope['query_string'].decode()).get('token')
+    headers = dict(scope['headers'])
+    if token and b'authorization' not in headers:
+        scope = {**scope, 'headers': [*scope['headers'], (b'authorization', f'Bearer {token[0]}'.encode())]}
+
+    request = Request(ASGIRequest(scope, io.BytesIO()), authenticators=[JSONWebTokenAuthentication()])
+    try:
+        user = request.user
+    except APIException:
+        return None, None
+    if not user or not user.is_authenticated:
+        return None, None
+
+    job_loading = (
+        JobLoading.objects.filter(id=jobloading_id, organization_id=user.organization_id, is_deleted=False)
+        .only('id', 'is_completed', 'is_error', 'error_message')
+        .first()
+    )
+    return user, job_loading
+
+
+def current_message(job_loading, stored_message) -> str:
+    if job_loading.is_completed:
+        return progress.build_message(job_loading.id, progress.STAGE_SAVED)
+    if job_loading.is_error:
+        return progress.build_message(job_loading.id, progress.STAGE_ERROR, error_message=job_loading.error_message)
+    if stored_message:
+        return stored_message.decode()
+    return progress.build_message(job_loading.id, progress.STAGE_QUEUED)
+
+
+def encode_event(message: str) -> bytes:
+    stage = json.loads(message)['stage']
+    return f'event: {stage}\ndata: {message}\n\n'.encode()
+
+
+async def send_response(send, status, body=b''):
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def job_loading_events(scope, receive, send, jobloading_id):
+    """Streams the stages of a job loading as Server-Sent Events until it is saved or fails.
+
+    The Celery task publishes each stage to Redis (``progress.publish_stage``);
+    the stream subscribes first and then sends the current stage, so no
+    transition between the two is lost.
+    """
+    try:
+        await stream(scope, receive, send, jobloading_id)
+    finally:
+        # Django のリクエスト処理を通らないので、DB接続はここで片付ける
+        await sync_to_async(close_old_connections)()
+
+
+async def stream(scope, receive, send, jobloading_id):
+    user, job_loading = await sync_to_async(load_job_loading)(scope, jobloading_id)
+    if user is None:
+        return await send_response(send, 401, b'{"detail": "Authentication credentials were not provided."}')
+    if job_loading is None:
+        return await send_response(send, 404, b'{"detail": "Not found."}')
+
+    client = redis.asyncio.Redis.from_url(settings.CELERY_BROKER_URL)
+    pubsub = client.pubsub()
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    started = False
+    try:
+        await pubsub.subscribe(progress.channel_name(jobloading_id))
+        # 購読してから現在の状態を読む (購読前に終わっていた場合も取りこぼさない)
+        await sync_to_async(job_loading.refresh_from_db)(fields=['is_completed', 'is_error', 'error_message'])
+        message = current_message(job_loading, await client.get(progress.stage_key(jobloading_id)))
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        started = True
+        await send({'type': 'http.response.body', 'body': encode_event(message), 'more_body': True})
+
+        deadline = time.monotonic() + max_stream_seconds
+        while json.loads(message)['stage'] not in progress.terminal_stages:
+            if disconnected.is_set() or time.monotonic() > deadline:
+                break
+            received = await pubsub.get_message(ignore_subscribe_messages=True, timeout=keepalive_seconds)
+            if received is None:
+                await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+                continue
+            message = received['data'].decode()
+            await send({'type': 'http.response.body', 'body': encode_event(message), 'more_body': True})
+
+        if not disconnected.is_set():
+            await send({'type': 'http.response.body', 'body': b''})
+    except redis.RedisError as e:
+        logging.warning(f'Progress stream of jobloading {jobloading_id} failed: {e}')
+        if not started:
+            await send_response(send, 503, b'{"detail": "Progress stream is unavailable."}')
+        elif not disconnected.is_set():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        watcher.cancel()
+        await pubsub.close()
+        await client.close()
@@ -4,113 +4,309 @@ import re
 import asyncio
 import time
 
-from bs4 import BeautifulSoup
-from pyppeteer import launch
+from bs4 import BeautifulSoup, Tag
+from django.conf import settings
+from pyppeteer.errors import TimeoutError as PageTimeoutError
+from . import cache
+from .browser_pool import browser_pool
+from .prompt import count_tokens, get_encoding
 from .result import JobLoadingResult
 
+# (URL, 描画完了の判定). 判定は求人の本文が描画されると現れるセレクタ. None の場合はネットワークが落ち着くまで待つ
 urls_for_scraping_fetch = [
-    r'^https://herp\.careers/[^/]+/[^/]+/[^/]+/?$',
-    r'^https://agent\.herp\.cloud/[^/]+/[^/]+/requisitions/id/[^/]+/?$',
-    r'^https://open\.talentio\.com/[^/]+/[^/]+/[^/]+/[^/]+/pages/[^/]+/?$',
+    (r'^https://herp\.careers/[^/]+/[^/]+/[^/]+/?$', 'h1'),
+    (r'^https://agent\.herp\.cloud/[^/]+/[^/]+/requisitions/id/[^/]+/?$', None),
+    (r'^https://open\.talentio\.com/[^/]+/[^/]+/[^/]+/[^/]+/pages/[^/]+/?$', 'h1'),
 ]
 
+# 描画完了を待つ上限. 超えた場合はその時点の内容で続ける
+ready_timeout_ms = getattr(settings, 'JOBLOADING_SCRAPING_READY_TIMEOUT_MS', 10000)
+
+# 本文の取得に不要なリソースは読み込まない
+blocked_resource_types = ('image', 'media', 'font', 'stylesheet')
+
 user_agent = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.93 Mobile Safari/537.36'
 
-def fetch_from_url(source_url: str, result: JobLoadingResult) -> str:
-    if any([re.match(pattern, source_url) for pattern in urls_for_scraping_fetch]):
+# ブラウザの空きを待つ時間も含めたスクレイピングの上限
+scraping_timeout = 180
+
+# 一括取り込み・非同期実行で同じドメインに同時に送るリクエストの上限. スクレイピングするサイトは1件ずつ
+domain_concurrency = getattr(settings, 'JOBLOADING_BATCH_DOMAIN_CONCURRENCY', {
+    'herp.careers': 1,
+    'agent.herp.cloud': 1,
+    'open.talentio.com': 1,
+})
+default_domain_concurrency = getattr(settings, 'JOBLOADING_BATCH_DEFAULT_DOMAIN_CONCURRENCY', 2)
+
+def fetch_from_url(source_url: str, result: JobLoadingResult, token_budget: int = None) -> str:
+    page = cache.get_page(source_url)
+    if page is not None and cache.is_fresh(page):
+        return use_fresh_page(page, source_url, result, token_budget)
+
+    result.set_telemetry('fetch_cache', 'miss')
+    scraping_target = match_scraping_url(source_url)
+    if scraping_target is not None:
         result.set_telemetry('fetch_method', 'Scraping')
-        return asyncio.run(fetch_by_scraping_async(source_url, result))
-    else:
-        result.set_telemetry('fetch_method', 'REST GET')
-        return fetch_by_rest_get(source_url, result)
+        return fetch_by_scraping(source_url, result, scraping_target[1], token_budget)
+
+    result.set_telemetry('fetch_method', 'REST GET')
+    return fetch_by_rest_get(source_url, result, token_budget, page)
+
+def match_scraping_url(source_url: str) -> tuple:
+    """Returns the entry of ``urls_for_scraping_fetch`` matching ``source_url``, or None."""
+    for pattern, ready_selector in urls_for_scraping_fetch:
+        if re.match(pattern, source_url):
+            return pattern, ready_selector
+    return None
 
-def fetch_by_rest_get(source_url: str, result: JobLoadingResult) -> str:
+def use_fresh_page(page: dict, source_url: str, result: JobLoadingResult, token_budget: int = None) -> str:
+    # 直前に取得したページはそのまま使う
+    logging.info(f'Using the cached page of {source_url}')
+    result.set_telemetry('fetch_method', page['fetch_method'])
+    result.set_telemetry('fetch_cache', 'fresh')
+    return process_cached_page(page, source_url, result, token_budget)
+
+def request_headers(page: dict = None) -> dict:
+    headers = {"User-Agent": user_agent}
+    if page is not None:
+        # 以前に取得したページがあれば、変わっていない場合は本文を受け取らない
+        headers.update(cache.validator_headers(page))
+    return headers
+
+def fetch_by_rest_get(source_url: str, result: JobLoadingResult, token_budget: int = None, page: dict = None) -> str:
     logging.info(f'Fetching {source_url} by REST GET')
-    response = requests.get(source_url, headers={"User-Agent": user_agent})
+    response = requests.get(source_url, headers=request_headers(page))
     logging.info(f'GET {source_url} {response.status_code}')
-    response.raise_for_status()
-    html_content = response.text
-    return process_html_content(html_content, source_url, result)
+    if page is None or response.status_code != 304:
+        response.raise_for_status()
+    return process_response(source_url, result, token_budget, page, response.status_code, response.text, response.headers)
+
+def process_response(source_url: str, result: JobLoadingResult, token_budget: int, page: dict, status_code: int, html_content: str, headers) -> str:
+    if page is not None and status_code == 304:
+        result.set_telemetry('fetch_cache', 'revalidated')
+        processed_content = process_cached_page(page, source_url, result, token_budget)
+        # 取得時刻を更新し、次は期限内であれば確認せずに使う
+        cache.set_page(source_url, page['html_content'], page['fetch_method'], page['etag'], page['last_modified'], processed_content, token_budget)
+        return processed_content
+
+    processed_content = process_html_content(html_content, source_url, result, token_budget)
+    cache.set_page(
+        source_url, html_content, 'REST GET',
+        headers.get('ETag'), headers.get('Last-Modified'),
+        processed_content, token_budget,
+    )
+    return processed_content
 
-async def fetch_by_scraping_async(source_url: str, result: JobLoadingResult) -> str:
+def fetch_by_scraping(source_url: str, result: JobLoadingResult, ready_selector: str = None, token_budget: int = None) -> str:
     logging.info(f'Fetching {source_url} by scraping')
-    start_time = time.time()
-    browser = await launch(
-        headless=True,
-        args=['--no-sandbox', '--disable-setuid-sandbox'],
-        logLevel=logging.WARNING
+    scraped, browser_wait_time_ms = browser_pool.run(
+        lambda page: scrape_page(page, source_url, ready_selector), scraping_timeout
     )
+    return process_scraped(source_url, result, token_budget, scraped, browser_wait_time_ms)
+
+def process_scraped(source_url: str, result: JobLoadingResult, token_budget: int, scraped: tuple, browser_wait_time_ms: int) -> str:
+    html_content, readiness, readiness_time_ms, scraping_time_ms = scraped
+
+    # ブラウザの空き待ちとスクレイピング自体の時間は分けて記録する
+    result.set_telemetry('browser_wait_time_ms', browser_wait_time_ms)
+    result.set_telemetry('scraping_time_ms', scraping_time_ms)
+    result.set_telemetry('scraping_time', round(scraping_time_ms / 1000))
+    result.set_telemetry('readiness', readiness)
+    result.set_telemetry('readiness_time_ms', readiness_time_ms)
+    logging.info(f'Fetched {source_url} by scraping in {scraping_time_ms} ms ({readiness} after {readiness_time_ms} ms, waited {browser_wait_time_ms} ms for the browser)')
+
+    processed_content = process_html_content(html_content, source_url, result, token_budget)
+    if readiness != 'timeout':
+        # 描画が終わらなかったページは次回取得し直す
+        cache.set_page(source_url, html_content, 'Scraping', processed_content=processed_content, token_budget=token_budget)
+    return processed_content
+
+def process_cached_page(page: dict, source_url: str, result: JobLoadingResult, token_budget: int = None) -> str:
+    if page['processed_content'] is not None and page['token_budget'] == token_budget:
+        logging.info(f'Reusing the processed content of {source_url}')
+        return page['processed_content']
+    return process_html_content(page['html_content'], source_url, result, token_budget)
+
+async def prepare_page(page):
+    # プールのページは使い回されるので、設定は最初の1回だけ行う
+    if getattr(page, 'is_prepared_for_scraping', False):
+        return
+    await page.setUserAgent(user_agent)
+    await page.setRequestInterception(True)
+
+    async def intercept(request):
+        if request.resourceType in blocked_resource_types:
+            await request.abort()
+        else:
+            await request.continue_()
+
+    page.on('request', lambda request: asyncio.ensure_future(intercept(request)))
+    page.is_prepared_for_scraping = True
+
+async def scrape_page(page, source_url: str, ready_selector: str = None):
+    """Loads ``source_url`` until it is ready or ``ready_timeout_ms`` has passed.
+
+    Returns the HTML, how readiness was reached ('selector', 'networkidle' or
+    'timeout'), the time until then and the total scraping time in ms.
+    """
+    await prepare_page(page)
+    start_time = time.monotonic()
+
+    def elapsed_ms():
+        return round((time.monotonic() - start_time) * 1000)
+
     try:
-        page = await browser.newPage()
-        await page.setUserAgent(user_agent)
-        await page.goto(source_url)
-        time.sleep(1)
-        html_content = await page.content()
-
-        scraping_time = round(time.time() - start_time)
-        result.set_telemetry('scraping_time', scraping_time)
-        logging.info(f'Fetched {source_url} by scraping in {scraping_time} seconds')
-
-        return process_html_content(html_content, source_url, result)
-    finally:
-        await browser.close()
-
-def process_html_content(html_content: str, source_url: str, result: JobLoadingResult) -> str:
-    
-    html = BeautifulSoup(html_content, 'html.parser')
+        if ready_selector:
+            readiness = 'selector'
+            await page.goto(source_url, waitUntil='domcontentloaded', timeout=ready_timeout_ms)
+            # timeout=0 は無制限になるので、予算を使い切っていたら待たない
+            remaining_ms = ready_timeout_ms - elapsed_ms()
+            if remaining_ms <= 0:
+                raise PageTimeoutError(f'No time left to wait for {ready_selector}')
+            await page.waitForSelector(ready_selector, timeout=remaining_ms)
+        else:
+            readiness = 'networkidle'
+            await page.goto(source_url, waitUntil='networkidle2', timeout=ready_timeout_ms)
+    except PageTimeoutError as e:
+        logging.warning(f'{source_url} was not ready in {ready_timeout_ms} ms: {e}')
+        readiness = 'timeout'
+    readiness_time_ms = elapsed_ms()
+
+    html_content = await page.content()
+    return html_content, readiness, readiness_time_ms, elapsed_ms()
+
+try:
+    import lxml  # noqa: F401
+    html_parser = 'lxml'
+except ImportError:
+    html_parser = 'html.parser'
+
+# 構造を残して削るタグ・属性 (1段階目) と、それでも長い場合に削るタグ (2段階目)
+removed_tags = ('link', 'style', 'svg', 'img')
+removed_attrs = ('id', 'class', 'style')
+removed_tags_later = ('meta', 'script')
+
+def reduce_tree(html: BeautifulSoup) -> list:
+    """Applies the first reduction to ``html`` in one iterative post-order walk.
+
+    Tags in ``removed_tags``, the attributes in ``removed_attrs`` and tags
+    left with neither contents nor attributes are removed. In the same walk,
+    the tags the second reduction would remove (``removed_tags_later`` and the
+    tags they would leave empty) are collected and returned, so that step is
+    a plain ``extract()`` of each instead of another walk.
+    """
+    # id -> tag. 親が削除される場合、子は親ごと消えるので持たない
+    removed_later = {}
+    stack = [(child, False) for child in reversed(html.contents) if isinstance(child, Tag)]
+    while stack:
+        tag, is_visited = stack.pop()
+        name = tag.name.lower()
+        if not is_visited:
+            if name in removed_tags:
+                # 肥大化する情報の薄いタグは子孫ごと削除
+                tag.extract()
+                continue
+            # 後行順: 子を先に処理する
+            stack.append((tag, True))
+            stack.extend((child, False) for child in reversed(tag.contents) if isinstance(child, Tag))
+            continue
+
+        for attr in removed_attrs:
+            if attr in tag.attrs:
+                del tag.attrs[attr]
+        if not tag.contents and not tag.attrs:
+            # 内容も属性もない空のタグは削除
+            tag.extract()
+        elif name in removed_tags_later or (
+            not tag.attrs and all(id(child) in removed_later for child in tag.contents)
+        ):
+            # 2段階目で削除されるタグ (meta/script と、それらを除くと空になるタグ)
+            for child in tag.contents:
+                removed_later.pop(id(child), None)
+            removed_later[id(tag)] = tag
+
+    return list(removed_later.values())
+
+def process_html_content(html_content: str, source_url: str, result: JobLoadingResult, token_budget: int = None) -> str:
+    """Reduces ``html_content`` until it fits in the prompt.
+
+    With ``token_budget``, the stages are measured in tokens of the GPT
+    tokenizer and the richest one that fits is returned. Without it (or when
+    the tokenizer cannot be loaded), the character limits below are used.
+    """
+    html = BeautifulSoup(html_content, html_parser)
     result.add_telemetry_html_processing('original', len(html_content))
 
-    # HTMLの分量を減らす. タグの構造は解析に有用である場合があるため残す.
-    # 後行順の深さ優先探索で情報を削除していく
-    def drop(target_tag, remove_tags, remove_attrs):
-        for child in target_tag.find_all(recursive=False):
-            drop(child, remove_tags, remove_attrs) # 後行順
-        # 処理
-        if target_tag.name and (target_tag.name.lower() in remove_tags): # 肥大化する情報の薄いタグは削除
-            target_tag.extract()
-        for attr in remove_attrs: # 肥大化しやすい属性は削除
-            if target_tag.has_attr(attr):
-                del target_tag[attr]
-        if not target_tag.contents and not target_tag.text.strip() and not target_tag.attrs: # 内容も属性もない空のタグは削除
-            target_tag.extract()
-
-    drop(html, ['link', 'style', 'svg', 'img'], ['id', 'class', 'style'])
-    processed_content = str(html)
-    result.add_telemetry_html_processing('remove tags/atributes: [link, style, svg, img], [id, class, style]', len(processed_content))
+    encoding = get_encoding() if token_budget is not None else None
+    if encoding is None:
+        token_budget = None
 
     # HTMLの場合、Tokenは文字数の約80%. promptとcompletion合わせて16000トークンに収めることを考慮
     max_content_length_html = 14000
+    # テキストコンテンツの場合、Tokenは文字数の約120%. promptとcompletion合わせて16000トークンに収めることを考慮
+    max_content_length_text = 10000
+
+    def fits(content: str, max_content_length: int) -> bool:
+        if token_budget is None:
+            return len(content) <= max_content_length
+        return count_tokens(encoding, content) <= token_budget
 
-    if (len(processed_content) > max_content_length_html):
+    # HTMLの分量を減らす. タグの構造は解析に有用である場合があるため残す.
+    # DOM は1回だけ走査し、各段階の大きさはその結果から求める
+    removed_later = reduce_tree(html)
+    processed_content = str(html)
+    result.add_telemetry_html_processing('remove tags/atributes: [link, style, svg, img], [id, class, style]', len(processed_content))
+
+    is_fit = fits(processed_content, max_content_length_html)
+    if not is_fit:
         logging.info('The web content is too long. Meta and script tags are removed.')
-        drop(html, ['meta', 'script'], [])
+        for tag in removed_later:
+            tag.extract()
         processed_content = str(html)
         result.add_telemetry_html_processing('remove tags: [meta, script]', len(processed_content))
-    
-    if (len(processed_content) <= max_content_length_html):
-        logging.info(f'Processed HTML for {source_url}: {len(html_content)} -> {len(processed_content)}')
-        return processed_content
+        is_fit = fits(processed_content, max_content_length_html)
 
-    # テキストコンテンツの場合、Tokenは文字数の約120%. promptとcompletion合わせて16000トークンに収めることを考慮
-    max_content_length_text = 10000
+    if is_fit:
+        return finish_processing(html_content, processed_content, source_url, result, encoding)
+
+    # テキストは1回だけ取り出し、区切り文字ごとの長さは計算で求める
+    strings = list(html.stripped_strings)
+    text_length = sum(len(string) for string in strings)
+    separators = max(len(strings) - 1, 0)
+
+    def text_fits(separator: str) -> bool:
+        if token_budget is None:
+            return text_length + separators * len(separator) <= max_content_length_text
+        return fits(separator.join(strings), max_content_length_text)
 
-    if (len(processed_content) > max_content_length_text):
-        # HTML構造を取り除き、テキストのみに変換（マーカーで構造をできるだけ保持）
-        logging.info('The web content is too long. HTML structure is removed.')
-        processed_content = html.get_text(' # ', strip=True)
-        result.add_telemetry_html_processing('remove HTML structure', len(processed_content))
-    
-    if (len(processed_content) > max_content_length_text):
+    # HTML構造を取り除き、テキストのみに変換（マーカーで構造をできるだけ保持）
+    logging.info('The web content is too long. HTML structure is removed.')
+    separator = ' # '
+    result.add_telemetry_html_processing('remove HTML structure', text_length + separators * len(separator))
+
+    if not text_fits(separator):
         # 構造マーカーを取り除いて妥協
         logging.info('The web content is too long. Structure markers are removed.')
-        processed_content = html.get_text(' ', strip=True)
-        result.add_telemetry_html_processing('remove structure markers', len(processed_content))
-    
-    if (len(processed_content) > max_content_length_text):
-        # それでも最大文字数を超える場合は、末尾を削る
-        logging.warning('The web content is too long. The content is trimmed to max_content_length characters')
-        processed_content = processed_content[:max_content_length_text]
+        separator = ' '
+        result.add_telemetry_html_processing('remove structure markers', text_length + separators * len(separator))
+
+    processed_content = separator.join(strings)
+    if not fits(processed_content, max_content_length_text):
+        # それでも収まらない場合は、末尾を削る
+        if token_budget is None:
+            logging.warning('The web content is too long. The content is trimmed to max_content_length characters')
+            processed_content = processed_content[:max_content_length_text]
+        else:
+            logging.warning(f'The web content is too long. The content is trimmed to {token_budget} tokens')
+            # 途中で切れたマルチバイト文字は置換文字になるので落とす
+            tokens = encoding.encode(processed_content, disallowed_special=())[:token_budget]
+            processed_content = encoding.decode(tokens).rstrip('\ufffd')
         result.add_telemetry_html_processing('trim content', len(processed_content))
 
+    return finish_processing(html_content, processed_content, source_url, result, encoding)
+
+def finish_processing(html_content: str, processed_content: str, source_url: str, result: JobLoadingResult, encoding) -> str:
+    if encoding is not None:
+        result.set_telemetry('content_tokens', count_tokens(encoding, processed_content))
     logging.info(f'Processed HTML for {source_url}: {len(html_content)} -> {len(processed_content)}')
-    return processed_content
\ No newline at end of file
+    return processed_content
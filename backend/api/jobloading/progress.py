@@ -0,0 +1,45 @@
+import json
+import logging
+
+import redis
+from django.conf import settings
+
+# 取り込みの進捗. 'saved' / 'error' で終了
+STAGE_QUEUED = 'queued'
+STAGE_FETCHING = 'fetching'
+STAGE_CALLING_GPT = 'calling_gpt'
+STAGE_PARSING = 'parsing'
+STAGE_SAVED = 'saved'
+STAGE_ERROR = 'error'
+terminal_stages = (STAGE_SAVED, STAGE_ERROR)
+
+# 途中から購読したクライアントにも現在の段階を返せるよう、最後の通知を残しておく
+stage_ttl_seconds = 900
+
+_client = None
+
+def get_client() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+    return _client
+
+def channel_name(jobloading_id) -> str:
+    return f'jobloading:{jobloading_id}:progress'
+
+def stage_key(jobloading_id) -> str:
+    return f'jobloading:{jobloading_id}:stage'
+
+def build_message(jobloading_id, stage: str, **data) -> str:
+    return json.dumps({'id': str(jobloading_id), 'stage': stage, **data}, ensure_ascii=False)
+
+def publish_stage(jobloading_id, stage: str, **data):
+    message = build_message(jobloading_id, stage, **data)
+    try:
+        pipeline = get_client().pipeline()
+        pipeline.set(stage_key(jobloading_id), message, ex=stage_ttl_seconds)
+        pipeline.publish(channel_name(jobloading_id), message)
+        pipeline.execute()
+    except redis.RedisError as e:
+        # 進捗の通知に失敗しても取り込み自体は続ける. クライアントは一覧の取得で結果を確認できる
+        logging.warning(f'Failed to publish progress of jobloading {jobloading_id}: {e}')
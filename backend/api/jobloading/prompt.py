@@ -0,0 +1,108 @@
+import json
+import logging
+import re
+
+from django.conf import settings
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+gpt_model = 'gpt-3.5-turbo-16k'
+
+# gpt-3.5-turbo-16k のコンテキスト長. このうち応答 (JSON) の分を残し、残りに求人の本文を収める
+context_tokens = 16384
+completion_tokens = getattr(settings, 'JOBLOADING_COMPLETION_TOKENS', 4000)
+# chat 形式で system メッセージ1件と応答の開始に付くトークン
+message_overhead_tokens = 8
+
+_encoding = None
+
+def get_encoding():
+    """Returns the tokenizer of ``gpt_model``, loaded once per worker process.
+
+    Returns None when tiktoken or its BPE file is unavailable; callers then
+    fall back to the character limits.
+    """
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.encoding_for_model(gpt_model)
+        except Exception as e:
+            # BPE ファイルを取得できない場合など. 次のタスクで再度読み込む
+            logging.warning(f'Failed to load the tokenizer for {gpt_model}: {e}')
+    return _encoding
+
+def count_tokens(encoding, text: str) -> int:
+    # 求人ページに '<|endoftext|>' などが含まれていてもただの文字列として数える
+    return len(encoding.encode(text, disallowed_special=()))
+
+def content_token_budget(job_category_names) -> int:
+    """Returns how many tokens the job posting may use in the prompt, or None without a tokenizer."""
+    encoding = get_encoding()
+    if encoding is None:
+        return None
+    prompt_tokens = count_tokens(encoding, constructPrompt('', job_category_names))
+    return context_tokens - completion_tokens - message_overhead_tokens - prompt_tokens
+
+
+# NOTE: プロンプト内では、Outputの順番は極めて重要. 先に生成された情報を踏まえて後の情報が生成されるため.
+def constructPrompt(jobPosting, job_category_names):
+    return (
+        "### Order\n"
+        "You are a professional recruiter. Given Japanese job postings, please organize the information in a way that is easy for job seekers to understand and generate a Japanese JSON that meets the following output conditions.\n"
+        "To make the text easy to read, the content of the text fields should be formated using new line characters and indents.\n"
+        "### Job posting\n"
+        f"{jobPosting}\n"
+        "### Job categories\n"
+        f"{job_category_names}\n"
+        "### Output format\n"
+        "Unless otherwise instructed, leave fields blank if there is no information in the job posting.\n\n"
+        "{\n"
+        '   "company_name": string, # 会社名\n'
+        '   "position": string, # 職種（求人タイトル）\n'
+        '   "layer": string, # ["役員","管理職","一般職"] 記載がない場合は内容から推定.\n'
+        '   "employment_status": string, # 雇用形態 (e.g. "正社員","契約社員", ...) 記載がない場合は内容から推定.\n'
+        '   "job_category_name": string, # 職種カテゴリ. Job categoriesより選択. 記載がない場合は内容から推定.\n'
+        '   "address": string, # 勤務地\n'
+        '   "remote": string, # ["フルリモート","一部リモート","リモートワークなし","記載なし"]. 原則出社する必要がない場合は "フルリモート", 必ず毎日出社する必要がある場合は "リモートワークなし", それ以外の場合は "一部リモート". \n'
+        '   "benefit": string, # 福利厚生についての情報\n'
+        '   "holiday": string, # 休日・休暇についての情報\n'
+        '   "working_hours": string, # 勤務時間についての情報\n'
+        '   "trial_period": string, # 試用期間についての情報\n'
+        '   "min_salary": number, # 最低年収（円）\n'
+        '   "max_salary": number, # 最高年収（円）\n'
+        '   "salary": string, # 1行目:年収の範囲（e.g. *** ~ ***万円）. 2行目以降:昇給、賞与、手当など、金銭に関するその他の情報\n'
+        '   "smoking_prevention_measure": string, # 受動喫煙対策についての情報\n'
+        '   "min_qualifications": string, # 必要なスキル・経験\n'
+        '   "pfd_qualifications": string, # 歓迎されるスキル・経験\n'
+        '   "ideal_profile": string, # この求人で望まれる人物像\n'
+        '   "_is_application_method_written": boolean, # 応募方法が記載されているか. 具体的な応募方法は提示してはいけないため、出力に含めないこと\n'
+        '   "summary": string, # 詳細な職務の内容. ここまでの項目と重複する情報を含めないように注意\n'
+        '   "other": string, # その他の重要な情報\n'
+        "}\n"
+        "###\n"
+    )
+
+
+def gpt_messages(prompt: str) -> list:
+    return [
+        {
+            "role": "system",
+            "content": prompt,
+        }
+    ]
+
+def parse_job_loading(text: str) -> dict:
+    # json として厳密でない場合をケア: 末尾のカンマを削除
+    text = re.sub(r",[\s\n]*}[\s\n]*$", "\n}\n", text)
+    text = text.replace("\\xa0", " ")
+    # json のパース
+    jobloading = json.loads(text, strict=False)
+    # json 内のnullを持つキーと、_ から始まるキーを削除
+    return {
+        k: v
+        for k, v in jobloading.items()
+        if v is not None and not k.startswith("_")
+    }
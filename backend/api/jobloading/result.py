@@ -1,5 +1,7 @@
+import logging
 import time
 from ..models import JobLoading
+from . import progress
 
 class JobLoadingResult:
     def __init__(self, jobloading_id, source_url):
@@ -9,9 +11,16 @@ class JobLoadingResult:
         self.error_message = ""
         self.telemetries = {
             "telemetry_fetch_method": "",
+            "telemetry_fetch_cache": "",
             "telemetry_scraping_time": None,
+            "telemetry_scraping_time_ms": None,
+            "telemetry_browser_wait_time_ms": None,
+            "telemetry_readiness": "",
+            "telemetry_readiness_time_ms": None,
             "telemetry_html_processing_names": [],
             "telemetry_html_processing_results": [],
+            "telemetry_content_tokens": None,
+            "telemetry_gpt_cache": "",
             "telemetry_gpt_time": None,
             "telemetry_gpt_tokens_prompt": None,
             "telemetry_gpt_tokens_completion": None,
@@ -26,6 +35,7 @@ class JobLoadingResult:
             **jobloading_json,
             **self.telemetries,
         )
+        self.publish_stage(progress.STAGE_SAVED)
     
 
     def save_error(self):
@@ -35,6 +45,20 @@ class JobLoadingResult:
             error_message=self.error_message,
             **self.telemetries,
         )
+        self.publish_stage(progress.STAGE_ERROR, error_message=self.error_message)
+
+    def publish_stage(self, stage: str, **data):
+        progress.publish_stage(self.jobloading_id, stage, **data)
+
+    def set_gpt_response(self, response, start_time: float) -> str:
+        gpt_time = round(time.time() - start_time)
+        logging.info(
+            f"OpenAI API response for {self.source_url} (jobloading_id: {self.jobloading_id}): {gpt_time} seconds, {response.model} {response.usage}"
+        )
+        self.set_telemetry('gpt_time', gpt_time)
+        self.set_telemetry('gpt_tokens_prompt', response.usage.prompt_tokens)
+        self.set_telemetry('gpt_tokens_completion', response.usage.completion_tokens)
+        return response.choices[0].message.content
 
     def set_error_message(self, error_message: str):
         self.error_message = error_message
@@ -0,0 +1,34 @@
+import time
+import uuid
+
+from .progress import get_client
+
+key_prefix = 'jobloading:semaphore'
+
+def slot_key(name: str) -> str:
+    return f'{key_prefix}:{name}'
+
+def acquire(name: str, limit: int, lease_seconds: int) -> str:
+    """Takes one of the ``limit`` slots named ``name`` shared by all workers.
+
+    Returns a token for ``release``, or None if every slot is taken. Holders
+    are scored by their expiry, so a slot held by a worker that died is freed
+    after ``lease_seconds``.
+    """
+    key = slot_key(name)
+    token = uuid.uuid4().hex
+    now = time.time()
+    # MULTI で実行するため、数えてから追加するまでの間に他のワーカーが割り込まない
+    pipeline = get_client().pipeline()
+    pipeline.zremrangebyscore(key, '-inf', now)
+    pipeline.zcard(key)
+    pipeline.zadd(key, {token: now + lease_seconds})
+    pipeline.expire(key, lease_seconds)
+    _, held, _, _ = pipeline.execute()
+    if held >= limit:
+        get_client().zrem(key, token)
+        return None
+    return token
+
+def release(name: str, token: str):
+    get_client().zrem(slot_key(name), token)
@@ -0,0 +1,70 @@
+import contextlib
+import logging
+from urllib.parse import urlparse
+
+from . import cache
+from .prompt import gpt_model, parse_job_loading
+from .result import JobLoadingResult
+
+# 同期 (tasks.exec_job_loading) と非同期 (async_loading) の取り込みで共通の手順
+
+def check_url(result: JobLoadingResult):
+    parsedUrl = urlparse(result.source_url)
+    if not all([parsedUrl.scheme, parsedUrl.netloc]):
+        result.set_error_message("URLが正しくありません。")
+        raise Exception(f"Invalid URL: {result.source_url}")
+
+@contextlib.contextmanager
+def failing_with(result: JobLoadingResult, error_message: str, note: str = None):
+    """Records ``error_message`` for the user if the wrapped step raises."""
+    try:
+        yield
+    except Exception as e:
+        result.add_telemetry_error_detail(str(e))
+        result.set_error_message(error_message)
+        if note:
+            e.add_note(note)
+        raise
+
+def fetching(result: JobLoadingResult):
+    return failing_with(result, "ウェブページの取得に失敗しました。", f"Failed to fetch HTML: {result.source_url}")
+
+def calling_gpt(result: JobLoadingResult):
+    # Future: HTMLをテキストのみにして再試行する
+    return failing_with(result, "求人情報の解析に失敗しました。", "OpenAI API call failed")
+
+def get_cached_extraction(result: JobLoadingResult, prompt: str) -> dict:
+    # 同じ内容・同じ職種カテゴリのページは以前の解析結果を使う
+    jobloading = cache.get_extraction(gpt_model, prompt)
+    if jobloading is not None:
+        logging.info(
+            f"Using the cached extraction for {result.source_url} (jobloading_id: {result.jobloading_id})"
+        )
+        result.set_telemetry("gpt_cache", "hit")
+    else:
+        result.set_telemetry("gpt_cache", "miss")
+    return jobloading
+
+def parse(result: JobLoadingResult, jobloadingJsonStr: str) -> dict:
+    try:
+        jobloading = parse_job_loading(jobloadingJsonStr)
+    except Exception as e:
+        result.add_telemetry_error_detail(str(e))
+        result.add_telemetry_error_detail(f"target: {jobloadingJsonStr}")
+        result.set_error_message("解析結果の取得に失敗しました。")
+        e.add_note(f"Failed to parse JSON: {jobloadingJsonStr}")
+        raise
+    logging.info(
+        f"Loaded data for {result.source_url} (jobloading_id: {result.jobloading_id}): {str(jobloading)}"
+    )
+    return jobloading
+
+def save(result: JobLoadingResult, jobloading: dict):
+    try:
+        result.save_and_complete(jobloading)
+    except Exception as e:
+        result.add_telemetry_error_detail(str(e))
+        result.add_telemetry_error_detail(f"data: {str(jobloading)}")
+        result.set_error_message("解析結果の保存に失敗しました。")
+        e.add_note(f"Failed to save data")
+        raise
@@ -0,0 +1,123 @@
+import logging
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand, CommandError
+
+from api.jobloading import fetcher
+
+corpus_dir = Path(__file__).resolve().parents[2] / "tests" / "fixtures" / "jobloading"
+
+
+class TelemetryRecorder:
+    """The part of JobLoadingResult that process_html_content writes to."""
+
+    def __init__(self):
+        self.names = []
+        self.results = []
+        self.telemetries = {}
+
+    def add_telemetry_html_processing(self, name, chars):
+        self.names.append(name)
+        self.results.append(chars)
+
+    def set_telemetry(self, key, value):
+        self.telemetries[key] = value
+
+
+def legacy_process_html_content(html_content, source_url, result):
+    """process_html_content before the single-walk reducer, kept for comparison."""
+    html = BeautifulSoup(html_content, fetcher.html_parser)
+    result.add_telemetry_html_processing('original', len(html_content))
+
+    # HTMLの分量を減らす. タグの構造は解析に有用である場合があるため残す.
+    # 後行順の深さ優先探索で情報を削除していく
+    def drop(target_tag, remove_tags, remove_attrs):
+        for child in target_tag.find_all(recursive=False):
+            drop(child, remove_tags, remove_attrs) # 後行順
+        # 処理
+        if target_tag.name and (target_tag.name.lower() in remove_tags): # 肥大化する情報の薄いタグは削除
+            target_tag.extract()
+        for attr in remove_attrs: # 肥大化しやすい属性は削除
+            if target_tag.has_attr(attr):
+                del target_tag[attr]
+        if not target_tag.contents and not target_tag.text.strip() and not target_tag.attrs: # 内容も属性もない空のタグは削除
+            target_tag.extract()
+
+    drop(html, ['link', 'style', 'svg', 'img'], ['id', 'class', 'style'])
+    processed_content = str(html)
+    result.add_telemetry_html_processing('remove tags/atributes: [link, style, svg, img], [id, class, style]', len(processed_content))
+
+    # HTMLの場合、Tokenは文字数の約80%. promptとcompletion合わせて16000トークンに収めることを考慮
+    max_content_length_html = 14000
+
+    if (len(processed_content) > max_content_length_html):
+        logging.info('The web content is too long. Meta and script tags are removed.')
+        drop(html, ['meta', 'script'], [])
+        processed_content = str(html)
+        result.add_telemetry_html_processing('remove tags: [meta, script]', len(processed_content))
+    
+    if (len(processed_content) <= max_content_length_html):
+        logging.info(f'Processed HTML for {source_url}: {len(html_content)} -> {len(processed_content)}')
+        return processed_content
+
+    # テキストコンテンツの場合、Tokenは文字数の約120%. promptとcompletion合わせて16000トークンに収めることを考慮
+    max_content_length_text = 10000
+
+    if (len(processed_content) > max_content_length_text):
+        # HTML構造を取り除き、テキストのみに変換（マーカーで構造をできるだけ保持）
+        logging.info('The web content is too long. HTML structure is removed.')
+        processed_content = html.get_text(' # ', strip=True)
+        result.add_telemetry_html_processing('remove HTML structure', len(processed_content))
+    
+    if (len(processed_content) > max_content_length_text):
+        # 構造マーカーを取り除いて妥協
+        logging.info('The web content is too long. Structure markers are removed.')
+        processed_content = html.get_text(' ', strip=True)
+        result.add_telemetry_html_processing('remove structure markers', len(processed_content))
+    
+    if (len(processed_content) > max_content_length_text):
+        # それでも最大文字数を超える場合は、末尾を削る
+        logging.warning('The web content is too long. The content is trimmed to max_content_length characters')
+        processed_content = processed_content[:max_content_length_text]
+        result.add_telemetry_html_processing('trim content', len(processed_content))
+
+    logging.info(f'Processed HTML for {source_url}: {len(html_content)} -> {len(processed_content)}')
+    return processed_content
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs process_html_content and its previous implementation over saved pages, "
+        "checks they produce the same output and telemetry, and compares their timings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("pages", nargs="*", help=f"HTML files. Defaults to {corpus_dir}/*.html")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        logging.disable(logging.WARNING)
+        paths = [Path(x) for x in options["pages"]] or sorted(corpus_dir.glob("*.html"))
+        self.stdout.write(f"parser: {fetcher.html_parser}")
+        for path in paths:
+            html_content = path.read_text()
+            outputs = {}
+            for name, function in (
+                ("legacy", legacy_process_html_content),
+                ("current", fetcher.process_html_content),
+            ):
+                timings = []
+                for _ in range(options["repeat"]):
+                    recorder = TelemetryRecorder()
+                    started_at = time.perf_counter()
+                    output = function(html_content, str(path), recorder)
+                    timings.append((time.perf_counter() - started_at) * 1000)
+                outputs[name] = (output, recorder.names, recorder.results)
+                self.stdout.write(
+                    f"{path.name} {name}: min {min(timings):.1f}ms, "
+                    f"median {sorted(timings)[len(timings) // 2]:.1f}ms, {recorder.results}"
+                )
+            if outputs["legacy"] != outputs["current"]:
+                raise CommandError(f"{path.name}: outputs differ")
@@ -0,0 +1,232 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+
+from api.filters import filter_jobs_by_salary
+from api.models import (
+    Job,
+    JobCategory,
+    Jobseeker,
+    Organization,
+    Proposal,
+    ProposalTag,
+    Tag,
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throwaway organization, compares the JobViewSet filters with their "
+        "previous implementation and rolls everything back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("filter", choices=["tags", "salary"])
+        parser.add_argument(
+            "--jobs", type=int, help="Defaults to 20000 for tags and 1000000 for salary."
+        )
+        parser.add_argument("--proposals-per-job", type=int, default=3)
+        parser.add_argument("--tags", type=int, default=20)
+        parser.add_argument("--tags-per-proposal", type=int, default=3)
+        parser.add_argument("--filter-tags", type=int, default=2)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--explain", action="store_true", help="Print EXPLAIN ANALYZE of both queries."
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        try:
+            with transaction.atomic():
+                self.organization = Organization.objects.create(name="benchmark")
+                self.job_category = JobCategory.objects.create(name="benchmark")
+                getattr(self, f"benchmark_{options['filter']}")(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed_tags(self, options):
+        organization = self.organization
+        jobseeker = Jobseeker.objects.create(name="benchmark", organization=organization)
+        self.tags = Tag.objects.bulk_create(
+            [
+                Tag(name=f"tag{i}", organization=organization)
+                for i in range(options["tags"])
+            ]
+        )
+
+        jobs = Job.objects.bulk_create(
+            [
+                Job(
+                    position=f"job{i}",
+                    job_category=self.job_category,
+                    organization=organization,
+                )
+                for i in range(options["jobs"] or 20000)
+            ],
+            batch_size=2000,
+        )
+        # 提案のない求人も混ぜる
+        proposals = Proposal.objects.bulk_create(
+            [
+                Proposal(
+                    jobseeker=jobseeker,
+                    job=job,
+                    position=job.position,
+                    organization=organization,
+                )
+                for job in jobs
+                for _ in range(self.random.randint(0, options["proposals_per_job"]))
+            ],
+            batch_size=2000,
+        )
+        ProposalTag.objects.bulk_create(
+            [
+                ProposalTag(proposal=proposal, tag=tag, organization=organization)
+                for proposal in proposals
+                for tag in self.random.sample(
+                    self.tags, self.random.randint(0, options["tags_per_proposal"])
+                )
+            ],
+            batch_size=2000,
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE api_proposal SET created_at = created_at - random() * interval '365 days' "
+                "WHERE organization_id = %s",
+                [organization.id],
+            )
+        Job.refresh_latest_proposals([job.id for job in jobs])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE api_job, api_proposal, api_proposaltag")
+
+        self.stdout.write(
+            f"Seeded {len(jobs)} jobs, {len(proposals)} proposals, {len(self.tags)} tags"
+        )
+
+    def seed_salary(self, options):
+        text_columns = [
+            field.column
+            for field in Job._meta.concrete_fields
+            if isinstance(field, (models.CharField, models.TextField)) and not field.null
+        ]
+        # 5% は年収なし、10% は片側のみ. salary_range はマイグレーション 0053 と同じ式で埋める
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO api_job (
+                    id, job_category_id, organization_id, is_archive, created_at, updated_at,
+                    min_salary, max_salary, {", ".join(text_columns)}
+                )
+                SELECT
+                    gen_random_uuid(), %s, %s, false, created_at, created_at,
+                    CASE WHEN r < 0.10 THEN NULL ELSE base END,
+                    CASE WHEN r < 0.05 OR r >= 0.10 AND r < 0.15 THEN NULL
+                         ELSE base + (random() * 500)::int END,
+                    {", ".join("''" for _ in text_columns)}
+                FROM (
+                    SELECT
+                        random() AS r,
+                        (200 + random() * 1000)::int AS base,
+                        now() - random() * interval '365 days' AS created_at
+                    FROM generate_series(1, %s)
+                ) seed
+                """,
+                [self.job_category.id, self.organization.id, options["jobs"] or 1000000],
+            )
+            cursor.execute(
+                "UPDATE api_job SET salary_range = int4range(min_salary, max_salary, '[]') "
+                "WHERE organization_id = %s AND (min_salary IS NOT NULL OR max_salary IS NOT NULL)",
+                [self.organization.id],
+            )
+            cursor.execute("ANALYZE api_job")
+            self.stdout.write(f"Seeded {options['jobs'] or 1000000} jobs")
+
+    def benchmark_salary(self, options):
+        self.seed_salary(options)
+        queryset = Job.objects.filter(organization=self.organization)
+
+        for min_salary, max_salary in ((400, 600), (None, 300), (1400, None), (500, 501)):
+            self.stdout.write(f"min_salary={min_salary} max_salary={max_salary}")
+
+            # 以前の実装: 条件の組み合わせごとに exclude と distinct を組み立てる
+            legacy = queryset
+            if min_salary is not None:
+                legacy = legacy.exclude(
+                    Q(max_salary__lte=min_salary) & Q(max_salary__isnull=False)
+                )
+            if max_salary is not None:
+                legacy = legacy.exclude(
+                    Q(min_salary__gte=max_salary) & Q(min_salary__isnull=False)
+                )
+            legacy = legacy.filter(
+                Q(max_salary__isnull=False) | Q(min_salary__isnull=False)
+            ).distinct()
+
+            current = filter_jobs_by_salary(queryset, min_salary, max_salary)
+            self.compare(legacy, current, options)
+
+    def benchmark_tags(self, options):
+        self.seed_tags(options)
+        tags = [
+            str(tag.id) for tag in self.random.sample(self.tags, options["filter_tags"])
+        ]
+        queryset = Job.objects.filter(organization=self.organization)
+
+        # 以前の実装: 求人ごとに最新の提案を相関サブクエリで探し、タグを数える
+        latest_proposal_subquery = (
+            Proposal.objects.filter(job=OuterRef("pk"))
+            .order_by("-created_at")
+            .values("id")[:1]
+        )
+        legacy = (
+            queryset.filter(proposal=Subquery(latest_proposal_subquery))
+            .annotate(
+                matching_tags_count=Count(
+                    "proposal__tags", filter=Q(proposal__tags__id__in=tags)
+                ),
+            )
+            .filter(matching_tags_count=len(tags))
+        )
+
+        matching_proposals = (
+            ProposalTag.objects.filter(tag__in=tags)
+            .values("proposal")
+            .annotate(matching_tags_count=Count("id"))
+            .filter(matching_tags_count=len(tags))
+            .values("proposal")
+        )
+        current = queryset.filter(latest_proposal__proposal__in=matching_proposals)
+
+        self.compare(legacy, current, options)
+
+    def compare(self, legacy, current, options):
+        legacy_ids = set(legacy.values_list("id", flat=True))
+        current_ids = set(current.values_list("id", flat=True))
+        if legacy_ids != current_ids:
+            raise CommandError(
+                f"Results differ: {len(legacy_ids - current_ids)} missing, "
+                f"{len(current_ids - legacy_ids)} unexpected"
+            )
+        self.stdout.write(f"Both queries return {len(current_ids)} jobs")
+
+        for name, queryset in (("legacy", legacy), ("current", current)):
+            timings = []
+            for _ in range(options["repeat"]):
+                started_at = time.perf_counter()
+                queryset.count()
+                timings.append((time.perf_counter() - started_at) * 1000)
+            self.stdout.write(
+                f"{name}: min {min(timings):.1f}ms, median {sorted(timings)[len(timings) // 2]:.1f}ms"
+            )
+            if options["explain"]:
+                self.stdout.write(queryset.explain(analyze=True))
@@ -0,0 +1,150 @@
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import openai
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from api.jobloading import async_loading, cache, semaphore
+from api.jobloading.result import JobLoadingResult
+from api.tasks import exec_job_loading
+
+corpus_dir = Path(__file__).resolve().parents[2] / "tests" / "fixtures" / "jobloading"
+
+extraction = {"position": "benchmark", "job_description": "benchmark"}
+
+
+class LocalSemaphore:
+    """semaphore.acquire/release counted in this process instead of Redis."""
+
+    def __init__(self):
+        self.held = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, name, limit, lease_seconds):
+        with self.lock:
+            tokens = self.held.setdefault(name, set())
+            if len(tokens) >= limit:
+                return None
+            token = uuid.uuid4().hex
+            tokens.add(token)
+            return token
+
+    def release(self, name, token):
+        with self.lock:
+            self.held[name].discard(token)
+
+
+def gpt_response():
+    return SimpleNamespace(
+        model="benchmark",
+        usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0),
+        choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(extraction)))],
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads the same URLs with exec_job_loading one after another (one prefork worker) "
+        "and with exec_job_loadings_async on one event loop, against local hosts that "
+        "answer after --page-latency and a model stub that answers after --gpt-latency, "
+        "and compares their throughput. Caches, progress and saving are stubbed out."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loadings", type=int, default=64)
+        parser.add_argument("--sync-loadings", type=int, default=8, help="The sync path is timed on fewer loadings.")
+        parser.add_argument("--hosts", type=int, default=8)
+        parser.add_argument("--page-latency", type=float, default=0.5)
+        parser.add_argument("--gpt-latency", type=float, default=3.0)
+        parser.add_argument("--gpt-concurrency", type=int, help="Defaults to JOBLOADING_GPT_CONCURRENCY.")
+        parser.add_argument("--page", default=str(corpus_dir / "careers_long.html"))
+
+    def handle(self, *args, **options):
+        logging.disable(logging.WARNING)
+        html_content = Path(options["page"]).read_text()
+        page_latency = options["page_latency"]
+        gpt_latency = options["gpt_latency"]
+
+        async def page(request):
+            await asyncio.sleep(page_latency)
+            return web.Response(text=html_content, content_type="text/html")
+
+        def create(**kwargs):
+            time.sleep(gpt_latency)
+            return gpt_response()
+
+        async def acreate(**kwargs):
+            await asyncio.sleep(gpt_latency)
+            return gpt_response()
+
+        saved = []
+        with self.serve(page, options["hosts"]) as hosts, contextlib.ExitStack() as stack:
+            for name in ("get_page", "set_page", "get_extraction", "set_extraction"):
+                stack.enter_context(mock.patch.object(cache, name, return_value=None))
+            local_semaphore = LocalSemaphore()
+            stack.enter_context(mock.patch.object(semaphore, "acquire", local_semaphore.acquire))
+            stack.enter_context(mock.patch.object(semaphore, "release", local_semaphore.release))
+            if options["gpt_concurrency"]:
+                stack.enter_context(mock.patch.object(async_loading, "gpt_concurrency", options["gpt_concurrency"]))
+            stack.enter_context(mock.patch.object(JobLoadingResult, "publish_stage"))
+            stack.enter_context(
+                mock.patch.object(JobLoadingResult, "save_and_complete", lambda result, jobloading: saved.append(result))
+            )
+            stack.enter_context(mock.patch.object(JobLoadingResult, "save_error", lambda result: saved.append(result)))
+            stack.enter_context(mock.patch.object(openai.ChatCompletion, "create", create))
+            stack.enter_context(mock.patch.object(openai.ChatCompletion, "acreate", acreate))
+
+            def items(count):
+                return [[str(uuid.uuid4()), f"{hosts[i % len(hosts)]}/jobs/{i}"] for i in range(count)]
+
+            self.stdout.write(
+                f"hosts: {len(hosts)}, per host: {async_loading.fetcher.default_domain_concurrency}, "
+                f"gpt concurrency: {async_loading.gpt_concurrency}, "
+                f"page latency: {page_latency}s, gpt latency: {gpt_latency}s"
+            )
+            throughputs = {}
+            for name, count, run in (
+                ("sync", options["sync_loadings"], lambda x: [exec_job_loading(*item) for item in x]),
+                ("async", options["loadings"], lambda x: asyncio.run(async_loading.run_job_loadings(x))),
+            ):
+                saved.clear()
+                started_at = time.perf_counter()
+                run(items(count))
+                elapsed = time.perf_counter() - started_at
+                errors = [x.error_message for x in saved if x.error_message]
+                throughputs[name] = count / elapsed
+                self.stdout.write(
+                    f"{name}: {count} loadings in {elapsed:.1f}s, {throughputs[name] * 60:.1f}/min, "
+                    f"errors: {len(errors)} {sorted(set(errors))}"
+                )
+            self.stdout.write(f"async / sync: {throughputs['async'] / throughputs['sync']:.1f}x")
+
+    @contextlib.contextmanager
+    def serve(self, handler, count):
+        """Serves ``handler`` on ``count`` ports of 127.0.0.1, each a separate host for the per-host limit."""
+        loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_get("/jobs/{n}", handler)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        sites = [web.TCPSite(runner, "127.0.0.1", 0) for _ in range(count)]
+        for site in sites:
+            loop.run_until_complete(site.start())
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            yield [f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}" for site in sites]
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.run_until_complete(runner.cleanup())
+            loop.close()
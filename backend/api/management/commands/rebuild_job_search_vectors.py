@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Job
+from api.search import JOB_SEARCH_FIELD_WEIGHTS, build_job_search_vector
+
+
+class Command(BaseCommand):
+    help = "Rebuilds Job.search_vector for existing jobs (jobs saved afterwards are kept up to date by Job.save)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Only rebuild jobs whose search_vector is NULL.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Job.objects.only("id", *JOB_SEARCH_FIELD_WEIGHTS).order_by("id")
+        if options["missing_only"]:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        total = 0
+        last_id = None
+        while True:
+            batch_queryset = queryset if last_id is None else queryset.filter(id__gt=last_id)
+            jobs = list(batch_queryset[: options["batch_size"]])
+            if not jobs:
+                break
+            for job in jobs:
+                job.search_vector = build_job_search_vector(job)
+            Job.objects.bulk_update(jobs, ["search_vector"])
+            total += len(jobs)
+            last_id = jobs[-1].id
+            self.stdout.write(f"{total} jobs updated")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search vectors of {total} jobs"))
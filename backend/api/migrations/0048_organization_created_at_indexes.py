@@ -0,0 +1,29 @@
+# Generated by Django 3.2.18 on 2026-10-18 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0047_auto_20231014_1157'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='api_job_org_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobseeker',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='api_jobseeker_org_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organizationcompany',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='api_orgcompany_org_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='api_record_org_created_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.18 on 2026-10-18 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0048_organization_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['organization', 'is_archive', '-created_at'], name='api_job_org_archive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobloading',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['organization', 'created_at'], name='api_jobloading_org_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['organization', '-created_at'], name='api_proposal_org_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['organization', 'is_checked'], name='api_record_org_checked_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# JobViewSet の keyword 検索 (api.search.filter_jobs_by_keyword) 用のトライグラムインデックス.
+# 全角・半角の表記ゆれを吸収するため normalize(..., NFKC) した式にインデックスを張る (PostgreSQL 13 以上).
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0049_organization_query_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS api_job_position_nfkc_trgm ON api_job USING GIN ((normalize(position, NFKC)) gin_trgm_ops);",
+            reverse_sql="DROP INDEX IF EXISTS api_job_position_nfkc_trgm;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS api_organizationcompany_name_nfkc_trgm ON api_organizationcompany USING GIN ((normalize(name, NFKC)) gin_trgm_ops);",
+            reverse_sql="DROP INDEX IF EXISTS api_organizationcompany_name_nfkc_trgm;",
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.18 on 2026-10-18 16:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0051_job_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='latest_proposal',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.proposal'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['job', '-created_at'], name='api_proposal_job_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposaltag',
+            index=models.Index(fields=['tag', 'proposal'], name='api_proposaltag_tag_prop_idx'),
+        ),
+        migrations.RunSQL(
+            "UPDATE api_job SET latest_proposal_id = latest.id FROM (SELECT DISTINCT ON (job_id) job_id, id FROM api_proposal ORDER BY job_id, created_at DESC) latest WHERE latest.job_id = api_job.id;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
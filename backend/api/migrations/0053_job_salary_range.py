@@ -0,0 +1,32 @@
+# Generated by Django 3.2.18 on 2026-10-18 16:28
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+
+# api.filters.job_salary_range と同じ規則で既存の求人を埋める. (organization, salary_range) の GiST には btree_gist が必要
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0052_job_latest_proposal'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='job',
+            name='salary_range',
+            field=django.contrib.postgres.fields.ranges.IntegerRangeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            "UPDATE api_job SET salary_range = int4range(min_salary, max_salary, '[]') WHERE (min_salary IS NOT NULL OR max_salary IS NOT NULL) AND (min_salary IS NULL OR max_salary IS NULL OR min_salary <= max_salary);",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['organization', 'salary_range'], name='api_job_org_salary_gist'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.18 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0053_job_salary_range'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='record',
+            name='api_record_org_checked_idx',
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(condition=models.Q(('is_checked', False)), fields=['organization', '-created_at'], name='api_record_unchecked_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.18 on 2026-10-18 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0054_record_unchecked_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobloading',
+            name='telemetry_browser_wait_time_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobloading',
+            name='telemetry_scraping_time_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
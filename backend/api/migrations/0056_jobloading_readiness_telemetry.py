@@ -0,0 +1,23 @@
+# Generated by Django 3.2.18 on 2026-10-18 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0055_jobloading_browser_telemetry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobloading',
+            name='telemetry_readiness',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='jobloading',
+            name='telemetry_readiness_time_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
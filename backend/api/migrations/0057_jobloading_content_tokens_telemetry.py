@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0056_jobloading_readiness_telemetry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobloading',
+            name='telemetry_content_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0057_jobloading_content_tokens_telemetry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobloading',
+            name='telemetry_fetch_cache',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='jobloading',
+            name='telemetry_gpt_cache',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
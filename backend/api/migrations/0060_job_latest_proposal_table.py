@@ -0,0 +1,29 @@
+# Generated by Django 3.2.18 on 2026-10-18 17:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0059_jobloading_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLatestProposal',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_proposal', serialize=False, to='api.job')),
+                ('proposal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.proposal')),
+            ],
+        ),
+        migrations.RunSQL(
+            "INSERT INTO api_joblatestproposal (job_id, proposal_id) SELECT id, latest_proposal_id FROM api_job WHERE latest_proposal_id IS NOT NULL;",
+            reverse_sql="UPDATE api_job SET latest_proposal_id = latest.proposal_id FROM api_joblatestproposal latest WHERE latest.job_id = api_job.id;",
+        ),
+        migrations.RemoveField(
+            model_name='job',
+            name='latest_proposal',
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.18 on 2026-10-18 17:52
+
+from django.db import migrations
+
+# api.filters.job_salary_range と同じく、下限が上限より大きい求人は入れ替えて salary_range を埋める
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0060_job_latest_proposal_table'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "UPDATE api_job SET salary_range = int4range(max_salary, min_salary, '[]') WHERE min_salary > max_salary;",
+            reverse_sql="UPDATE api_job SET salary_range = NULL WHERE min_salary > max_salary;",
+        ),
+    ]
@@ -0,0 +1,92 @@
+from django.db.models import TextField
+
+
+class CompactViewMixin:
+    """
+    ?view=compact  : compact_serializer_class で返し、compact_select_related / compact_only の列だけを読む
+    ?fields=a,b    : 指定した項目だけを返し、指定されていない TEXT 列やリレーション (select_related / prefetch_related) は読まない
+    どちらも GET のみ. 更新系は通常のシリアライザ・クエリセットのまま
+    """
+
+    compact_serializer_class = None
+    compact_select_related = ()
+    compact_only = ()
+
+    def is_compact(self):
+        request = getattr(self, "request", None)
+        return (
+            request is not None
+            and request.method == "GET"
+            and request.query_params.get("view", None) == "compact"
+        )
+
+    def get_requested_fields(self):
+        request = getattr(self, "request", None)
+        if request is None or request.method != "GET":
+            return None
+        fields = request.query_params.get("fields", "")
+        return [x.strip() for x in fields.split(",") if x.strip()] or None
+
+    def get_serializer_class(self):
+        if self.is_compact():
+            return self.compact_serializer_class
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_requested_fields()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.is_compact():
+            queryset = (
+                queryset.select_related(None)
+                .select_related(*self.compact_select_related)
+                .only(*self.compact_only)
+            )
+
+        fields = self.get_requested_fields()
+        if fields:
+            queryset = queryset.defer(
+                *[
+                    field.name
+                    for field in queryset.model._meta.concrete_fields
+                    if isinstance(field, TextField) and field.name not in fields
+                ]
+            )
+            queryset = self.prune_related(queryset)
+        return queryset
+
+    def prune_related(self, queryset):
+        """Drops the select_related / prefetch_related paths no requested field reads."""
+        sources = {field.source.split(".")[0] for field in self.get_serializer().fields.values()}
+        if "*" in sources:
+            # SerializerMethodField などは何を辿るか分からないので、そのまま読む
+            return queryset
+
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            paths = [
+                path
+                for name, tree in select_related.items()
+                if name in sources
+                for path in related_paths(tree, name)
+            ]
+            # 引数なしの select_related() はすべての外部キーを結合するため、残すものがある場合だけ渡す
+            queryset = queryset.select_related(None)
+            if paths:
+                queryset = queryset.select_related(*paths)
+        prefetch_related = [
+            lookup
+            for lookup in queryset._prefetch_related_lookups
+            if getattr(lookup, "prefetch_to", lookup).split("__")[0] in sources
+        ]
+        return queryset.prefetch_related(None).prefetch_related(*prefetch_related)
+
+
+def related_paths(tree, path):
+    """Flattens a ``Query.select_related`` tree into ``select_related()`` arguments."""
+    if not tree:
+        return [path]
+    return [x for name, subtree in tree.items() for x in related_paths(subtree, f"{path}__{name}")]
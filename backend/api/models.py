@@ -1,10 +1,15 @@
 import uuid
 import re
-from django.db import models
+from django.db import connection, models
 from django.contrib.auth.models import AbstractUser
-from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.fields import ArrayField, IntegerRangeField
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 
+from .filters import job_salary_range
+from .search import build_job_search_vector
+
 
 def get_file_path(instance, filename):
     ext = filename.split(".")[-1]
@@ -102,6 +107,14 @@ class OrganizationCompany(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["organization", "-created_at", "-id"],
+                name="api_orgcompany_org_created_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.organization} {self.company}"
 
@@ -139,6 +152,14 @@ class Jobseeker(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["organization", "-created_at", "-id"],
+                name="api_jobseeker_org_created_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.organization} {self.name}"
 
@@ -155,6 +176,8 @@ class Job(models.Model):
     layer = models.CharField(blank=True, null=False, max_length=20)
     min_salary = models.IntegerField(blank=True, null=True)
     max_salary = models.IntegerField(blank=True, null=True)
+    # [min_salary, max_salary] (片側がなければ上限・下限なし). save() で更新する
+    salary_range = IntegerRangeField(blank=True, null=True, editable=False)
     salary = models.TextField(blank=True, null=False)
     employment_status = models.CharField(blank=True, null=False, max_length=50)
     summary = models.TextField(blank=True, null=False)
@@ -171,14 +194,67 @@ class Job(models.Model):
     other = models.TextField(blank=True, null=False)
     source_url = models.CharField(blank=True, null=False, max_length=500)
     is_archive = models.BooleanField(blank=True, null=True, default=False)
+    # api.search.JOB_SEARCH_FIELD_WEIGHTS の項目を n-gram にした検索用ドキュメント. save() で更新する
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["organization", "-created_at", "-id"],
+                name="api_job_org_created_idx",
+            ),
+            models.Index(
+                fields=["organization", "is_archive", "-created_at"],
+                name="api_job_org_archive_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="api_job_search_vector_idx"),
+            GistIndex(
+                fields=["organization", "salary_range"],
+                name="api_job_org_salary_gist",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.search_vector = build_job_search_vector(self)
+        self.salary_range = job_salary_range(self.min_salary, self.max_salary)
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {
+                *kwargs["update_fields"],
+                "search_vector",
+                "salary_range",
+            }
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def refresh_latest_proposals(cls, job_ids):
+        """Points the ``JobLatestProposal`` of the given jobs at their newest proposal."""
+        # 提案がなくなった求人の行は、提案の削除とともに CASCADE で消える
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {JobLatestProposal._meta.db_table} (job_id, proposal_id) "
+                f"SELECT DISTINCT ON (job_id) job_id, id FROM {Proposal._meta.db_table} "
+                "WHERE job_id = ANY(%s::uuid[]) ORDER BY job_id, created_at DESC "
+                "ON CONFLICT (job_id) DO UPDATE SET proposal_id = EXCLUDED.proposal_id "
+                f"WHERE {JobLatestProposal._meta.db_table}.proposal_id <> EXCLUDED.proposal_id",
+                [[str(job_id) for job_id in job_ids]],
+            )
+
     def __str__(self):
         return f"{self.organization} {self.organization_company} {self.position}"
 
 
+class JobLatestProposal(models.Model):
+    # 求人ごとの最新の提案 (tags[] 絞り込み用). 提案の追加・削除時に Job.refresh_latest_proposals() で更新する.
+    # 求人の行に持たせると、提案のたびに全文検索などのインデックスを持つ求人の行が書き換わるため、別のテーブルにする
+    job = models.OneToOneField(
+        "Job", primary_key=True, on_delete=models.CASCADE, related_name="latest_proposal"
+    )
+    proposal = models.ForeignKey("Proposal", on_delete=models.CASCADE, related_name="+")
+
+
 class Proposal(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     jobseeker = models.ForeignKey("Jobseeker", on_delete=models.CASCADE)
@@ -214,6 +290,18 @@ class Proposal(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["organization", "-created_at"],
+                name="api_proposal_org_created_idx",
+            ),
+            models.Index(
+                fields=["job", "-created_at"],
+                name="api_proposal_job_created_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.job} {self.jobseeker}"
 
@@ -226,6 +314,14 @@ class ProposalTag(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["tag", "proposal"],
+                name="api_proposaltag_tag_prop_idx",
+            ),
+        ]
+
 
 class Record(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -238,6 +334,20 @@ class Record(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["organization", "-created_at", "-id"],
+                name="api_record_org_created_idx",
+            ),
+            # 未確認の記録は全体のごく一部なので、未確認の行だけを持つ部分インデックスにする
+            models.Index(
+                fields=["organization", "-created_at"],
+                name="api_record_unchecked_idx",
+                condition=models.Q(is_checked=False),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.proposal}"
 
@@ -254,10 +364,28 @@ class JobseekerHistoryNotification(models.Model):
         return f"{self.record} {self.is_send}"
 
 
+class JobLoadingBatch(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
+    user = models.ForeignKey("User", on_delete=models.CASCADE)
+    total = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user_id} {self.total} {self.created_at}"
+
+
 class JobLoading(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
     user = models.ForeignKey("User", on_delete=models.CASCADE)
+    batch = models.ForeignKey(
+        "JobLoadingBatch",
+        on_delete=models.SET_NULL,
+        related_name="job_loadings",
+        blank=True,
+        null=True,
+    )
 
     source_url = models.CharField(max_length=500)
     is_completed = models.BooleanField(default=False)
@@ -287,9 +415,16 @@ class JobLoading(models.Model):
     max_salary = models.IntegerField(blank=True, null=True)
 
     telemetry_fetch_method = models.CharField(blank=True, null=False, max_length=50)
+    telemetry_fetch_cache = models.CharField(blank=True, null=False, max_length=20)
     telemetry_scraping_time = models.IntegerField(blank=True, null=True)
+    telemetry_scraping_time_ms = models.IntegerField(blank=True, null=True)
+    telemetry_browser_wait_time_ms = models.IntegerField(blank=True, null=True)
+    telemetry_readiness = models.CharField(blank=True, null=False, max_length=20)
+    telemetry_readiness_time_ms = models.IntegerField(blank=True, null=True)
     telemetry_html_processing_names = ArrayField(models.CharField(max_length=50), blank=True, null=True)
     telemetry_html_processing_results = ArrayField(models.IntegerField(), blank=True, null=True)
+    telemetry_content_tokens = models.IntegerField(blank=True, null=True)
+    telemetry_gpt_cache = models.CharField(blank=True, null=False, max_length=20)
     telemetry_gpt_time = models.IntegerField(blank=True, null=True)
     telemetry_gpt_tokens_prompt = models.IntegerField(blank=True, null=True)
     telemetry_gpt_tokens_completion = models.IntegerField(blank=True, null=True)
@@ -299,6 +434,15 @@ class JobLoading(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["organization", "created_at"],
+                name="api_jobloading_org_created_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+        ]
+
     def __str__(self):
         if (self.is_error):
             return f"{self.user_id} {self.source_url[:20]} {self.error_message[:20]}"
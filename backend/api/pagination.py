@@ -1,5 +1,175 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """Returns the planner's row estimate for ``queryset`` instead of running COUNT(*)."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 class StandardResultsSetPagination(PageNumberPagination):
+    """
+    ?page=n                                   : ページ番号方式 (COUNT(*) で件数を返す)
+    ?page=n&count=none|estimate               : 件数を数えない / 実行計画の推定値を返す
+    ?pagination=cursor[&cursor=...]           : (created_at, id) のキーセット方式. 深いページでも OFFSET しない
+                                                (created_at, id) の降順で返すため、一致度順などの並び替えとは併用できない
+    """
+
     page_size = 20
+    pagination_query_param = "pagination"
+    count_query_param = "count"
+    count_modes = ("exact", "none", "estimate")
+    cursor_query_param = "cursor"
+    cursor_ordering = ("-created_at", "-id")
+    # cursor 方式で受け付ける、ビューのクエリセットの並び順
+    cursor_compatible_ordering = {"created_at", "-created_at", "id", "-id", "pk", "-pk"}
+    invalid_cursor_message = "Invalid cursor"
+    invalid_cursor_ordering_message = "Cursor pagination cannot be combined with this ordering."
+    invalid_count_message = "Invalid count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.is_cursor = request.query_params.get(self.pagination_query_param) == "cursor"
+        self.count_mode = request.query_params.get(
+            self.count_query_param, "none" if self.is_cursor else "exact"
+        )
+        if self.count_mode not in self.count_modes:
+            raise ValidationError({self.count_query_param: [self.invalid_count_message]})
+
+        if self.is_cursor:
+            return self.paginate_queryset_by_cursor(queryset, request)
+        if self.count_mode == "exact":
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_queryset_without_count(queryset, request)
+
+    def paginate_queryset_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+
+        offset = (self.page_number - 1) * page_size
+        results = list(queryset[offset : offset + page_size + 1])
+        if self.page_number > 1 and not results:
+            raise NotFound(self.invalid_page_message)
+
+        self.has_next = len(results) > page_size
+        self.count = estimate_count(queryset) if self.count_mode == "estimate" else None
+        return results[:page_size]
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        page_size = self.get_page_size(request)
+        self.count = estimate_count(queryset) if self.count_mode == "estimate" else None
+
+        if not set(queryset.query.order_by) <= self.cursor_compatible_ordering:
+            # 一致度順などで並べたまま (created_at, id) で区切ると、行が欠けたり重複したりする.
+            raise ValidationError({self.pagination_query_param: [self.invalid_cursor_ordering_message]})
+
+        queryset = queryset.order_by(*self.cursor_ordering)
+        # .reverse() されたクエリセットのままだと DESC が ASC になるため、向きを戻す.
+        queryset.query.standard_ordering = True
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            model = queryset.model
+            table = model._meta.db_table
+            pk_type = model._meta.pk.db_type(connections[queryset.db])
+            # 行値比較にすると (organization, created_at, id) の複合インデックスをそのまま辿れる
+            queryset = queryset.extra(
+                where=[
+                    f'("{table}"."created_at", "{table}"."{model._meta.pk.column}") '
+                    f"< (%s::timestamptz, %s::{pk_type})"
+                ],
+                params=list(position),
+            )
+
+        results = list(queryset[: page_size + 1])
+        self.has_next = len(results) > page_size
+        results = results[:page_size]
+        self.next_position = (
+            (results[-1].created_at.isoformat(), str(results[-1].pk))
+            if self.has_next
+            else None
+        )
+        return results
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk = json.loads(urlsafe_b64decode(encoded.encode()).decode())
+            if parse_datetime(created_at) is None:
+                raise ValueError
+            # 型が合わない値をそのまま SQL に渡すと DataError (500) になる
+            pk = str(model._meta.pk.to_python(pk))
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def encode_cursor(self, position):
+        return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def get_paginated_response(self, data):
+        if self.is_cursor:
+            response = OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", None),
+                    ("results", data),
+                ]
+            )
+            if self.count is not None:
+                response["count"] = self.count
+            return Response(response)
+        if self.count_mode == "exact":
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_next_link(self):
+        if self.count_mode == "exact" and not self.is_cursor:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.is_cursor:
+            return replace_query_param(
+                url, self.cursor_query_param, self.encode_cursor(self.next_position)
+            )
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.count_mode == "exact" and not self.is_cursor:
+            return super().get_previous_link()
+        if self.is_cursor or self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
@@ -0,0 +1,119 @@
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Value
+
+# PostgreSQL の標準パーサーは日本語を単語に分割しないため、文字 n-gram に分割した文字列を 'simple' 設定で索引する
+SEARCH_NGRAM_SIZE = 2
+
+JOB_SEARCH_FIELD_WEIGHTS = {
+    "position": "A",
+    "summary": "B",
+    "min_qualifications": "C",
+    "pfd_qualifications": "C",
+    "ideal_profile": "C",
+    "benefit": "D",
+    "address": "D",
+}
+
+
+def normalize_keyword(keyword):
+    # 全角・半角の表記ゆれを吸収する (DB側も normalize(..., NFKC) した式でインデックスを張っている)
+    return unicodedata.normalize("NFKC", keyword)
+
+
+def escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def filter_jobs_by_keyword(queryset, keyword):
+    """Filters jobs whose position or company name contains ``keyword``.
+
+    Both sides are NFKC-normalized and matched with ILIKE so the trigram
+    indexes from migration 0050 can be used. The two conditions are combined
+    with UNION instead of an OR across the join, so each side is an index scan
+    and no DISTINCT is needed. ``keyword_rank`` is the trigram similarity of
+    the better-matching column.
+    """
+    keyword = normalize_keyword(keyword)
+    pattern = "%" + escape_like(keyword) + "%"
+    return queryset.extra(
+        select={
+            "keyword_rank": (
+                "GREATEST("
+                "similarity(normalize(api_job.position, NFKC), %s), "
+                "COALESCE(("
+                "SELECT similarity(normalize(oc.name, NFKC), %s) "
+                "FROM api_organizationcompany oc "
+                "WHERE oc.id = api_job.organization_company_id"
+                "), 0))"
+            )
+        },
+        select_params=[keyword, keyword],
+        where=[
+            "api_job.id IN ("
+            "SELECT j.id FROM api_job j "
+            "WHERE normalize(j.position, NFKC) ILIKE %s "
+            "UNION "
+            "SELECT j.id FROM api_job j "
+            "JOIN api_organizationcompany oc ON oc.id = j.organization_company_id "
+            "WHERE normalize(oc.name, NFKC) ILIKE %s"
+            ")"
+        ],
+        params=[pattern, pattern],
+    )
+
+
+def ngram_words(text):
+    return [
+        word
+        for word in re.split(r"[\W_]+", normalize_keyword(text).lower())
+        if word
+    ]
+
+
+def ngram_text(text, n=SEARCH_NGRAM_SIZE):
+    tokens = []
+    for word in ngram_words(text):
+        if len(word) <= n:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i : i + n] for i in range(len(word) - n + 1))
+    return " ".join(tokens)
+
+
+def build_job_search_vector(job):
+    vector = None
+    for field, weight in JOB_SEARCH_FIELD_WEIGHTS.items():
+        field_vector = SearchVector(
+            Value(ngram_text(getattr(job, field) or "")), config="simple", weight=weight
+        )
+        vector = field_vector if vector is None else vector + field_vector
+    return vector
+
+
+def build_search_query(q, n=SEARCH_NGRAM_SIZE):
+    """Builds a tsquery matching documents indexed with ``ngram_text``.
+
+    Every n-gram of every word has to be present. Words shorter than ``n``
+    become prefix matches so one-character queries still find documents.
+    """
+    terms = []
+    for word in ngram_words(q):
+        if len(word) < n:
+            terms.append(f"{word}:*")
+        else:
+            terms.extend(word[i : i + n] for i in range(len(word) - n + 1))
+    if not terms:
+        return None
+    return SearchQuery(" & ".join(terms), config="simple", search_type="raw")
+
+
+def filter_jobs_by_search_query(queryset, q):
+    query = build_search_query(q)
+    if query is None:
+        return queryset.none()
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F("search_vector"), query)
+    )
@@ -1,6 +1,8 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 
 from rest_framework import serializers
@@ -14,14 +16,25 @@ from .models import (
     Tag,
     Jobseeker,
     Job,
+    JobLatestProposal,
     Proposal,
+    ProposalTag,
     Record,
     JobseekerHistoryNotification,
     JobLoading,
+    JobLoadingBatch,
 )
 
 
 class BulkSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        # 参照先の id は全件まとめて確認する
+        if hasattr(self.child, "validate_related_ids"):
+            errors = self.child.validate_related_ids(attrs)
+            if any(errors):
+                raise serializers.ValidationError(errors)
+        return attrs
+
     def create(self, validated_data):
         result = [self.child.create(attrs) for attrs in validated_data]
 
@@ -36,9 +49,17 @@ class BulkSerializer(serializers.ListSerializer):
         return result
 
     def update(self, instances, validated_data):
+        # NOTE: instances の並び順はリクエストと一致しないので id で対応付ける
+        instances = {instance.id: instance for instance in instances}
+        missing = [attrs["id"] for attrs in validated_data if attrs["id"] not in instances]
+        if missing:
+            raise serializers.ValidationError(
+                [f"Object with id {x} does not exist." for x in missing]
+            )
+
         result = [
-            self.child.update(instance, attrs)
-            for instance, attrs in zip(instances, validated_data)
+            self.child.update(instances[attrs["id"]], attrs)
+            for attrs in validated_data
         ]
         for instance in result:
             instance.updated_at = timezone.now()
@@ -57,6 +78,263 @@ class BulkSerializer(serializers.ListSerializer):
         return result
 
 
+# ProposalSerializer.create がリクエストからそのまま写す項目
+PROPOSAL_CREATE_FIELDS = (
+    "intention",
+    "is_favorite",
+    "comment",
+    "is_public",
+    "is_checked",
+    "position",
+    "salary",
+    "employment_status",
+    "summary",
+    "min_qualifications",
+    "pfd_qualifications",
+    "ideal_profile",
+    "address",
+    "working_hours",
+    "holiday",
+    "benefit",
+    "trial_period",
+    "smoking_prevention_measure",
+    "other",
+    "is_appeal_layer",
+    "is_appeal_remote",
+    "published_at",
+)
+
+
+class ProposalBulkSerializer(BulkSerializer):
+    """Creates proposals in bulk with the same result as ``ProposalSerializer.create`` per item.
+
+    Jobseekers, jobs and tags are loaded with one query each, the tags of
+    every job's latest proposal with one more, and proposals and
+    ``ProposalTag`` rows are inserted with ``bulk_create`` in one transaction.
+    """
+
+    def validate(self, attrs):
+        # 参照先の存在確認は create で in_bulk する際に行う
+        return attrs
+
+    def create(self, validated_data):
+        organization_id = self.context["request"].user.organization_id
+
+        jobseekers = (
+            Jobseeker.objects.select_related("in_charge")
+            .filter(organization_id=organization_id)
+            .in_bulk({attrs["jobseeker"]["id"] for attrs in validated_data})
+        )
+        jobs = (
+            Job.objects.select_related("organization_company__company", "job_category")
+            .defer("search_vector")
+            .filter(organization_id=organization_id)
+            .in_bulk({attrs["job"]["id"] for attrs in validated_data})
+        )
+        tags = Tag.objects.filter(organization_id=organization_id).in_bulk(
+            {tag["id"] for attrs in validated_data for tag in attrs["tags"]}
+        )
+        errors = []
+        for attrs in validated_data:
+            error = {}
+            for key, found in (("jobseeker", jobseekers), ("job", jobs)):
+                if attrs[key]["id"] not in found:
+                    error[key] = [
+                        f"Invalid pk \"{attrs[key]['id']}\" - object does not exist."
+                    ]
+            missing_tags = [tag["id"] for tag in attrs["tags"] if tag["id"] not in tags]
+            if missing_tags:
+                error["tags"] = [
+                    f"Invalid pk \"{x}\" - object does not exist." for x in missing_tags
+                ]
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        # タグの指定がない提案は、同じ求人の最新の提案のタグを引き継ぐ
+        latest_tags = defaultdict(list)
+        latest_proposal_jobs = dict(
+            JobLatestProposal.objects.filter(job_id__in=jobs).values_list("proposal_id", "job_id")
+        )
+        for proposal_tag in ProposalTag.objects.select_related("tag").filter(
+            proposal_id__in=latest_proposal_jobs
+        ):
+            latest_tags[latest_proposal_jobs[proposal_tag.proposal_id]].append(
+                proposal_tag.tag
+            )
+
+        instances = []
+        for attrs in validated_data:
+            job = jobs[attrs["job"]["id"]]
+            instance = Proposal(
+                jobseeker=jobseekers[attrs["jobseeker"]["id"]],
+                job=job,
+                organization_id=organization_id,
+                **{field: attrs[field] for field in PROPOSAL_CREATE_FIELDS},
+            )
+            instance_tags = [tags[tag["id"]] for tag in attrs["tags"]] or list(
+                latest_tags[job.id]
+            )
+            # 同じ求人への提案が続く場合は、直前の提案が最新になる
+            latest_tags[job.id] = instance_tags
+            instance._prefetched_objects_cache = {"tags": instance_tags}
+            instances.append(instance)
+
+        with transaction.atomic():
+            Proposal.objects.bulk_create(instances, batch_size=100)
+            ProposalTag.objects.bulk_create(
+                [
+                    ProposalTag(proposal=instance, tag=tag, organization_id=organization_id)
+                    for instance in instances
+                    for tag in instance._prefetched_objects_cache["tags"]
+                ],
+                batch_size=500,
+            )
+            # bulk_create では post_save が飛ばないので、最新の提案をここで付け替える
+            Job.refresh_latest_proposals({instance.job_id for instance in instances})
+
+        return instances
+
+    def update(self, instances, validated_data):
+        """Partially updates ``instances`` with the items of ``validated_data`` in the same order.
+
+        Only the fields given in some item are written, with one
+        ``bulk_update``, and only the ``ProposalTag`` rows of tags that were
+        added or removed are inserted or deleted. When a proposal appears
+        more than once, the later item wins.
+        """
+        organization_id = self.context["request"].user.organization_id
+        updated_at = timezone.now()
+
+        proposals = {}
+        fields = {"updated_at"}
+        requested_tags = {}
+        for instance, attrs in zip(instances, validated_data):
+            for field in PROPOSAL_CREATE_FIELDS:
+                if field in attrs:
+                    setattr(instance, field, attrs[field])
+                    fields.add(field)
+            instance.updated_at = updated_at
+            proposals[instance.id] = instance
+            if "tags" in attrs:
+                requested_tags[instance.id] = list(
+                    dict.fromkeys(tag["id"] for tag in attrs["tags"])
+                )
+
+        current_tags = defaultdict(dict)
+        for proposal_tag in ProposalTag.objects.select_related("tag").filter(
+            proposal_id__in=proposals
+        ):
+            current_tags[proposal_tag.proposal_id][proposal_tag.tag_id] = proposal_tag
+        tags = Tag.objects.filter(organization_id=organization_id).in_bulk(
+            {tag_id for tag_ids in requested_tags.values() for tag_id in tag_ids}
+        )
+        missing_tags = {
+            tag_id for tag_ids in requested_tags.values() for tag_id in tag_ids
+        } - set(tags)
+        if missing_tags:
+            raise serializers.ValidationError(
+                {
+                    "tags": [
+                        f"Invalid pk \"{x}\" - object does not exist." for x in missing_tags
+                    ]
+                }
+            )
+
+        created, deleted = [], []
+        for proposal_id, instance in proposals.items():
+            rows = current_tags[proposal_id]
+            if proposal_id not in requested_tags:
+                instance._prefetched_objects_cache = {
+                    "tags": [row.tag for row in rows.values()]
+                }
+                continue
+            tag_ids = requested_tags[proposal_id]
+            deleted += [row.id for tag_id, row in rows.items() if tag_id not in tag_ids]
+            created += [
+                ProposalTag(proposal=instance, tag=tags[tag_id], organization_id=organization_id)
+                for tag_id in tag_ids
+                if tag_id not in rows
+            ]
+            instance._prefetched_objects_cache = {
+                "tags": [tags[tag_id] for tag_id in tag_ids]
+            }
+
+        with transaction.atomic():
+            Proposal.objects.bulk_update(
+                list(proposals.values()), sorted(fields), batch_size=100
+            )
+            if deleted:
+                ProposalTag.objects.filter(id__in=deleted).delete()
+            ProposalTag.objects.bulk_create(created, batch_size=500)
+
+        return instances
+
+
+class DynamicFieldsMixin:
+    """Keeps only the top-level fields listed in the ``fields`` context (``?fields=a,b``)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get("fields")
+        if requested:
+            for field_name in set(self.fields) - set(requested):
+                self.fields.pop(field_name)
+
+
+def related_ids(value):
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        value = [value]
+    return [x["id"] for x in value if x.get("id") is not None]
+
+
+class OrganizationModelSerializer(serializers.ModelSerializer):
+    """Base for serializers of rows owned by the requesting user's organization.
+
+    Foreign keys are assigned by id (``organization_id=...``) instead of
+    re-fetching objects, and the ids of the nested objects listed in
+    ``related_models`` are checked with one query per model, across all items
+    of a bulk request.
+    """
+
+    related_models = {}
+
+    @property
+    def organization_id(self):
+        return self.context["request"].user.organization_id
+
+    def validate(self, attrs):
+        # 一括の場合は BulkSerializer、入れ子の場合は親がまとめて確認する
+        if self.parent is None and not self.context.get("batch_related_ids"):
+            errors = self.validate_related_ids([attrs])[0]
+            if errors:
+                raise serializers.ValidationError(errors)
+        return attrs
+
+    def validate_related_ids(self, items):
+        """Returns one error dict per item for ids that do not exist in the organization."""
+        errors = [{} for _ in items]
+        for field_name, model in self.related_models.items():
+            item_ids = [related_ids(attrs.get(field_name)) for attrs in items]
+            ids = set().union(*item_ids)
+            if not ids:
+                continue
+
+            queryset = model.objects.filter(id__in=ids)
+            if "organization" in [field.name for field in model._meta.concrete_fields]:
+                queryset = queryset.filter(organization_id=self.organization_id)
+            found = set(queryset.values_list("id", flat=True))
+            for error, x in zip(errors, item_ids):
+                missing = [pk for pk in x if pk not in found]
+                if missing:
+                    error[field_name] = [
+                        f'Invalid pk "{pk}" - object does not exist.' for pk in missing
+                    ]
+        return errors
+
+
 class UserSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(required=True)
     date_joined = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
@@ -144,7 +422,7 @@ class JobCategorySerializer(serializers.ModelSerializer):
         ]
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(OrganizationModelSerializer):
     id = serializers.UUIDField(required=False)
     created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
     updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
@@ -161,16 +439,13 @@ class TagSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         instance = Tag.objects.create(
             name=validated_data["name"],
-            organization=Organization.objects.get(
-                id=self.context["request"].user.organization.id
-            ),
+            organization_id=self.organization_id,
         )
-        instance.save()
 
         return instance
 
 
-class OrganizationCompanySerializer(serializers.ModelSerializer):
+class OrganizationCompanySerializer(OrganizationModelSerializer):
     id = serializers.UUIDField(required=False)
     company = CompanySerializer(many=False, required=False, allow_null=True)
     created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
@@ -200,6 +475,8 @@ class OrganizationCompanySerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
+    related_models = {"company": Company}
+
     def create(self, validated_data):
         instance = OrganizationCompany.objects.create(
             name=validated_data["name"],
@@ -217,14 +494,11 @@ class OrganizationCompanySerializer(serializers.ModelSerializer):
             acquisition_rate=validated_data["acquisition_rate"],
             childcare_leave_rate=validated_data["childcare_leave_rate"],
             other=validated_data["other"],
-            company=Company.objects.get(id=validated_data["company"]["id"])
+            company_id=validated_data["company"]["id"]
             if validated_data["company"] != None
             else None,
-            organization=Organization.objects.get(
-                id=self.context["request"].user.organization.id
-            ),
+            organization_id=self.organization_id,
         )
-        instance.save()
 
         return instance
 
@@ -243,7 +517,7 @@ class OrganizationCompanySerializer(serializers.ModelSerializer):
         instance.acquisition_rate = validated_data["acquisition_rate"]
         instance.childcare_leave_rate = validated_data["childcare_leave_rate"]
         instance.other = validated_data["other"]
-        instance.company = Company.objects.get(id=validated_data["company"]["id"]) if validated_data["company"] != None else None
+        instance.company_id = validated_data["company"]["id"] if validated_data["company"] != None else None
         instance.save()
 
         return instance
@@ -262,7 +536,7 @@ class OrganizationCompanyAllSerializer(serializers.ModelSerializer):
         ]
 
 
-class JobseekerSerializer(serializers.ModelSerializer):
+class JobseekerSerializer(OrganizationModelSerializer):
     id = serializers.UUIDField(required=False)
     created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
     updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
@@ -284,6 +558,8 @@ class JobseekerSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
+    related_models = {"in_charge": User}
+
     def create(self, validated_data):
         instance = Jobseeker.objects.create(
             name=validated_data["name"],
@@ -291,15 +567,12 @@ class JobseekerSerializer(serializers.ModelSerializer):
             gender=validated_data["gender"],
             phone_number=validated_data["phone_number"],
             email=validated_data["email"],
-            in_charge=User.objects.get(id=validated_data["in_charge"]["id"])
+            in_charge_id=validated_data["in_charge"]["id"]
             if validated_data["in_charge"] != None
             else None,
             last_record_at=validated_data["last_record_at"],
-            organization=Organization.objects.get(
-                id=self.context["request"].user.organization.id
-            ),
+            organization_id=self.organization_id,
         )
-        instance.save()
 
         return instance
 
@@ -309,8 +582,8 @@ class JobseekerSerializer(serializers.ModelSerializer):
         instance.gender = validated_data["gender"]
         instance.phone_number = validated_data["phone_number"]
         instance.email = validated_data["email"]
-        instance.in_charge = (
-            User.objects.get(id=validated_data["in_charge"]["id"])
+        instance.in_charge_id = (
+            validated_data["in_charge"]["id"]
             if validated_data["in_charge"] != None
             else None
         )
@@ -320,7 +593,7 @@ class JobseekerSerializer(serializers.ModelSerializer):
         return instance
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(DynamicFieldsMixin, OrganizationModelSerializer):
     id = serializers.UUIDField(required=False)
     created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
     updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
@@ -357,14 +630,15 @@ class JobSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
+    related_models = {
+        "organization_company": OrganizationCompany,
+        "job_category": JobCategory,
+    }
+
     def create(self, validated_data):
         instance = Job.objects.create(
-            organization_company=OrganizationCompany.objects.get(
-                id=validated_data["organization_company"]["id"]
-            ),
-            job_category=JobCategory.objects.get(
-                id=validated_data["job_category"]["id"]
-            ),
+            organization_company_id=validated_data["organization_company"]["id"],
+            job_category_id=validated_data["job_category"]["id"],
             position=validated_data["position"],
             layer=validated_data["layer"],
             min_salary=validated_data["min_salary"],
@@ -385,21 +659,14 @@ class JobSerializer(serializers.ModelSerializer):
             source_url=validated_data["source_url"],
             other=validated_data["other"],
             is_archive=validated_data["is_archive"],
-            organization=Organization.objects.get(
-                id=self.context["request"].user.organization.id
-            ),
+            organization_id=self.organization_id,
         )
-        instance.save()
 
         return instance
 
     def update(self, instance, validated_data):
-        instance.organization_company = OrganizationCompany.objects.get(
-            id=validated_data["organization_company"]["id"]
-        )
-        instance.job_category = JobCategory.objects.get(
-            id=validated_data["job_category"]["id"]
-        )
+        instance.organization_company_id = validated_data["organization_company"]["id"]
+        instance.job_category_id = validated_data["job_category"]["id"]
         instance.position = validated_data["position"]
         instance.layer = validated_data["layer"]
         instance.min_salary = validated_data["min_salary"]
@@ -427,7 +694,7 @@ class JobSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ProposalSerializer(serializers.ModelSerializer):
+class ProposalSerializer(DynamicFieldsMixin, OrganizationModelSerializer):
     id = serializers.UUIDField(required=False)
     created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
     updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
@@ -471,20 +738,22 @@ class ProposalSerializer(serializers.ModelSerializer):
             "jobseeker",
             "job",
         ]
-        list_serializer_class = BulkSerializer
+        list_serializer_class = ProposalBulkSerializer
+
+    related_models = {"jobseeker": Jobseeker, "job": Job, "tags": Tag}
 
     def create(self, validated_data):
-        latest_proposal = Proposal.objects.filter(
-            job__id__exact=validated_data["job"]["id"]
-        ).order_by("-created_at")[:1]
-        if latest_proposal.count() > 0:
-            tagsObj = latest_proposal[0].tags.all()
-        else:
-            tagsObj = Tag.objects.none()
+        # タグの指定がなければ、同じ求人の最新の提案のタグを引き継ぐ
+        tag_ids = [tag["id"] for tag in validated_data["tags"]] or list(
+            ProposalTag.objects.filter(
+                proposal_id=JobLatestProposal.objects.filter(job_id=validated_data["job"]["id"])
+                .values("proposal")[:1]
+            ).values_list("tag_id", flat=True)
+        )
 
         instance = Proposal(
-            jobseeker=Jobseeker.objects.get(id=validated_data["jobseeker"]["id"]),
-            job=Job.objects.get(id=validated_data["job"]["id"]),
+            jobseeker_id=validated_data["jobseeker"]["id"],
+            job_id=validated_data["job"]["id"],
             intention=validated_data["intention"],
             is_favorite=validated_data["is_favorite"],
             comment=validated_data["comment"],
@@ -507,30 +776,14 @@ class ProposalSerializer(serializers.ModelSerializer):
             is_appeal_layer=validated_data["is_appeal_layer"],
             is_appeal_remote=validated_data["is_appeal_remote"],
             published_at=validated_data["published_at"],
-            organization=Organization.objects.get(
-                id=self.context["request"].user.organization.id
-            ),
+            organization_id=self.organization_id,
         )
 
         instance.save()
 
-        if len(validated_data["tags"]) > 0:
-            for tag in validated_data["tags"]:
-                tagObj = Tag.objects.get(id=tag["id"])
-                instance.tags.add(
-                    tagObj,
-                    through_defaults={
-                        "organization_id": self.context["request"].user.organization.id
-                    },
-                )
-        else:
-            for tagObj in tagsObj:
-                instance.tags.add(
-                    tagObj,
-                    through_defaults={
-                        "organization_id": self.context["request"].user.organization.id
-                    },
-                )
+        instance.tags.add(
+            *tag_ids, through_defaults={"organization_id": self.organization_id}
+        )
         return instance
 
     def update(self, instance, validated_data):
@@ -580,22 +833,18 @@ class ProposalSerializer(serializers.ModelSerializer):
         if isinstance(self._kwargs["data"], dict):
             instance.save()
 
-        proposal = Proposal.objects.get(id=instance.id)
-        proposal.tags.clear()
-
-        for tag in validated_data.get("tags", instance.tags.all()):
-            tagObj = Tag.objects.get(id=tag["id"])
+        # タグの指定がなければそのまま
+        if "tags" in validated_data:
+            instance.tags.clear()
             instance.tags.add(
-                tagObj,
-                through_defaults={
-                    "organization_id": self.context["request"].user.organization.id
-                },
+                *[tag["id"] for tag in validated_data["tags"]],
+                through_defaults={"organization_id": self.organization_id},
             )
 
         return instance
 
 
-class RecordSerializer(serializers.ModelSerializer):
+class RecordSerializer(DynamicFieldsMixin, OrganizationModelSerializer):
     id = serializers.UUIDField(required=True)
     created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
     updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
@@ -615,22 +864,23 @@ class RecordSerializer(serializers.ModelSerializer):
         ]
         list_serializer_class = BulkSerializer
 
+    related_models = {"proposal": Proposal}
+
     def create(self, validated_data):
         instance = Record.objects.create(
-            proposal=Proposal.objects.get(id=validated_data["proposal"]["id"]),
+            proposal_id=validated_data["proposal"]["id"],
             before_record_at=validated_data["before_record_at"],
             is_long_time=validated_data["is_long_time"],
             is_checked=validated_data["is_checked"],
-            organization=Organization.objects.get(
-                id=self.context["request"].user.organization.id
-            ),
+            organization_id=self.organization_id,
         )
-        instance.save()
 
         return instance
 
     def update(self, instance, validated_data):
-        instance.proposal = Proposal.objects.get(id=validated_data["proposal"]["id"])
+        # 読み込み済みの提案は引き直さない
+        if instance.proposal_id != validated_data["proposal"]["id"]:
+            instance.proposal_id = validated_data["proposal"]["id"]
         instance.before_record_at = validated_data["before_record_at"]
         instance.is_long_time = validated_data["is_long_time"]
         instance.is_checked = validated_data["is_checked"]
@@ -642,7 +892,12 @@ class RecordSerializer(serializers.ModelSerializer):
         return instance
 
 
-class JobseekerProposalSerializer(serializers.ModelSerializer):
+class RecordBulkCheckSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), max_length=1000)
+    is_checked = serializers.BooleanField(default=True)
+
+
+class JobseekerProposalSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     id = serializers.UUIDField(required=False)
     created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
     updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
@@ -713,6 +968,110 @@ class JobseekerProposalSerializer(serializers.ModelSerializer):
         return instance
 
 
+# 一覧画面 (?view=compact) 用. 長文の項目や会社のプロフィールを含めない
+class OrganizationCompanyCompactSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrganizationCompany
+        fields = [
+            "id",
+            "name",
+        ]
+
+
+class JobCategoryCompactSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = JobCategory
+        fields = [
+            "id",
+            "name",
+        ]
+
+
+class JobseekerCompactSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Jobseeker
+        fields = [
+            "id",
+            "name",
+        ]
+
+
+class JobCompactSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
+    updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
+    organization_company = OrganizationCompanyCompactSerializer(many=False, read_only=True)
+    job_category = JobCategoryCompactSerializer(many=False, read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "organization_company",
+            "job_category",
+            "position",
+            "layer",
+            "min_salary",
+            "max_salary",
+            "employment_status",
+            "remote",
+            "source_url",
+            "is_archive",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class ProposalCompactSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
+    updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
+    jobseeker = JobseekerCompactSerializer(many=False, read_only=True)
+    job = JobCompactSerializer(many=False, read_only=True)
+    tags = TagSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Proposal
+        fields = [
+            "id",
+            "jobseeker",
+            "job",
+            "intention",
+            "is_favorite",
+            "is_public",
+            "is_checked",
+            "position",
+            "tags",
+            "is_appeal_layer",
+            "is_appeal_remote",
+            "published_at",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class JobseekerProposalCompactSerializer(ProposalCompactSerializer):
+    class Meta(ProposalCompactSerializer.Meta):
+        fields = [x for x in ProposalCompactSerializer.Meta.fields if x != "jobseeker"]
+
+
+class RecordCompactSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
+    updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
+    proposal = ProposalCompactSerializer(many=False, read_only=True)
+
+    class Meta:
+        model = Record
+        fields = [
+            "id",
+            "proposal",
+            "before_record_at",
+            "is_long_time",
+            "is_checked",
+            "trigger",
+            "created_at",
+            "updated_at",
+        ]
+
+
 class JobseekerJobseekerSerializer(serializers.ModelSerializer):
     # id = serializers.UUIDField(required=True)
     created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M", read_only=True)
@@ -844,7 +1203,7 @@ class JobseekerOrganizationCompanySerializer(serializers.ModelSerializer):
         ]
 
 
-class JobLoadingSerializer(serializers.ModelSerializer):
+class JobLoadingSerializer(OrganizationModelSerializer):
     id = serializers.UUIDField(required=False)
     created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M:%S", read_only=True)
     updated_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M:%S", read_only=True)
@@ -883,11 +1242,35 @@ class JobLoadingSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         instance = JobLoading.objects.create(
-            organization=Organization.objects.get(
-                id=self.context["request"].user.organization.id
-            ),
-            user=User.objects.get(id=self.context["request"].user.id),
+            organization_id=self.organization_id,
+            user_id=self.context["request"].user.id,
             source_url=validated_data["source_url"],
         )
-        instance.save()
         return instance
+
+
+class JobLoadingBulkCreateSerializer(serializers.Serializer):
+    source_urls = serializers.ListField(
+        child=serializers.URLField(max_length=500), min_length=1, max_length=200
+    )
+
+
+class JobLoadingBatchSerializer(serializers.ModelSerializer):
+    created_at = serializers.DateTimeField(format="%Y/%m/%d %H:%M:%S", read_only=True)
+    completed = serializers.IntegerField(read_only=True)
+    error = serializers.IntegerField(read_only=True)
+    pending = serializers.SerializerMethodField()
+
+    class Meta:
+        model = JobLoadingBatch
+        fields = [
+            "id",
+            "total",
+            "completed",
+            "error",
+            "pending",
+            "created_at",
+        ]
+
+    def get_pending(self, obj):
+        return obj.total - obj.completed - obj.error
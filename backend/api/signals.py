@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication.users import user_cache
+from .models import Job, Organization, Proposal
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def evict_cached_user(sender, instance, **kwargs):
+    user_cache.evict(instance.get_username())
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def evict_cached_organization_users(sender, instance, **kwargs):
+    user_cache.evict_organization(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Proposal)
+def refresh_job_latest_proposal(sender, instance, created=True, **kwargs):
+    # 更新では created_at も job も変わらないので、追加と削除の時だけ付け替える
+    if created:
+        Job.refresh_latest_proposals([instance.job_id])
@@ -1,5 +1,3 @@
-import json
-
 from celery import shared_task
 from celery.exceptions import SoftTimeLimitExceeded
 
@@ -10,11 +8,10 @@ from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.html import strip_tags
-from urllib.parse import urlparse
 
 import datetime
 import time
-import re
+import asyncio
 import openai
 import logging
 
@@ -26,8 +23,16 @@ from .models import (
     OrganizationCompany,
     JobLoading,
 )
+from .jobloading.async_loading import run_job_loadings
 from .jobloading.fetcher import fetch_from_url
+from .jobloading.prompt import (
+    constructPrompt,
+    content_token_budget,
+    gpt_model,
+    gpt_messages,
+)
 from .jobloading.result import JobLoadingResult
+from .jobloading import cache, progress, steps
 
 logger = logging.getLogger(__name__)
 
@@ -251,136 +256,54 @@ def exec_mail_jobseeker_proposal(id):
             time.sleep(1)
 
 
-# NOTE: プロンプト内では、Outputの順番は極めて重要. 先に生成された情報を踏まえて後の情報が生成されるため.
-def constructPrompt(jobPosting, job_category_names):
-    return (
-        "### Order\n"
-        "You are a professional recruiter. Given Japanese job postings, please organize the information in a way that is easy for job seekers to understand and generate a Japanese JSON that meets the following output conditions.\n"
-        "To make the text easy to read, the content of the text fields should be formated using new line characters and indents.\n"
-        "### Job posting\n"
-        f"{jobPosting}\n"
-        "### Job categories\n"
-        f"{job_category_names}\n"
-        "### Output format\n"
-        "Unless otherwise instructed, leave fields blank if there is no information in the job posting.\n\n"
-        "{\n"
-        '   "company_name": string, # 会社名\n'
-        '   "position": string, # 職種（求人タイトル）\n'
-        '   "layer": string, # ["役員","管理職","一般職"] 記載がない場合は内容から推定.\n'
-        '   "employment_status": string, # 雇用形態 (e.g. "正社員","契約社員", ...) 記載がない場合は内容から推定.\n'
-        '   "job_category_name": string, # 職種カテゴリ. Job categoriesより選択. 記載がない場合は内容から推定.\n'
-        '   "address": string, # 勤務地\n'
-        '   "remote": string, # ["フルリモート","一部リモート","リモートワークなし","記載なし"]. 原則出社する必要がない場合は "フルリモート", 必ず毎日出社する必要がある場合は "リモートワークなし", それ以外の場合は "一部リモート". \n'
-        '   "benefit": string, # 福利厚生についての情報\n'
-        '   "holiday": string, # 休日・休暇についての情報\n'
-        '   "working_hours": string, # 勤務時間についての情報\n'
-        '   "trial_period": string, # 試用期間についての情報\n'
-        '   "min_salary": number, # 最低年収（円）\n'
-        '   "max_salary": number, # 最高年収（円）\n'
-        '   "salary": string, # 1行目:年収の範囲（e.g. *** ~ ***万円）. 2行目以降:昇給、賞与、手当など、金銭に関するその他の情報\n'
-        '   "smoking_prevention_measure": string, # 受動喫煙対策についての情報\n'
-        '   "min_qualifications": string, # 必要なスキル・経験\n'
-        '   "pfd_qualifications": string, # 歓迎されるスキル・経験\n'
-        '   "ideal_profile": string, # この求人で望まれる人物像\n'
-        '   "_is_application_method_written": boolean, # 応募方法が記載されているか. 具体的な応募方法は提示してはいけないため、出力に含めないこと\n'
-        '   "summary": string, # 詳細な職務の内容. ここまでの項目と重複する情報を含めないように注意\n'
-        '   "other": string, # その他の重要な情報\n'
-        "}\n"
-        "###\n"
-    )
-
-
 @shared_task(soft_time_limit=600, hard_time_limit=630)
 def exec_job_loading(job_loading_id, source_url):
     try:
         result = JobLoadingResult(job_loading_id, source_url)
 
         # check url
-        parsedUrl = urlparse(source_url)
-        if not all([parsedUrl.scheme, parsedUrl.netloc]):
-            result.save_error("URLが正しくありません。")
-            raise Exception(f"Invalid URL: {source_url}")
-
-        # fetch html body
-        try:
-            content = fetch_from_url(source_url, result)
-        except Exception as e:
-            result.add_telemetry_error_detail(str(e))
-            result.set_error_message("ウェブページの取得に失敗しました。")
-            e.add_note(f"Failed to fetch HTML: {source_url}")
-            raise
+        steps.check_url(result)
 
         job_category_names = []
         jobCategories = JobCategory.objects.all()
         for jobCategory in jobCategories:
             job_category_names.append(jobCategory.name)
 
-        # call gpt
+        # 本文に使えるトークン数. プロンプトの残りと応答の分を除く
+        token_budget = content_token_budget(job_category_names)
+
+        # fetch html body
+        result.publish_stage(progress.STAGE_FETCHING)
+        with steps.fetching(result):
+            content = fetch_from_url(source_url, result, token_budget)
+
         prompt = constructPrompt(content, job_category_names)
-        openai.api_key = settings.OPENAI_API_KEY
-        try:
-            openai_start_time = time.time()
-            logging.info(
-                f"Call OpenAI API for {source_url} (jobloading_id: {job_loading_id}): {prompt}"
-            )
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo-16k",
-                temperature=0,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": prompt,
-                    }
-                ],
-            )
-            openai_time = round(time.time() - openai_start_time)
-            logging.info(
-                f"OpenAI API response for {source_url} (jobloading_id: {job_loading_id}): {openai_time} seconds, {response.model} {response.usage}"
-            )
-            result.set_telemetry("gpt_time", openai_time)
-            result.set_telemetry("gpt_tokens_prompt", response.usage.prompt_tokens)
-            result.set_telemetry(
-                "gpt_tokens_completion", response.usage.completion_tokens
-            )
-            jobloadingJsonStr = response.choices[0].message.content
-        except Exception as e:
-            result.add_telemetry_error_detail(str(e))
-            result.set_error_message("求人情報の解析に失敗しました。")
-            # Future: HTMLをテキストのみにして再試行する
-            e.add_note(f"OpenAI API call failed")
-            raise
-
-        try:
-            # json として厳密でない場合をケア: 末尾のカンマを削除
-            jobloadingJsonStr = re.sub(r",[\s\n]*}[\s\n]*$", "\n}\n", jobloadingJsonStr)
-            jobloadingJsonStr = jobloadingJsonStr.replace("\\xa0", " ")
-            # json のパース
-            jobloading = json.loads(jobloadingJsonStr, strict=False)
-            # json 内のnullを持つキーと、_ から始まるキーを削除
-            jobloading = {
-                k: v
-                for k, v in jobloading.items()
-                if v is not None and not k.startswith("_")
-            }
+        jobloading = steps.get_cached_extraction(result, prompt)
+        is_cached = jobloading is not None
+        if not is_cached:
+            # call gpt
+            result.publish_stage(progress.STAGE_CALLING_GPT)
+            openai.api_key = settings.OPENAI_API_KEY
+            with steps.calling_gpt(result):
+                openai_start_time = time.time()
+                logging.info(
+                    f"Call OpenAI API for {source_url} (jobloading_id: {job_loading_id}): {prompt}"
+                )
+                response = openai.ChatCompletion.create(
+                    model=gpt_model,
+                    temperature=0,
+                    messages=gpt_messages(prompt),
+                )
+                jobloadingJsonStr = result.set_gpt_response(response, openai_start_time)
 
-            logging.info(
-                f"Loaded data for {source_url} (jobloading_id: {job_loading_id}): {str(jobloading)}"
-            )
-        except Exception as e:
-            result.add_telemetry_error_detail(str(e))
-            result.add_telemetry_error_detail(f"target: {jobloadingJsonStr}")
-            result.set_error_message("解析結果の取得に失敗しました。")
-            e.add_note(f"Failed to parse JSON: {jobloadingJsonStr}")
-            raise
-
-        try:
-            result.save_and_complete(jobloading)
-        except Exception as e:
-            result.add_telemetry_error_detail(str(e))
-            result.add_telemetry_error_detail(f"data: {str(jobloading)}")
-            result.set_error_message("解析結果の保存に失敗しました。")
-            e.add_note(f"Failed to save data")
-            raise
+            result.publish_stage(progress.STAGE_PARSING)
+            jobloading = steps.parse(result, jobloadingJsonStr)
+
+        steps.save(result, jobloading)
+
+        # 保存できた結果だけを再利用する
+        if not is_cached:
+            cache.set_extraction(gpt_model, prompt, jobloading)
 
     except SoftTimeLimitExceeded as e:
         result.add_telemetry_error_detail(str(e))
@@ -390,3 +313,22 @@ def exec_job_loading(job_loading_id, source_url):
     except Exception as e:
         result.save_error()
         raise
+
+
+@shared_task(soft_time_limit=600, time_limit=630)
+def exec_job_loading_in_batch(job_loading_id, source_url):
+    # 失敗は JobLoading に記録済み. 例外を送出すると同じレーン (chain) の後続が実行されない
+    try:
+        exec_job_loading(job_loading_id, source_url)
+    except Exception:
+        logger.exception(f"Job loading {job_loading_id} in a batch failed: {source_url}")
+
+
+@shared_task(soft_time_limit=900, time_limit=930)
+def exec_job_loadings_async(items):
+    """
+    items = [[job_loading_id, source_url], ...]
+    1つのイベントループで並行に取り込む. 1件ごとの上限は async_loading.load_timeout
+    タスク全体の上限は batch.dispatch が同じドメインの件数に合わせて指定する
+    """
+    asyncio.run(run_job_loadings(items))
@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest import SkipTest, mock
+
+import aiohttp
+import redis
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from django.test import SimpleTestCase
+
+from api.jobloading import async_loading, cache, fetcher, semaphore
+from api.jobloading.result import JobLoadingResult
+from api.jobloading.progress import get_client
+from api.tasks import exec_job_loading
+from api.management.commands.benchmark_html_reducer import TelemetryRecorder
+
+
+class ConcurrencyCounter:
+    def __init__(self):
+        self.current = 0
+        self.max = 0
+
+    async def run(self, delay):
+        self.current += 1
+        self.max = max(self.max, self.current)
+        await asyncio.sleep(delay)
+        self.current -= 1
+
+
+class FakeSemaphore:
+    def __init__(self):
+        self.held = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, name, limit, lease_seconds):
+        with self.lock:
+            tokens = self.held.setdefault(name, set())
+            if len(tokens) >= limit:
+                return None
+            token = object()
+            tokens.add(token)
+            return token
+
+    def release(self, name, token):
+        with self.lock:
+            self.held[name].discard(token)
+
+
+class AsyncJobLoaderTests(SimpleTestCase):
+    """非同期実行で、ホストごと・API キーごとの同時実行数が上限を超えないことを検証する"""
+
+    def setUp(self):
+        for name in ("get_page", "set_page"):
+            patcher = mock.patch.object(cache, name, return_value=None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_host_concurrency(self):
+        """
+        正常系 1:
+        同じホストへの取得は上限までしか並行せず、取得した内容は処理されること
+        """
+        counter = ConcurrencyCounter()
+
+        async def handler(request):
+            await counter.run(0.05)
+            return web.Response(text="<html><body><p>求人</p></body></html>", content_type="text/html")
+
+        async def run():
+            app = web.Application()
+            app.router.add_get("/jobs/{id}", handler)
+            async with TestServer(app) as server, aiohttp.ClientSession() as session:
+                loader = async_loading.AsyncJobLoader(session, [], None)
+                results = [TelemetryRecorder() for _ in range(6)]
+                contents = await asyncio.gather(
+                    *(loader.fetch(str(server.make_url(f"/jobs/{i}")), result) for i, result in enumerate(results))
+                )
+                return contents, results
+
+        with mock.patch.object(fetcher, "default_domain_concurrency", 2):
+            contents, results = asyncio.run(run())
+
+        self.assertEqual(counter.max, 2, "上限までしか並行しないこと.")
+        self.assertTrue(all("求人" in x for x in contents), "取得した内容が処理されること.")
+        self.assertEqual(results[0].telemetries["fetch_method"], "REST GET")
+
+    def test_gpt_concurrency(self):
+        """
+        正常系 1:
+        同じ API キーでの GPT の呼び出しは、別のタスクのものと合わせて上限までしか並行しないこと
+        """
+        counter = ConcurrencyCounter()
+        fake = FakeSemaphore()
+
+        async def acreate(**kwargs):
+            await counter.run(0.05)
+            return SimpleNamespace(
+                model=kwargs["model"],
+                usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5),
+                choices=[SimpleNamespace(message=SimpleNamespace(content='{"position": "営業",}'))],
+            )
+
+        async def run():
+            # 2つのタスクそれぞれのローダー
+            loaders = [async_loading.AsyncJobLoader(None, [], None) for _ in range(2)]
+            return await asyncio.gather(
+                *(
+                    loaders[i % 2].call_gpt("prompt", JobLoadingResult(i, "https://example.com"))
+                    for i in range(6)
+                )
+            )
+
+        with mock.patch.object(async_loading, "gpt_concurrency", 3), mock.patch.object(
+            async_loading, "slot_poll_seconds", 0.01
+        ), mock.patch.object(semaphore, "acquire", fake.acquire), mock.patch.object(
+            semaphore, "release", fake.release
+        ), mock.patch.object(
+            async_loading.openai.ChatCompletion, "acreate", acreate
+        ):
+            contents = asyncio.run(run())
+
+        self.assertEqual(counter.max, 3, "上限までしか並行しないこと.")
+        self.assertEqual(contents[0], '{"position": "営業",}')
+        self.assertFalse(any(fake.held.values()), "すべての枠が空くこと.")
+
+
+    def test_load_timeout(self):
+        """
+        正常系 1:
+        ホストの枠が空くのを待つ時間は1件ごとの上限に含まないこと
+        """
+        errors = []
+        work_seconds = 0.1
+
+        async def _load(loader, result):
+            async with loader.waiting(loader.host_semaphore(result.source_url)):
+                await asyncio.sleep(work_seconds)
+
+        async def run():
+            loader = async_loading.AsyncJobLoader(None, [], None)
+            await asyncio.gather(*(loader.load(i, f"https://example.com/jobs/{i}") for i in range(3)))
+
+        with mock.patch.object(async_loading.AsyncJobLoader, "_load", _load), mock.patch.object(
+            async_loading.JobLoadingResult, "save_error", lambda result: errors.append(result.error_message)
+        ), mock.patch.object(async_loading, "load_timeout", 0.2), mock.patch.object(
+            fetcher, "default_domain_concurrency", 1
+        ):
+            asyncio.run(run())
+            self.assertEqual(errors, [], "順番を待った取り込みもタイムアウトしないこと.")
+
+            """
+            異常系 1:
+            枠を取ってからの処理が上限を超えた場合、タイムアウトとして記録されること
+            """
+            work_seconds = 0.3
+            asyncio.run(run())
+            self.assertEqual(errors, ["タイムアウトしました。"] * 3, "タイムアウトとして記録されること.")
+
+    def test_same_errors_as_sync(self):
+        """
+        異常系 2:
+        同期実行と同じエラーメッセージが記録されること
+        """
+        errors = []
+
+        async def run(source_url):
+            loader = async_loading.AsyncJobLoader(None, [], None)
+            await loader.load(1, source_url)
+
+        with mock.patch.object(
+            JobLoadingResult, "save_error", lambda result: errors.append(result.error_message)
+        ), mock.patch.object(JobLoadingResult, "publish_stage"):
+            with self.assertRaises(Exception):
+                exec_job_loading(1, "example.com/jobs/1")
+            asyncio.run(run("example.com/jobs/1"))
+        self.assertEqual(errors, ["URLが正しくありません。"] * 2, "同じメッセージが記録されること.")
+
+
+class SemaphoreTests(SimpleTestCase):
+    """Redis で数える枠が、上限まで取れて、期限が過ぎれば空くことを検証する"""
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            get_client().ping()
+        except redis.exceptions.ConnectionError:
+            raise SkipTest("Redis に接続できないため")
+        super().setUpClass()
+
+    def setUp(self):
+        patcher = mock.patch.object(semaphore, "key_prefix", "test:jobloading:semaphore")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(get_client().delete, semaphore.slot_key("gpt"))
+
+    def test_acquire(self):
+        """
+        正常系 1:
+        上限まで枠が取れ、空けばまた取れること
+        """
+        tokens = [semaphore.acquire("gpt", 2, 60) for _ in range(3)]
+        self.assertIsNotNone(tokens[0])
+        self.assertIsNotNone(tokens[1])
+        self.assertIsNone(tokens[2], "上限を超えて取れないこと.")
+
+        semaphore.release("gpt", tokens[0])
+        self.assertIsNotNone(semaphore.acquire("gpt", 2, 60), "空けば取れること.")
+
+        """
+        正常系 2:
+        空けられないまま期限が過ぎた枠は空くこと
+        """
+        get_client().delete(semaphore.slot_key("gpt"))
+        semaphore.acquire("gpt", 1, 60)
+        with mock.patch.object(semaphore.time, "time", return_value=time.time() + 61):
+            self.assertIsNotNone(semaphore.acquire("gpt", 1, 60), "期限が過ぎた枠は空くこと.")
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from api.authentication.backends import JSONWebTokenAuthentication
+from api.authentication.users import user_cache
+from api.models import Organization
+
+
+class JSONWebTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="auth0.user", organization=self.organization
+        )
+        self.authentication = JSONWebTokenAuthentication()
+
+    def tearDown(self):
+        user_cache.clear()
+
+    def test_authenticate_credentials(self):
+        """
+        正常系 1:
+        ユーザーと組織が1クエリで取得されること
+        """
+        with self.assertNumQueries(1):
+            user = self.authentication.authenticate_credentials({"sub": "auth0|user"})
+            self.assertEqual(user.organization, self.organization, "組織が取得されること")
+
+        """
+        正常系 2:
+        キャッシュされている間はクエリが発行されないこと
+        """
+        with self.assertNumQueries(0):
+            user = self.authentication.authenticate_credentials({"sub": "auth0|user"})
+            self.assertEqual(user.organization, self.organization, "組織が取得されること")
+
+        """
+        正常系 3:
+        ユーザーが更新された場合、キャッシュが破棄されること
+        """
+        self.user.name = "changed"
+        self.user.save()
+        with self.assertNumQueries(1):
+            user = self.authentication.authenticate_credentials({"sub": "auth0|user"})
+        self.assertEqual(user.name, "changed", "更新後のユーザーが取得されること")
+
+    def test_cached_organization(self):
+        """
+        正常系 1:
+        取得したユーザーの組織を変更しても、キャッシュされている組織は変わらないこと
+        """
+        user = self.authentication.authenticate_credentials({"sub": "auth0|user"})
+        user.organization.name = "changed"
+        with self.assertNumQueries(0):
+            user = self.authentication.authenticate_credentials({"sub": "auth0|user"})
+        self.assertEqual(user.organization.name, "organization", "キャッシュされている組織が変わらないこと")
+
+    def test_first_login(self):
+        """
+        正常系 1:
+        初回ログインの場合、ユーザーが作成されること
+        """
+        user = self.authentication.authenticate_credentials({"sub": "auth0|new"})
+        self.assertEqual(user.username, "auth0.new", "ユーザーが作成されること")
+        self.assertTrue(
+            get_user_model().objects.filter(username="auth0.new").exists(),
+            "ユーザーが保存されること",
+        )
@@ -0,0 +1,123 @@
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.jobloading import browser_pool
+from api.jobloading.browser_pool import BrowserPool, process_tree_rss_mb
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.urls = []
+
+    async def goto(self, url):
+        self.urls.append(url)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    """launch() の代わりに返す、プロセスを起動しないブラウザ"""
+
+    def __init__(self):
+        self.pages = []
+        self.closed = False
+        self.is_healthy = True
+        self.process = mock.Mock(pid=os.getpid())
+
+    async def newPage(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    async def version(self):
+        if not self.is_healthy:
+            raise ConnectionError("browser is gone")
+        return "HeadlessChrome"
+
+    async def close(self):
+        self.closed = True
+
+
+class BrowserPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.browsers = []
+
+        async def launch(**options):
+            self.browsers.append(FakeBrowser())
+            return self.browsers[-1]
+
+        patchers = [
+            mock.patch.object(browser_pool, "launch", launch),
+            mock.patch.object(browser_pool, "pages_per_browser", 3),
+            mock.patch.object(browser_pool, "max_browser_rss_mb", 1024 * 1024),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.pool = BrowserPool()
+        self.addCleanup(self.stop_loop)
+
+    def stop_loop(self):
+        if self.pool.loop is not None:
+            self.pool.loop.call_soon_threadsafe(self.pool.loop.stop)
+
+    def scrape(self, fail=False):
+        async def scrape(page):
+            if fail:
+                raise ValueError("failed")
+            return page
+
+        return self.pool.run(scrape, timeout=5)
+
+    def test_reuse_and_recycle(self):
+        """
+        正常系 1:
+        ブラウザとページを使い回し、空ページに戻してから貸し出すこと
+        """
+        page, wait_ms = self.scrape()
+        self.assertGreaterEqual(wait_ms, 0, "待ち時間が返ること.")
+        second, _ = self.scrape()
+        self.assertIs(page, second, "同じページを使い回すこと.")
+        self.assertEqual(second.urls, ["about:blank", "about:blank"], "返却時に空ページに戻すこと.")
+        self.assertEqual(len(self.browsers), 1, "ブラウザを起動し直さないこと.")
+
+        """
+        正常系 2:
+        決められた枚数を開いたら、ブラウザを起動し直すこと
+        """
+        self.scrape()
+        self.scrape()
+        self.assertEqual(len(self.browsers), 2, "ブラウザを起動し直すこと.")
+        self.assertTrue(self.browsers[0].closed, "古いブラウザを閉じること.")
+
+    def test_unhealthy_browser_and_failed_scrape(self):
+        """
+        正常系 1:
+        応答しないブラウザは使わずに起動し直すこと
+        """
+        self.scrape()
+        self.browsers[0].is_healthy = False
+        self.scrape()
+        self.assertEqual(len(self.browsers), 2, "ブラウザを起動し直すこと.")
+
+        """
+        異常系 1:
+        失敗したスクレイピングのページは使い回さないこと
+        """
+        with self.assertRaises(ValueError):
+            self.scrape(fail=True)
+        page, _ = self.scrape()
+        self.assertEqual(len(self.browsers[1].pages), 2, "新しいページを開くこと.")
+        self.assertTrue(self.browsers[1].pages[0].closed, "失敗したページは閉じること.")
+        self.assertIs(page, self.browsers[1].pages[1])
+
+    def test_process_tree_rss_mb(self):
+        """
+        正常系 1:
+        自プロセスのメモリ使用量が取得できること
+        """
+        self.assertGreater(process_tree_rss_mb(os.getpid()), 0)
@@ -0,0 +1,322 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from rest_framework.test import APITestCase
+
+from api.models import (
+    Organization,
+    JobCategory,
+    OrganizationCompany,
+    Jobseeker,
+    Job,
+    JobLatestProposal,
+    Proposal,
+    ProposalTag,
+    Record,
+    Tag,
+)
+from api.serializers import ProposalSerializer, RecordSerializer
+from api.views import (
+    ProposalBulkCreateView,
+    ProposalBulkUpdateView,
+    RecordBulkUpdateView,
+    RecordBulkCheckView,
+)
+
+
+class ProposalBulkCreateQueryTests(APITestCase):
+    """提案の一括作成が件数によらず一定回数のクエリで処理されることを検証する"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory(enforce_csrf_checks=True)
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        job_category = JobCategory.objects.create(name="category")
+        organization_company = OrganizationCompany.objects.create(
+            name="company", organization=self.organization
+        )
+        self.jobs = [
+            Job.objects.create(
+                organization_company=organization_company,
+                job_category=job_category,
+                position=f"position{i}",
+                organization=self.organization,
+            )
+            for i in range(3)
+        ]
+        self.jobseeker = Jobseeker.objects.create(
+            name="jobseeker", organization=self.organization
+        )
+        self.tag_a = Tag.objects.create(name="A", organization=self.organization)
+        self.tag_b = Tag.objects.create(name="B", organization=self.organization)
+        self.proposal = Proposal.objects.create(
+            jobseeker=self.jobseeker,
+            job=self.jobs[0],
+            position="proposal",
+            organization=self.organization,
+        )
+        self.proposal.tags.add(self.tag_a, through_defaults={"organization": self.organization})
+
+    def item(self, job, tags):
+        data = dict(ProposalSerializer(self.proposal).data)
+        data.pop("id")
+        data["job"] = dict(data["job"], id=str(job.id))
+        data["tags"] = [{"id": str(tag.id), "name": tag.name} for tag in tags]
+        return data
+
+    def post(self, data):
+        request = self.factory.post("/", data, format="json")
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = ProposalBulkCreateView.as_view()(request)
+        return response, len(context.captured_queries)
+
+    def test_post_proposals(self):
+        """
+        正常系 1:
+        タグの指定がなければ同じ求人の最新の提案のタグを引き継ぎ、最新の提案が付け替わること
+        """
+        response, _ = self.post(
+            [
+                self.item(self.jobs[0], []),
+                self.item(self.jobs[1], [self.tag_b]),
+                self.item(self.jobs[1], []),
+                self.item(self.jobs[2], []),
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(
+            [[tag["name"] for tag in x["tags"]] for x in response.data],
+            [["A"], ["B"], ["B"], []],
+            "タグが指定どおり、または引き継がれること.",
+        )
+        for job, x in zip(self.jobs, [response.data[0], response.data[2]]):
+            self.assertEqual(
+                str(JobLatestProposal.objects.get(job=job).proposal_id), x["id"], "最新の提案が付け替わること."
+            )
+
+        """
+        正常系 2:
+        件数が増えてもクエリ数が変わらないこと
+        """
+        _, one = self.post([self.item(self.jobs[0], [self.tag_a])])
+        _, many = self.post(
+            [self.item(job, [self.tag_a, self.tag_b]) for job in self.jobs[:3]] * 2
+        )
+        self.assertEqual(one, many, "クエリ数が変わらないこと.")
+
+        """
+        異常系 1:
+        存在しない求人を指定した場合は1件も作成されないこと
+        """
+        count = Proposal.objects.count()
+        item = self.item(self.jobs[0], [])
+        item["job"]["id"] = "00000000-0000-0000-0000-000000000000"
+        response, _ = self.post([self.item(self.jobs[1], []), item])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, "HTTPステータス400が返ること.")
+        self.assertEqual(Proposal.objects.count(), count, "1件も作成されないこと.")
+
+
+class ProposalBulkUpdateQueryTests(APITestCase):
+    """提案の一括更新がまとめて読み込み、変更のあったタグだけを書き込むことを検証する"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory(enforce_csrf_checks=True)
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        job = Job.objects.create(
+            job_category=JobCategory.objects.create(name="category"),
+            position="position",
+            organization=self.organization,
+        )
+        self.jobseeker = Jobseeker.objects.create(
+            name="jobseeker", organization=self.organization
+        )
+        self.tag_a = Tag.objects.create(name="A", organization=self.organization)
+        self.tag_b = Tag.objects.create(name="B", organization=self.organization)
+        self.proposals = []
+        for i in range(3):
+            proposal = Proposal.objects.create(
+                jobseeker=self.jobseeker,
+                job=job,
+                position=f"proposal{i}",
+                organization=self.organization,
+            )
+            proposal.tags.add(self.tag_a, through_defaults={"organization": self.organization})
+            self.proposals.append(proposal)
+
+    def patch(self, proposals):
+        request = self.factory.patch(
+            "/",
+            {"proposals": proposals, "is_email": False, "jobseeker_id": str(self.jobseeker.id)},
+            format="json",
+        )
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = ProposalBulkUpdateView.as_view()(request)
+        return response, len(context.captured_queries)
+
+    def item(self, proposal, **data):
+        return {"id": str(proposal.id), **data}
+
+    def tags(self, *tags):
+        return [{"id": str(tag.id), "name": tag.name} for tag in tags]
+
+    def test_patch_proposals(self):
+        """
+        正常系 1:
+        項目とタグが更新され、変わらないタグの行はそのまま残ること
+        """
+        kept = ProposalTag.objects.get(proposal=self.proposals[0], tag=self.tag_a)
+        response, _ = self.patch(
+            [
+                self.item(
+                    self.proposals[0],
+                    is_favorite=True,
+                    tags=self.tags(self.tag_a, self.tag_b),
+                ),
+                self.item(self.proposals[1], tags=self.tags(self.tag_b)),
+                self.item(self.proposals[2], comment="comment"),
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(
+            [[tag["name"] for tag in x["tags"]] for x in response.data],
+            [["A", "B"], ["B"], ["A"]],
+            "指定したタグに更新され、指定がなければそのままであること.",
+        )
+        self.assertTrue(ProposalTag.objects.filter(id=kept.id).exists(), "変わらないタグの行は残ること.")
+        self.assertTrue(Proposal.objects.get(id=self.proposals[0].id).is_favorite)
+        self.assertEqual(Proposal.objects.get(id=self.proposals[2].id).comment, "comment")
+
+        """
+        正常系 2:
+        件数が増えてもクエリ数が変わらないこと
+        """
+        # どちらもタグの削除と追加が1回ずつ発生する
+        _, one = self.patch([self.item(self.proposals[1], tags=self.tags(self.tag_a))])
+        _, many = self.patch(
+            [self.item(x, tags=self.tags(self.tag_b)) for x in self.proposals]
+        )
+        self.assertEqual(one, many, "クエリ数が変わらないこと.")
+
+        """
+        異常系 1:
+        存在しない提案や他の組織の提案を含む場合は1件も更新されないこと
+        """
+        other = Proposal.objects.create(
+            jobseeker=self.jobseeker,
+            job=self.proposals[0].job,
+            position="other",
+            organization=Organization.objects.create(name="other"),
+        )
+        response, _ = self.patch(
+            [self.item(self.proposals[0], comment="updated"), self.item(other, comment="updated")]
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, "HTTPステータス404が返ること.")
+        self.assertNotEqual(
+            Proposal.objects.get(id=self.proposals[0].id).comment, "updated", "更新されないこと."
+        )
+
+
+class RecordBulkUpdateQueryTests(APITestCase):
+    """記録の一括更新・一括確認が件数によらず一定回数のクエリで処理されることを検証する"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory(enforce_csrf_checks=True)
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        job = Job.objects.create(
+            organization_company=OrganizationCompany.objects.create(
+                name="company", organization=self.organization
+            ),
+            job_category=JobCategory.objects.create(name="category"),
+            position="position",
+            organization=self.organization,
+        )
+        jobseeker = Jobseeker.objects.create(name="jobseeker", organization=self.organization)
+        self.records = [
+            Record.objects.create(
+                proposal=Proposal.objects.create(
+                    jobseeker=jobseeker,
+                    job=job,
+                    position=f"proposal{i}",
+                    organization=self.organization,
+                ),
+                organization=self.organization,
+            )
+            for i in range(3)
+        ]
+        self.other = Record.objects.create(
+            proposal=self.records[0].proposal,
+            organization=Organization.objects.create(name="other"),
+        )
+
+    def request(self, view_class, data):
+        request = self.factory.patch("/", data, format="json")
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = view_class.as_view()(request)
+        return response, context.captured_queries
+
+    def test_bulk_check(self):
+        """
+        正常系 1:
+        値が変わった自組織の記録の id だけが返り、1回のクエリで更新されること
+        """
+        Record.objects.filter(id=self.records[0].id).update(is_checked=True)
+        ids = [str(x.id) for x in self.records + [self.other]]
+        response, queries = self.request(RecordBulkCheckView, {"ids": ids, "is_checked": True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(
+            set(response.data["ids"]),
+            {str(x.id) for x in self.records[1:]},
+            "値が変わった記録の id だけが返ること.",
+        )
+        self.assertEqual(len(queries), 1, "1回のクエリで更新されること.")
+        self.assertFalse(Record.objects.get(id=self.other.id).is_checked, "他の組織の記録は更新されないこと.")
+
+        """
+        異常系 1:
+        id が UUID でない場合は 400 が返ること
+        """
+        response, _ = self.request(RecordBulkCheckView, {"ids": ["x"]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, "HTTPステータス400が返ること.")
+
+    def test_bulk_update(self):
+        """
+        正常系 1:
+        リクエストの並び順どおりに更新され、件数が増えてもクエリ数が変わらないこと
+        """
+        def items(records):
+            data = [dict(RecordSerializer(x).data, is_checked=True) for x in records]
+            data.reverse()
+            return data
+
+        response, one = self.request(RecordBulkUpdateView, items(self.records[:1]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        response, many = self.request(RecordBulkUpdateView, items(self.records))
+        self.assertEqual(
+            [x["id"] for x in response.data],
+            [str(x.id) for x in reversed(self.records)],
+            "リクエストの並び順で返ること.",
+        )
+        self.assertTrue(all(x.is_checked for x in Record.objects.filter(organization=self.organization)))
+        self.assertEqual(len(one), len(many), "クエリ数が変わらないこと.")
+
+        """
+        異常系 1:
+        他の組織の記録を含む場合は 400 が返ること
+        """
+        response, _ = self.request(RecordBulkUpdateView, items([self.records[0], self.other]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, "HTTPステータス400が返ること.")
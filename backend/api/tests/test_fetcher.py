@@ -0,0 +1,224 @@
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase
+from pyppeteer.errors import TimeoutError as PageTimeoutError
+
+from api.jobloading import fetcher, prompt
+from api.management.commands.benchmark_html_reducer import (
+    TelemetryRecorder,
+    corpus_dir,
+    legacy_process_html_content,
+)
+
+
+class FakeRequest:
+    def __init__(self, resourceType):
+        self.resourceType = resourceType
+        self.result = None
+
+    async def abort(self):
+        self.result = "aborted"
+
+    async def continue_(self):
+        self.result = "continued"
+
+
+class FakePage:
+    """goto / waitForSelector の呼び出しを記録するページ"""
+
+    def __init__(self, selector_delay=0):
+        self.selector_delay = selector_delay
+        self.calls = []
+        self.handlers = []
+
+    async def setUserAgent(self, user_agent):
+        self.calls.append(("setUserAgent",))
+
+    async def setRequestInterception(self, value):
+        self.calls.append(("setRequestInterception", value))
+
+    def on(self, event, handler):
+        self.handlers.append(handler)
+
+    async def goto(self, url, waitUntil, timeout):
+        self.calls.append(("goto", waitUntil))
+
+    async def waitForSelector(self, selector, timeout):
+        self.calls.append(("waitForSelector", selector))
+        if self.selector_delay > timeout:
+            raise PageTimeoutError("timeout")
+
+    async def content(self):
+        return "<html></html>"
+
+
+class ScrapePageTests(SimpleTestCase):
+    def scrape(self, page, ready_selector):
+        return asyncio.run(fetcher.scrape_page(page, "https://example.com", ready_selector))
+
+    def test_readiness(self):
+        """
+        正常系 1:
+        セレクタの指定があれば描画を待ち、なければネットワークが落ち着くまで待つこと
+        """
+        page = FakePage()
+        _, readiness, readiness_time_ms, _ = self.scrape(page, "h1")
+        self.assertEqual(readiness, "selector")
+        self.assertLess(readiness_time_ms, 1000, "固定の待ち時間がないこと.")
+        self.assertIn(("waitForSelector", "h1"), page.calls)
+        self.assertIn(("goto", "domcontentloaded"), page.calls)
+
+        _, readiness, _, _ = self.scrape(page, None)
+        self.assertEqual(readiness, "networkidle")
+        self.assertIn(("goto", "networkidle2"), page.calls)
+        self.assertEqual(page.calls.count(("setUserAgent",)), 1, "ページの設定は1回だけであること.")
+
+        """
+        異常系 1:
+        上限までに描画されなくても、その時点の内容で続けること
+        """
+        with mock.patch.object(fetcher, "ready_timeout_ms", 100):
+            html, readiness, _, _ = self.scrape(FakePage(selector_delay=1000), "h1")
+        self.assertEqual(readiness, "timeout")
+        self.assertEqual(html, "<html></html>")
+
+    def test_request_interception(self):
+        """
+        正常系 1:
+        画像・フォント・スタイルシートの読み込みを止め、それ以外は通すこと
+        """
+        page = FakePage()
+
+        async def run():
+            await fetcher.prepare_page(page)
+            requests = [FakeRequest(x) for x in ("image", "font", "stylesheet", "document", "script")]
+            for request in requests:
+                page.handlers[0](request)
+            await asyncio.sleep(0)
+            return [x.result for x in requests]
+
+        self.assertEqual(
+            asyncio.run(run()),
+            ["aborted", "aborted", "aborted", "continued", "continued"],
+        )
+
+
+class ProcessHtmlContentTests(SimpleTestCase):
+    def test_same_as_legacy(self):
+        """
+        正常系 1:
+        保存済みのページで、以前の実装と同じ結果・同じ段階の記録になること
+        """
+        paths = sorted(corpus_dir.glob("*.html"))
+        self.assertTrue(paths, "ページが保存されていること.")
+        for path in paths:
+            with self.subTest(page=path.name):
+                html_content = path.read_text()
+                legacy, current = TelemetryRecorder(), TelemetryRecorder()
+                self.assertEqual(
+                    fetcher.process_html_content(html_content, path.name, current),
+                    legacy_process_html_content(html_content, path.name, legacy),
+                    "同じ結果になること.",
+                )
+                self.assertEqual(current.names, legacy.names, "同じ段階を記録すること.")
+                self.assertEqual(current.results, legacy.results, "各段階の文字数が同じであること.")
+
+    def test_deep_dom(self):
+        """
+        正常系 1:
+        再帰の上限を超える深さの DOM でも処理できること
+        """
+        html_content = "<div><p>本文</p>" * 3000 + "</div>" * 3000
+        recorder = TelemetryRecorder()
+        processed_content = fetcher.process_html_content(html_content, "deep", recorder)
+        self.assertEqual(recorder.names[-1], "remove structure markers")
+        self.assertEqual(len(processed_content), recorder.results[-1])
+
+
+class ByteEncoding:
+    """1バイトを1トークンとして数えるトークナイザ (BPE ファイルなしで使える)"""
+
+    def encode(self, text, disallowed_special=()):
+        return list(text.encode())
+
+    def decode(self, tokens):
+        return bytes(tokens).decode(errors="replace")
+
+
+class TokenBudgetTests(SimpleTestCase):
+    html_content = (
+        "<html><head><script>" + "x" * 500 + "</script></head>"
+        "<body>" + "<div class='c'><p>求人の本文です</p></div>" * 20 + "</body></html>"
+    )
+
+    def process(self, token_budget):
+        recorder = TelemetryRecorder()
+        with mock.patch.object(fetcher, "get_encoding", ByteEncoding):
+            processed_content = fetcher.process_html_content(
+                self.html_content, "budget", recorder, token_budget
+            )
+        return processed_content, recorder
+
+    def test_richest_stage_that_fits(self):
+        """
+        正常系 1:
+        トークン数の上限に収まる、最も情報の多い段階の結果が返ること
+        """
+        stages = [
+            (1400, "remove tags/atributes: [link, style, svg, img], [id, class, style]"),
+            (1000, "remove tags: [meta, script]"),
+            (500, "remove HTML structure"),
+            (450, "remove structure markers"),
+            (100, "trim content"),
+        ]
+        for token_budget, name in stages:
+            with self.subTest(token_budget=token_budget):
+                processed_content, recorder = self.process(token_budget)
+                self.assertEqual(recorder.names[-1], name, "収まる段階で止まること.")
+                self.assertLessEqual(len(processed_content.encode()), token_budget, "上限に収まること.")
+                self.assertEqual(
+                    recorder.telemetries["content_tokens"],
+                    len(processed_content.encode()),
+                    "本文のトークン数を記録すること.",
+                )
+
+        """
+        正常系 2:
+        末尾を削る場合、マルチバイト文字の途中で切れた文字を残さないこと
+        """
+        processed_content, _ = self.process(101)
+        self.assertNotIn("\ufffd", processed_content)
+
+        """
+        正常系 3:
+        トークナイザを読み込めない場合は文字数の上限で処理すること
+        """
+        recorder = TelemetryRecorder()
+        with mock.patch.object(fetcher, "get_encoding", lambda: None):
+            processed_content = fetcher.process_html_content(self.html_content, "budget", recorder, 100)
+        self.assertEqual(
+            processed_content,
+            legacy_process_html_content(self.html_content, "budget", TelemetryRecorder()),
+        )
+        self.assertNotIn("content_tokens", recorder.telemetries)
+
+    def test_content_token_budget(self):
+        """
+        正常系 1:
+        コンテキスト長から応答の分と本文以外のプロンプトの分を除いたトークン数になること
+        """
+        with mock.patch.object(prompt, "get_encoding", ByteEncoding):
+            token_budget = prompt.content_token_budget(["営業", "エンジニア"])
+        prompt_tokens = len(prompt.constructPrompt("", ["営業", "エンジニア"]).encode())
+        self.assertEqual(
+            token_budget,
+            prompt.context_tokens - prompt.completion_tokens - prompt.message_overhead_tokens - prompt_tokens,
+        )
+
+        """
+        異常系 1:
+        トークナイザを読み込めない場合は None が返ること
+        """
+        with mock.patch.object(prompt, "get_encoding", lambda: None):
+            self.assertIsNone(prompt.content_token_budget(["営業"]))
@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import APITestCase
+
+from api.models import (
+    Organization,
+    JobCategory,
+    OrganizationCompany,
+    Jobseeker,
+    Job,
+    Proposal,
+    Record,
+    JobLoading,
+)
+from api.views import (
+    JobViewSet,
+    JobseekerViewSet,
+    RecordViewSet,
+    RecordNotificationAllViewSet,
+    ProposalViewSet,
+    JobLoadingViewSet,
+)
+
+
+class OrganizationIndexTests(APITestCase):
+    """一覧APIのクエリが組織ごとの複合インデックスで処理できることを実行計画で検証する"""
+
+    rows_per_organization = 200
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        job_category = JobCategory.objects.create(name="category")
+        for i in range(3):
+            organization = Organization.objects.create(name=f"organization{i}")
+            user = get_user_model().objects.create(
+                username=f"user{i}", organization=organization
+            )
+            organization_company = OrganizationCompany.objects.create(
+                name=f"company{i}", organization=organization
+            )
+            # 件数が少ないと、インデックスで並び順を処理するよりソートした方が安い実行計画になるため、
+            # 1ページより十分に多い件数を bulk_create でまとめて作る
+            jobseekers = Jobseeker.objects.bulk_create(
+                Jobseeker(name=f"jobseeker{j}", in_charge=user, organization=organization)
+                for j in range(self.rows_per_organization)
+            )
+            jobs = Job.objects.bulk_create(
+                Job(
+                    organization_company=organization_company,
+                    job_category=job_category,
+                    position=f"position{j}",
+                    is_archive=j % 2 == 0,
+                    organization=organization,
+                )
+                for j in range(self.rows_per_organization)
+            )
+            proposals = Proposal.objects.bulk_create(
+                Proposal(
+                    jobseeker=jobseeker,
+                    job=job,
+                    position=job.position,
+                    organization=organization,
+                )
+                for jobseeker, job in zip(jobseekers, jobs)
+            )
+            Record.objects.bulk_create(
+                Record(proposal=proposal, is_checked=j % 3 == 0, organization=organization)
+                for j, proposal in enumerate(proposals)
+            )
+            JobLoading.objects.bulk_create(
+                JobLoading(
+                    source_url="https://example.com",
+                    user=user,
+                    is_deleted=j % 4 == 0,
+                    organization=organization,
+                )
+                for j in range(self.rows_per_organization)
+            )
+        self.user = user
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+            # 少量のデータではシーケンシャルスキャンが選ばれるため、インデックスが使えるかどうかのみを検証する
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def explain(self, view_class, query=""):
+        view = view_class()
+        view.request = Request(self.factory.get(f"/?{query}"))
+        view.request.user = self.user
+        view.format_kwarg = None
+        return view.get_queryset()[:20].explain()
+
+    def test_list_endpoints_use_index_scan(self):
+        """
+        正常系 1:
+        各一覧APIが組織の複合インデックスを使うこと
+        """
+        cases = [
+            (JobViewSet, "", "api_job_org_created_idx"),
+            (JobViewSet, "is_archive=false", "api_job_org_archive_idx"),
+            (JobseekerViewSet, "", "api_jobseeker_org_created_idx"),
+            (RecordViewSet, "", "api_record_org_created_idx"),
+            (RecordNotificationAllViewSet, "", "api_record_unchecked_idx"),
+            (ProposalViewSet, "", "api_proposal_org_created_idx"),
+            (JobLoadingViewSet, "", "api_jobloading_org_created_idx"),
+        ]
+        for view_class, query, index_name in cases:
+            with self.subTest(view=view_class.__name__, query=query):
+                plan = self.explain(view_class, query)
+                self.assertIn("Index", plan, "インデックススキャンであること")
+                self.assertIn(index_name, plan, f"{index_name} が使われること")
@@ -0,0 +1,257 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from rest_framework.test import APITestCase
+
+from api.models import Organization, JobCategory, Jobseeker, Job, JobLatestProposal, Proposal, Tag
+from api.views import JobViewSet
+
+
+class JobTagFilterTests(APITestCase):
+    url = "".join([reverse("agent_recmii:job-list")])
+
+    def setUp(self):
+        self.factory = APIRequestFactory(enforce_csrf_checks=True)
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        self.job_category = JobCategory.objects.create(name="category")
+        self.jobseeker = Jobseeker.objects.create(
+            name="jobseeker", organization=self.organization
+        )
+        self.tag_a = Tag.objects.create(name="A", organization=self.organization)
+        self.tag_b = Tag.objects.create(name="B", organization=self.organization)
+        self.view = JobViewSet.as_view({"get": "list"})
+
+    def create_job(self, *proposal_tags):
+        job = Job.objects.create(
+            position="job", job_category=self.job_category, organization=self.organization
+        )
+        for i, tags in enumerate(proposal_tags):
+            proposal = Proposal.objects.create(
+                jobseeker=self.jobseeker,
+                job=job,
+                position="proposal",
+                organization=self.organization,
+            )
+            # 後の提案ほど新しくなるように created_at をずらす
+            Proposal.objects.filter(id=proposal.id).update(
+                created_at=timezone.now() - timedelta(days=len(proposal_tags) - i)
+            )
+            for tag in tags:
+                proposal.tags.add(tag, through_defaults={"organization": self.organization})
+        Job.refresh_latest_proposals([job.id])
+        return job
+
+    def latest_proposal_id(self, job):
+        latest = JobLatestProposal.objects.filter(job=job).first()
+        return latest.proposal_id if latest else None
+
+    def get(self, tags):
+        request = self.factory.get(self.url, {"tags[]": [str(tag.id) for tag in tags]})
+        force_authenticate(request, user=self.user)
+        return self.view(request)
+
+    def test_latest_proposal_is_maintained(self):
+        """
+        正常系 1:
+        提案の追加・削除で JobLatestProposal が付け替わること
+        """
+        job = self.create_job()
+        self.assertIsNone(self.latest_proposal_id(job), "提案がなければ行がないこと.")
+
+        first = Proposal.objects.create(
+            jobseeker=self.jobseeker, job=job, position="1", organization=self.organization
+        )
+        self.assertEqual(self.latest_proposal_id(job), first.id, "追加した提案を指すこと.")
+
+        second = Proposal.objects.create(
+            jobseeker=self.jobseeker, job=job, position="2", organization=self.organization
+        )
+        self.assertEqual(self.latest_proposal_id(job), second.id, "新しい提案に付け替わること.")
+
+        second.delete()
+        self.assertEqual(self.latest_proposal_id(job), first.id, "削除すると1つ前の提案に戻ること.")
+
+        first.delete()
+        self.assertIsNone(self.latest_proposal_id(job), "すべて削除すると行がなくなること.")
+
+    def test_filter_jobs_by_tags(self):
+        """
+        正常系 1:
+        最新の提案に指定タグがすべて付いている求人のみ取得できること
+        """
+        job_both = self.create_job([self.tag_a, self.tag_b])
+        job_a = self.create_job([self.tag_a])
+        job_old = self.create_job([self.tag_a, self.tag_b], [])
+        self.create_job()
+
+        response = self.get([self.tag_a, self.tag_b])
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(
+            [x["id"] for x in response.data["results"]],
+            [str(job_both.id)],
+            "古い提案のタグは対象外であること.",
+        )
+
+        response = self.get([self.tag_a])
+        self.assertEqual(
+            {x["id"] for x in response.data["results"]},
+            {str(job_both.id), str(job_a.id)},
+            "1タグでも絞り込めること.",
+        )
+        self.assertNotIn(str(job_old.id), [x["id"] for x in response.data["results"]])
+
+        """
+        正常系 2:
+        求人を保存しても最新の提案が元に戻らないこと
+        """
+        job = Job.objects.get(id=job_both.id)
+        Proposal.objects.filter(job=job).delete()
+        job.position = "updated"
+        job.save()
+        self.assertIsNone(self.latest_proposal_id(job), "保存前の値で戻らないこと.")
+
+
+class JobSalaryFilterTests(APITestCase):
+    url = "".join([reverse("agent_recmii:job-list")])
+
+    def setUp(self):
+        self.factory = APIRequestFactory(enforce_csrf_checks=True)
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        job_category = JobCategory.objects.create(name="category")
+        self.jobs = {
+            salary: Job.objects.create(
+                position="job",
+                min_salary=salary[0],
+                max_salary=salary[1],
+                job_category=job_category,
+                organization=self.organization,
+            )
+            for salary in [(300, 500), (500, 700), (None, 400), (600, None), (None, None)]
+        }
+        self.view = JobViewSet.as_view({"get": "list"})
+
+    def get(self, query):
+        request = self.factory.get(self.url, query)
+        force_authenticate(request, user=self.user)
+        return self.view(request)
+
+    def assertSalaries(self, response, salaries, message):
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(
+            {x["id"] for x in response.data["results"]},
+            {str(self.jobs[salary].id) for salary in salaries},
+            message,
+        )
+
+    def test_filter_jobs_by_salary(self):
+        """
+        正常系 1:
+        指定範囲と重なる求人のみ取得できること (境界は含まない、片側のない求人は上限・下限なし)
+        """
+        self.assertSalaries(
+            self.get({"min_salary": 500, "max_salary": 600}),
+            [(500, 700)],
+            "両端を指定した場合.",
+        )
+        self.assertSalaries(
+            self.get({"min_salary": 450, "max_salary": 650}),
+            [(300, 500), (500, 700), (600, None)],
+            "両端を指定した場合.",
+        )
+        self.assertSalaries(
+            self.get({"max_salary": 500}),
+            [(300, 500), (None, 400)],
+            "上限のみ指定した場合.",
+        )
+        self.assertSalaries(
+            self.get({"min_salary": 500}),
+            [(500, 700), (600, None)],
+            "下限のみ指定した場合.",
+        )
+        self.assertSalaries(
+            self.get({"min_salary": 499, "max_salary": 500}),
+            [(300, 500)],
+            "範囲の幅が1の場合も同じ結果になること.",
+        )
+
+        """
+        異常系 1:
+        下限が上限より大きい場合は0件であること
+        """
+        self.assertSalaries(
+            self.get({"min_salary": 700, "max_salary": 500}), [], "0件であること."
+        )
+
+        """
+        正常系 2:
+        年収を更新すると salary_range も更新されること
+        """
+        job = self.jobs[(None, None)]
+        job.min_salary = 550
+        job.save(update_fields=["min_salary"])
+        self.jobs[(550, None)] = job
+        self.assertSalaries(
+            self.get({"min_salary": 500, "max_salary": 600}),
+            [(500, 700), (550, None)],
+            "更新後の年収で絞り込めること.",
+        )
+
+    def test_filter_jobs_by_salary_edge_cases(self):
+        """
+        正常系 1:
+        下限が上限より大きい求人も、以前と同じく下限 < 指定の上限 かつ 上限 > 指定の下限 なら取得できること
+        """
+        self.jobs[(600, 400)] = Job.objects.create(
+            position="job",
+            min_salary=600,
+            max_salary=400,
+            job_category=self.jobs[(300, 500)].job_category,
+            organization=self.organization,
+        )
+        self.assertSalaries(
+            self.get({"min_salary": 300, "max_salary": 700}),
+            [(300, 500), (500, 700), (None, 400), (600, None), (600, 400)],
+            "下限が上限より大きい求人も取得できること.",
+        )
+        self.assertSalaries(
+            self.get({"min_salary": 450, "max_salary": 550}),
+            [(300, 500), (500, 700)],
+            "下限が指定の上限以上の場合は取得しないこと.",
+        )
+
+        """
+        正常系 2:
+        int の範囲を超える値を指定しても、エラーにならずに以前と同じ結果になること
+        """
+        self.assertSalaries(
+            self.get({"max_salary": 99999999999}),
+            [(300, 500), (500, 700), (None, 400), (600, None), (600, 400)],
+            "上限のみ指定した場合.",
+        )
+        self.assertSalaries(
+            self.get({"min_salary": 99999999999}),
+            [(600, None)],
+            "下限のみ指定した場合.",
+        )
+        self.assertSalaries(
+            self.get({"min_salary": -99999999999, "max_salary": 99999999999}),
+            [(300, 500), (500, 700), (None, 400), (600, None), (600, 400)],
+            "両端を指定した場合.",
+        )
+        self.assertSalaries(
+            self.get({"max_salary": -99999999999}),
+            [(None, 400)],
+            "下限のない求人のみ取得できること.",
+        )
@@ -0,0 +1,176 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from rest_framework.test import APITestCase
+
+from api.jobloading import batch
+from api.models import Organization, JobLoading, JobLoadingBatch
+from api.views import JobLoadingBulkCreateView, JobLoadingBatchViewSet
+
+
+class PlanLanesTests(SimpleTestCase):
+    def test_plan_lanes(self):
+        """
+        正常系 1:
+        ドメインごとの上限を超えて並行に実行せず、依頼の順に振り分けること
+        """
+        urls = [f"https://herp.careers/v1/company/{i}" for i in range(3)] + [
+            f"https://example.com/jobs/{i}" for i in range(5)
+        ]
+        job_loadings = [SimpleNamespace(source_url=url) for url in urls]
+        with mock.patch.object(batch, "domain_concurrency", {"herp.careers": 1}), mock.patch.object(
+            batch, "default_domain_concurrency", 2
+        ):
+            lanes = batch.plan_lanes(job_loadings)
+
+        self.assertEqual(
+            [[x.source_url for x in lane] for lane in lanes],
+            [
+                urls[0:3],
+                [urls[3], urls[5], urls[7]],
+                [urls[4], urls[6]],
+            ],
+        )
+
+
+    def test_plan_chunks(self):
+        """
+        正常系 1:
+        同じドメインは1つのタスクにまとめ、上限を超える件数のドメインは順に実行するタスクに分けること
+        """
+        urls = (
+            [f"https://example.com/jobs/{i}" for i in range(2)]
+            + [f"https://herp.careers/v1/company/{i}" for i in range(5)]
+            + [f"https://example.org/jobs/{i}" for i in range(2)]
+        )
+        job_loadings = [SimpleNamespace(source_url=url) for url in urls]
+        with mock.patch.object(batch, "async_chunk_size", 4), mock.patch.object(
+            batch, "async_max_lane_length", 5
+        ):
+            sequences = batch.plan_chunks(job_loadings)
+
+        self.assertEqual(
+            [[[x.source_url for x in chunk] for chunk in sequence] for sequence in sequences],
+            [[urls[0:2] + urls[7:9]], [urls[2:6], urls[6:7]]],
+        )
+
+        """
+        正常系 2:
+        タスク全体の上限は、同じドメインで順に実行する件数に合わせて延ばすこと
+        """
+        with mock.patch.object(batch, "domain_concurrency", {"herp.careers": 1}), mock.patch.object(
+            batch, "default_domain_concurrency", 2
+        ):
+            limits = [batch.async_time_limits(chunk) for chunk in sequences[1]]
+        self.assertEqual(limits[0]["soft_time_limit"], 4 * batch.load_timeout + batch.async_margin_seconds)
+        self.assertEqual(limits[1]["soft_time_limit"], batch.load_timeout + batch.async_margin_seconds)
+        self.assertGreater(limits[0]["time_limit"], limits[0]["soft_time_limit"])
+
+        """
+        正常系 3:
+        1つのタスクで同じドメインを順に実行する件数は上限までにすること
+        """
+        urls = [f"https://herp.careers/v1/company/{i}" for i in range(200)]
+        job_loadings = [SimpleNamespace(source_url=url) for url in urls]
+        with mock.patch.object(batch, "domain_concurrency", {"herp.careers": 1}):
+            sequences = batch.plan_chunks(job_loadings)
+            limits = [batch.async_time_limits(chunk) for chunk in sequences[0]]
+
+        self.assertEqual(len(sequences), 1, "同じドメインは同時に実行しないこと.")
+        self.assertEqual(
+            [x.source_url for chunk in sequences[0] for x in chunk], urls, "依頼の順に実行すること."
+        )
+        self.assertLessEqual(
+            max(x["soft_time_limit"] for x in limits),
+            batch.async_max_lane_length * batch.load_timeout + batch.async_margin_seconds,
+            "タスク全体の上限が延びすぎないこと.",
+        )
+
+
+class JobLoadingBatchTests(APITestCase):
+    """求人の一括取り込みが1回の INSERT で作成され、進捗を集計して返すことを検証する"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory(enforce_csrf_checks=True)
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+
+    def post(self, data):
+        request = self.factory.post("/", data, format="json")
+        force_authenticate(request, user=self.user)
+        with mock.patch.object(batch, "dispatch") as dispatch, CaptureQueriesContext(connection) as context:
+            response = JobLoadingBulkCreateView.as_view()(request)
+        return response, dispatch, context.captured_queries
+
+    def retrieve(self, batch_id, user):
+        request = self.factory.get("/")
+        force_authenticate(request, user=user)
+        return JobLoadingBatchViewSet.as_view({"get": "retrieve"})(request, pk=batch_id)
+
+    def test_bulk_create(self):
+        """
+        正常系 1:
+        すべての取り込みが1回の INSERT で作成され、まとめて実行に回されること
+        """
+        source_urls = [f"https://example.com/jobs/{i}" for i in range(50)]
+        response, dispatch, queries = self.post({"source_urls": source_urls})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, "HTTPステータス201が返ること.")
+        self.assertEqual(
+            len([x for x in queries if x["sql"].startswith(f'INSERT INTO "{JobLoading._meta.db_table}"')]),
+            1,
+            "1回の INSERT で作成されること.",
+        )
+        self.assertEqual(
+            [x.source_url for x in dispatch.call_args.args[0]], source_urls, "すべて実行に回されること."
+        )
+        self.assertEqual(response.data["total"], 50)
+        self.assertEqual(response.data["pending"], 50)
+
+        """
+        正常系 2:
+        完了・失敗・未完了の件数が集計されること
+        """
+        JobLoading.objects.filter(id=response.data["job_loadings"][0]["id"]).update(is_completed=True)
+        JobLoading.objects.filter(id=response.data["job_loadings"][1]["id"]).update(is_error=True)
+        progress = self.retrieve(response.data["id"], self.user)
+        self.assertEqual(progress.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(
+            (progress.data["completed"], progress.data["error"], progress.data["pending"]),
+            (1, 1, 48),
+            "件数が集計されること.",
+        )
+
+        """
+        異常系 1:
+        他の組織の一括取り込みは参照できないこと
+        """
+        other = get_user_model().objects.create(
+            username="other", organization=Organization.objects.create(name="other")
+        )
+        self.assertEqual(
+            self.retrieve(response.data["id"], other).status_code,
+            status.HTTP_404_NOT_FOUND,
+            "HTTPステータス404が返ること.",
+        )
+
+    def test_bulk_create_invalid(self):
+        """
+        異常系 1:
+        URL でない値や上限を超える件数の場合は1件も作成されないこと
+        """
+        for source_urls in (["https://example.com", "not a url"], ["https://example.com"] * 201, []):
+            with self.subTest(count=len(source_urls)):
+                response, dispatch, _ = self.post({"source_urls": source_urls})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, "HTTPステータス400が返ること.")
+                self.assertFalse(dispatch.called)
+        self.assertFalse(JobLoadingBatch.objects.exists(), "1件も作成されないこと.")
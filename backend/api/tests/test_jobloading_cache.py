@@ -0,0 +1,175 @@
+import time
+from unittest import SkipTest, mock
+
+import redis
+
+from django.test import SimpleTestCase
+
+from api.jobloading import cache, fetcher
+from api.jobloading.progress import get_client
+from api.management.commands.benchmark_html_reducer import TelemetryRecorder
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+
+class NormalizeUrlTests(SimpleTestCase):
+    def test_normalize_url(self):
+        """
+        正常系 1:
+        大文字小文字・既定のポート・フラグメント・クエリの順序・計測用のクエリの違いを同じ URL とみなすこと
+        """
+        self.assertEqual(
+            cache.normalize_url("HTTPS://Example.com:443/jobs?b=2&utm_source=x&a=1#apply"),
+            cache.normalize_url("https://example.com/jobs?a=1&b=2"),
+        )
+        self.assertNotEqual(
+            cache.normalize_url("https://example.com/jobs?a=1"),
+            cache.normalize_url("https://example.com/jobs?a=2"),
+            "内容に影響するクエリは区別すること.",
+        )
+
+
+class CacheStoreTests(SimpleTestCase):
+    """Redis に保存したページ・解析結果の読み書きと、件数の上限による削除を検証する"""
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            get_client().ping()
+        except redis.exceptions.ConnectionError:
+            raise SkipTest("Redis に接続できないため")
+        super().setUpClass()
+
+    def setUp(self):
+        patcher = mock.patch.object(cache, "key_prefix", "test:jobloading:cache")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.delete_keys)
+
+    def delete_keys(self):
+        client = get_client()
+        keys = list(client.scan_iter("test:jobloading:cache:*"))
+        if keys:
+            client.delete(*keys)
+
+    def test_round_trip(self):
+        """
+        正常系 1:
+        保存したページと解析結果を読み出せること
+        """
+        cache.set_page("https://example.com/jobs/1", "<html></html>", "REST GET", etag='"v1"', processed_content="<html></html>")
+        page = cache.get_page("https://EXAMPLE.com/jobs/1#top")
+        self.assertEqual(page["html_content"], "<html></html>")
+        self.assertEqual(cache.validator_headers(page), {"If-None-Match": '"v1"'})
+        self.assertTrue(cache.is_fresh(page))
+
+        cache.set_extraction("model", "prompt", {"position": "エンジニア"})
+        self.assertEqual(cache.get_extraction("model", "prompt"), {"position": "エンジニア"})
+        self.assertIsNone(cache.get_extraction("model", "other prompt"), "プロンプトが違えば使わないこと.")
+
+    def test_eviction(self):
+        """
+        正常系 1:
+        件数の上限を超えたら、最後に使われたのが古いものから削除されること
+        """
+        with mock.patch.object(cache, "max_entries", 2):
+            cache.set_extraction("model", "a", {"n": 1})
+            time.sleep(0.01)
+            cache.set_extraction("model", "b", {"n": 2})
+            time.sleep(0.01)
+            cache.get_extraction("model", "a")
+            time.sleep(0.01)
+            cache.set_extraction("model", "c", {"n": 3})
+
+        self.assertIsNotNone(cache.get_extraction("model", "a"), "使われたものは残ること.")
+        self.assertIsNone(cache.get_extraction("model", "b"), "古いものから削除されること.")
+        self.assertEqual(get_client().zcard(cache.index_key("extraction")), 2)
+
+    def test_eviction_by_size(self):
+        """
+        正常系 2:
+        合計サイズの上限を超えたら、最後に使われたのが古いものから削除されること
+        """
+        with mock.patch.object(cache, "max_bytes", 100):
+            cache.set_entry("page", "a", b"a" * 40, 60)
+            time.sleep(0.01)
+            cache.set_entry("page", "b", b"b" * 40, 60)
+            time.sleep(0.01)
+            cache.get_entry("page", "a")
+            time.sleep(0.01)
+            cache.set_entry("page", "c", b"c" * 40, 60)
+            time.sleep(0.01)
+            # 同じキーを上書きしたときは前のサイズを差し引くこと
+            cache.set_entry("page", "c", b"c" * 50, 60)
+
+        self.assertEqual(cache.get_entry("page", "a"), b"a" * 40, "使われたものは残ること.")
+        self.assertIsNone(cache.get_entry("page", "b"), "古いものから削除されること.")
+        self.assertEqual(cache.get_entry("page", "c"), b"c" * 50)
+        self.assertEqual(int(get_client().get(cache.total_key("page"))), 90, "合計サイズを数えること.")
+        self.assertEqual(get_client().hlen(cache.sizes_key("page")), 2)
+
+
+class FetchCacheTests(SimpleTestCase):
+    """取得済みのページがある場合に取得し直さない、または条件付き GET で確認することを検証する"""
+
+    source_url = "https://example.com/jobs/1"
+
+    def fetch(self, page, response):
+        recorder = TelemetryRecorder()
+        stored = []
+        with mock.patch.object(cache, "get_page", return_value=page), mock.patch.object(
+            cache, "set_page", lambda *args, **kwargs: stored.append(args)
+        ), mock.patch.object(fetcher.requests, "get", return_value=response) as get:
+            processed_content = fetcher.fetch_from_url(self.source_url, recorder)
+        return processed_content, recorder.telemetries, get, stored
+
+    def page(self, fetched_at):
+        return {
+            "fetched_at": fetched_at,
+            "fetch_method": "REST GET",
+            "etag": '"v1"',
+            "last_modified": None,
+            "html_content": "<html><body><p>求人</p></body></html>",
+            "processed_content": "<html><body><p>求人</p></body></html>",
+            "token_budget": None,
+        }
+
+    def test_fresh_page(self):
+        """
+        正常系 1:
+        直前に取得したページはリクエストせずに使うこと
+        """
+        processed_content, telemetries, get, _ = self.fetch(self.page(time.time()), None)
+        self.assertFalse(get.called, "リクエストしないこと.")
+        self.assertEqual(telemetries["fetch_cache"], "fresh")
+        self.assertIn("求人", processed_content)
+
+    def test_revalidated_page(self):
+        """
+        正常系 1:
+        古いページは検証子を付けて確認し、304 の場合は保存済みの内容を使うこと
+        """
+        page = self.page(time.time() - cache.page_fresh_seconds - 1)
+        processed_content, telemetries, get, stored = self.fetch(page, FakeResponse(304))
+        self.assertEqual(get.call_args.kwargs["headers"]["If-None-Match"], '"v1"')
+        self.assertEqual(telemetries["fetch_cache"], "revalidated")
+        self.assertEqual(processed_content, page["processed_content"])
+        self.assertEqual(len(stored), 1, "取得時刻を更新すること.")
+
+        """
+        正常系 2:
+        変わっていれば新しい内容を検証子とともに保存すること
+        """
+        response = FakeResponse(200, "<html><body><p>新しい求人</p></body></html>", {"ETag": '"v2"'})
+        processed_content, telemetries, _, stored = self.fetch(page, response)
+        self.assertEqual(telemetries["fetch_cache"], "miss")
+        self.assertIn("新しい求人", processed_content)
+        self.assertEqual(stored[0][3], '"v2"')
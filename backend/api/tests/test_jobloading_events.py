@@ -0,0 +1,83 @@
+import json
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APITestCase
+
+from api.jobloading import events, progress
+from api.models import Organization, JobLoading
+
+
+class JobLoadingEventsTests(APITestCase):
+    """求人取り込みの進捗ストリームの認証と、最初に送る段階を検証する"""
+
+    def setUp(self):
+        organization = Organization.objects.create(name="organization")
+        self.job_loading = JobLoading.objects.create(
+            source_url="https://example.com",
+            user=get_user_model().objects.create(username="user", organization=organization),
+            organization=organization,
+        )
+
+    def scope(self, path, query_string=b""):
+        return {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": query_string,
+            "headers": [],
+        }
+
+    def test_match(self):
+        """
+        正常系 1:
+        進捗ストリームのパスだけを横取りすること
+        """
+        path = f"/api/agent/v1/job_loadings/{self.job_loading.id}/events/"
+        self.assertEqual(events.match(self.scope(path)), str(self.job_loading.id))
+        self.assertIsNone(events.match(self.scope("/api/agent/v1/job_loadings/")))
+        self.assertIsNone(events.match({**self.scope(path), "method": "POST"}))
+
+    def test_unauthenticated(self):
+        """
+        異常系 1:
+        トークンがない場合は 401 が返ること
+        """
+        path = f"/api/agent/v1/job_loadings/{self.job_loading.id}/events/"
+
+        async def application(scope, receive, send):
+            await events.job_loading_events(scope, receive, send, str(self.job_loading.id))
+
+        async def run():
+            communicator = ApplicationCommunicator(application, self.scope(path))
+            await communicator.send_input({"type": "http.request"})
+            return await communicator.receive_output(timeout=5)
+
+        self.assertEqual(async_to_sync(run)()["status"], 401, "HTTPステータス401が返ること.")
+
+    def test_current_message(self):
+        """
+        正常系 1:
+        DBの状態、Redis に残った最後の段階、待機中の順に最初の段階を決めること
+        """
+        stored = progress.build_message(self.job_loading.id, progress.STAGE_CALLING_GPT).encode()
+        self.assertEqual(
+            json.loads(events.current_message(self.job_loading, None))["stage"], "queued"
+        )
+        self.assertEqual(
+            json.loads(events.current_message(self.job_loading, stored))["stage"], "calling_gpt"
+        )
+
+        self.job_loading.is_error = True
+        self.job_loading.error_message = "タイムアウトしました。"
+        message = json.loads(events.current_message(self.job_loading, stored))
+        self.assertEqual(message["stage"], "error", "終了していればDBの状態を優先すること.")
+        self.assertEqual(message["error_message"], "タイムアウトしました。")
+
+        self.assertEqual(
+            events.encode_event(progress.build_message(self.job_loading.id, "saved")),
+            f'event: saved\ndata: {{"id": "{self.job_loading.id}", "stage": "saved"}}\n\n'.encode(),
+            "SSE の形式で送ること.",
+        )
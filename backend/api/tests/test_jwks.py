@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import SimpleTestCase
+
+from api import utils
+from api.authentication.jwks import JWKSKeyStore
+
+
+def generate_jwk(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+    return private_key, jwk
+
+
+class StubIssuer:
+    """/.well-known/jwks.json だけを返すローカルの発行元"""
+
+    def __init__(self):
+        self.jwks = {"keys": []}
+        self.requests = 0
+        self.is_down = False
+        issuer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                issuer.requests += 1
+                if issuer.is_down or self.path != "/.well-known/jwks.json":
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps(issuer.jwks).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JWKSKeyStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.issuer = StubIssuer()
+        self.private_key_1, jwk_1 = generate_jwk("kid-1")
+        _, self.jwk_2 = generate_jwk("kid-2")
+        self.issuer.jwks = {"keys": [jwk_1]}
+        self.store = JWKSKeyStore(
+            f"{self.issuer.url}/.well-known/jwks.json",
+            ttl=60,
+            max_stale=600,
+            min_refresh_interval=30,
+        )
+
+    def tearDown(self):
+        self.issuer.stop()
+
+    def encode(self, private_key, kid, expires_in=3600):
+        return jwt.encode(
+            {
+                "sub": "auth0|user",
+                "aud": utils.env("JWT_AUDIENCE"),
+                "iss": "{}/".format(utils.env("JWT_ISSUER")),
+                "exp": int(time.time()) + expires_in,
+            },
+            private_key,
+            algorithm="RS256",
+            headers={"kid": kid},
+        )
+
+    def test_decode_token_uses_cached_keys(self):
+        """
+        正常系 1:
+        2回目以降のデコードでは発行元へのリクエストが発生しないこと
+        """
+        with mock.patch.object(utils, "jwks_key_store", self.store):
+            for i in range(3):
+                token = self.encode(self.private_key_1, "kid-1", expires_in=3600 + i)
+                payload = utils.jwt_decode_token(token)
+
+        self.assertEqual(payload["sub"], "auth0|user", "デコードできること")
+        self.assertEqual(self.issuer.requests, 1, "JWKSの取得は1回のみであること")
+        stats = self.store.stats()
+        self.assertEqual(stats["hits"], 2, "キャッシュヒットが記録されること")
+        self.assertEqual(stats["misses"], 1, "キャッシュミスが記録されること")
+        self.assertEqual(stats["refreshes"], 1, "JWKSの取得が記録されること")
+
+    def test_unknown_kid_refresh(self):
+        """
+        正常系 1:
+        未知のkidの場合、JWKSを再取得して鍵のローテーションに追従できること
+        """
+        self.store.min_refresh_interval = 0
+        self.store.get_key("kid-1")
+        self.issuer.jwks["keys"].append(self.jwk_2)
+
+        self.assertIsNotNone(self.store.get_key("kid-2"), "新しい鍵が取得できること")
+        self.assertEqual(self.issuer.requests, 2, "JWKSが再取得されること")
+
+        """
+        異常系 1:
+        存在しないkidが続いても、再取得は min_refresh_interval ごとに1回に制限されること
+        """
+        self.store.min_refresh_interval = 30
+        for _ in range(5):
+            with self.assertRaises(jwt.InvalidTokenError):
+                self.store.get_key("kid-unknown")
+        self.assertEqual(self.issuer.requests, 2, "発行元へのリクエストが増えないこと")
+
+    def test_stale_keys_while_issuer_is_down(self):
+        """
+        正常系 1:
+        TTL切れでも発行元に接続できない間は、古い鍵を使い続けられること
+        """
+        key = self.store.get_key("kid-1")
+        self.issuer.is_down = True
+        self.store.min_refresh_interval = 0
+        self.store._fetched_at -= self.store.ttl + 1
+
+        self.assertIs(self.store.get_key("kid-1"), key, "古い鍵が返ること")
+        for _ in range(50):
+            if self.store.stats()["refresh_errors"]:
+                break
+            time.sleep(0.1)
+        self.assertEqual(self.store.stats()["refresh_errors"], 1, "再取得の失敗が記録されること")
+
+        """
+        異常系 1:
+        max_stale を超えた鍵は使われないこと
+        """
+        self.store._fetched_at -= self.store.max_stale
+        with self.assertRaises(jwt.InvalidTokenError):
+            self.store.get_key("kid-1")
@@ -0,0 +1,118 @@
+import json
+from base64 import urlsafe_b64encode
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from rest_framework.test import APITestCase
+
+from api.models import Organization, Jobseeker
+from api.views import JobseekerViewSet, JobViewSet
+
+
+class StandardResultsSetPaginationTests(APITestCase):
+    url = "".join([reverse("agent_recmii:jobseeker-list")])
+
+    def setUp(self):
+        self.factory = APIRequestFactory(enforce_csrf_checks=True)
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        self.jobseekers = [
+            Jobseeker.objects.create(name=f"jobseeker{i}", organization=self.organization)
+            for i in range(45)
+        ]
+        Jobseeker.objects.create(name="other", organization=Organization.objects.create(name="other"))
+        self.view = JobseekerViewSet.as_view({"get": "list"})
+
+    def get(self, url):
+        request = self.factory.get(url)
+        force_authenticate(request, user=self.user)
+        return self.view(request)
+
+    def test_cursor(self):
+        """
+        正常系 1:
+        cursor を辿って全件を重複・欠落なく (created_at, id) の降順で取得できること
+        """
+        response = self.get(self.url + "?pagination=cursor")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertNotIn("count", response.data, "件数を数えないこと.")
+
+        ids = []
+        pages = 0
+        while True:
+            pages += 1
+            ids += [x["id"] for x in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            response = self.get(response.data["next"])
+
+        expected = Jobseeker.objects.filter(organization=self.organization).order_by(
+            "-created_at", "-id"
+        )
+        self.assertEqual(pages, 3, "3ページに分かれること.")
+        self.assertEqual(ids, [str(x.id) for x in expected], "全件を順に取得できること.")
+
+        """
+        異常系 1:
+        不正な cursor の場合、エラーが返ること
+        """
+        for cursor in (
+            "invalid",
+            urlsafe_b64encode(json.dumps(["2026-01-01T00:00:00+00:00", "not-a-uuid"]).encode()).decode(),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.get(self.url + f"?pagination=cursor&cursor={cursor}")
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, "HTTPステータス404が返ること.")
+
+        """
+        異常系 2:
+        一致度順など (created_at, id) 以外の並び順と併用した場合、エラーが返ること
+        """
+        view = JobViewSet.as_view({"get": "list"})
+        for query in ("q=エンジニア", "keyword=エンジニア&sort=relevance"):
+            with self.subTest(query=query):
+                request = self.factory.get(f"/?pagination=cursor&{query}")
+                force_authenticate(request, user=self.user)
+                response = view(request)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, "HTTPステータス400が返ること.")
+
+    def test_count(self):
+        """
+        正常系 1:
+        count=none の場合、件数を数えずにページ番号方式で取得できること
+        """
+        response = self.get(self.url + "?page=3&count=none")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertIsNone(response.data["count"], "件数が返らないこと.")
+        self.assertEqual(len(response.data["results"]), 5, "5件取得できること.")
+        self.assertIsNone(response.data["next"], "次のページがないこと.")
+        self.assertIsNotNone(response.data["previous"], "前のページがあること.")
+
+        """
+        正常系 2:
+        count=estimate の場合、推定件数が返ること
+        """
+        response = self.get(self.url + "?count=estimate")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertIsInstance(response.data["count"], int, "推定件数が返ること.")
+        self.assertEqual(len(response.data["results"]), 20, "20件取得できること.")
+
+        """
+        正常系 3:
+        count を指定しない場合、従来通り件数が返ること
+        """
+        response = self.get(self.url)
+        self.assertEqual(response.data["count"], 45, "45件であること.")
+
+        """
+        異常系 1:
+        count が exact・none・estimate 以外の場合、エラーが返ること
+        """
+        response = self.get(self.url + "?count=bogus")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, "HTTPステータス400が返ること.")
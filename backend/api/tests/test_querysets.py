@@ -0,0 +1,223 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from rest_framework.test import APITestCase
+
+from api.models import (
+    Organization,
+    Company,
+    JobCategory,
+    OrganizationCompany,
+    Tag,
+    Jobseeker,
+    Job,
+    Proposal,
+    Record,
+)
+from api.views import (
+    OrganizationJobCategoryViewSet,
+    OrganizationCompanyViewSet,
+    OrganizationCompanyAllViewSet,
+    TagViewSet,
+    JobseekerViewSet,
+    JobseekerAllViewSet,
+    JobViewSet,
+    ProposalViewSet,
+    RecordViewSet,
+    RecordNotificationAllViewSet,
+    JobseekerProposalViewSet,
+)
+
+
+class ListQuerysetTests(APITestCase):
+    """一覧APIのクエリに DISTINCT が含まれず、件数が増えてもクエリ数が変わらない (N+1 がない) ことを検証する"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        self.job_category = JobCategory.objects.create(name="category")
+        self.tags = [
+            Tag.objects.create(name=f"tag{i}", organization=self.organization)
+            for i in range(2)
+        ]
+        self.jobseeker = Jobseeker.objects.create(
+            name="jobseeker", in_charge=self.user, organization=self.organization
+        )
+        self.seeded = 0
+        self.seed(3)
+
+    def seed(self, count):
+        # シリアライザが辿るリレーション (会社、担当者、タグ) をすべて埋めておく
+        for _ in range(count):
+            self.seeded += 1
+            i = self.seeded
+            organization_company = OrganizationCompany.objects.create(
+                company=Company.objects.create(corporate_number=str(i), name=f"company{i}"),
+                name=f"company{i}",
+                organization=self.organization,
+            )
+            job = Job.objects.create(
+                organization_company=organization_company,
+                job_category=self.job_category,
+                position=f"position{i}",
+                organization=self.organization,
+            )
+            jobseeker = Jobseeker.objects.create(
+                name=f"jobseeker{i}", in_charge=self.user, organization=self.organization
+            )
+            for proposal_jobseeker in (self.jobseeker, jobseeker):
+                proposal = Proposal.objects.create(
+                    jobseeker=proposal_jobseeker,
+                    job=job,
+                    position=job.position,
+                    organization=self.organization,
+                )
+                for tag in self.tags:
+                    proposal.tags.add(tag, through_defaults={"organization": self.organization})
+                Record.objects.create(proposal=proposal, organization=self.organization)
+
+    def cases(self):
+        return [
+            (OrganizationJobCategoryViewSet, {}),
+            (OrganizationCompanyViewSet, {"company_id": 1}),
+            (JobseekerViewSet, {"keyword": "job"}),
+            (JobViewSet, {}),
+            (RecordViewSet, {"keyword": str(self.jobseeker.id)}),
+            (RecordNotificationAllViewSet, {"keyword": str(self.jobseeker.id)}),
+        ]
+
+    def list(self, view_class, query):
+        request = self.factory.get("/", query)
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = view_class.as_view({"get": "list"})(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        return context.captured_queries
+
+    def test_list_endpoints_without_distinct(self):
+        """
+        正常系 1:
+        一覧APIのクエリに DISTINCT が含まれないこと
+        """
+        for view_class, query in self.cases():
+            with self.subTest(view=view_class.__name__):
+                for captured in self.list(view_class, query):
+                    self.assertNotIn("DISTINCT", captured["sql"], "DISTINCT しないこと.")
+
+                view = view_class()
+                view.request = Request(self.factory.get("/", query))
+                view.request.user = self.user
+                view.format_kwarg = None
+                queryset = view.get_queryset()
+                if view_class is OrganizationJobCategoryViewSet:
+                    # 求人との多対一は EXISTS (準結合) で絞り込む
+                    self.assertIn("EXISTS", str(queryset.query), "EXISTS で絞り込むこと.")
+                    continue
+                plan = queryset.explain()
+                self.assertNotIn("Unique", plan, "重複排除のノードがないこと.")
+                self.assertNotIn("HashAggregate", plan, "重複排除のノードがないこと.")
+
+    def test_list_endpoints_query_count(self):
+        """
+        正常系 1:
+        件数が1ページ分を超えるまで増えても、一覧APIのクエリ数が変わらないこと
+        """
+        cases = [
+            (OrganizationJobCategoryViewSet, {}),
+            (OrganizationCompanyViewSet, {}),
+            (OrganizationCompanyAllViewSet, {}),
+            (TagViewSet, {}),
+            (JobseekerViewSet, {}),
+            (JobseekerAllViewSet, {"top": 50}),
+            (JobViewSet, {}),
+            (ProposalViewSet, {}),
+            (RecordViewSet, {}),
+            (RecordNotificationAllViewSet, {}),
+            (JobseekerProposalViewSet, {"jobseeker_id": str(self.jobseeker.id)}),
+        ]
+        before = {
+            view_class: len(self.list(view_class, query)) for view_class, query in cases
+        }
+        self.seed(20)
+        for view_class, query in cases:
+            with self.subTest(view=view_class.__name__):
+                self.assertEqual(
+                    len(self.list(view_class, query)),
+                    before[view_class],
+                    "クエリ数が変わらないこと.",
+                )
+
+    def test_compact_view(self):
+        """
+        正常系 1:
+        ?view=compact では長文の項目を返さず、DBからも読まないこと
+        """
+        cases = [
+            (JobViewSet, {}),
+            (ProposalViewSet, {}),
+            (RecordViewSet, {}),
+            (JobseekerProposalViewSet, {"jobseeker_id": str(self.jobseeker.id)}),
+        ]
+        for view_class, query in cases:
+            with self.subTest(view=view_class.__name__):
+                request = self.factory.get("/", {**query, "view": "compact"})
+                force_authenticate(request, user=self.user)
+                with CaptureQueriesContext(connection) as context:
+                    response = view_class.as_view({"get": "list"})(request)
+                self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+                self.assertNotIn("summary", str(response.data), "長文の項目を返さないこと.")
+                for captured in context.captured_queries:
+                    self.assertNotIn('"summary"', captured["sql"], "長文の列を読まないこと.")
+
+        """
+        正常系 2:
+        ?fields= で指定した項目だけを返し、指定していない長文の列は読まないこと
+        """
+        request = self.factory.get("/", {"fields": "id,position,summary"})
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = JobViewSet.as_view({"get": "list"})(request)
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "position", "summary"}, "指定した項目のみ返すこと."
+        )
+        self.assertFalse(
+            any('"api_job"."benefit"' in x["sql"] for x in context.captured_queries),
+            "指定していない長文の列を読まないこと.",
+        )
+
+        """
+        正常系 3:
+        ?fields= で指定していないリレーションは結合もプリフェッチもしないこと
+        """
+        cases = [
+            (ProposalViewSet, {}, "id,comment", '"api_job"'),
+            (RecordViewSet, {}, "id,is_checked", '"api_proposal"'),
+            (JobseekerProposalViewSet, {"jobseeker_id": str(self.jobseeker.id)}, "id,comment", '"api_job"'),
+        ]
+        for view_class, query, fields, table in cases:
+            with self.subTest(view=view_class.__name__):
+                request = self.factory.get("/", {**query, "fields": fields})
+                force_authenticate(request, user=self.user)
+                with CaptureQueriesContext(connection) as context:
+                    response = view_class.as_view({"get": "list"})(request)
+                self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+                results = response.data["results"] if "results" in response.data else response.data
+                self.assertEqual(set(results[0]), set(fields.split(",")), "指定した項目のみ返すこと.")
+                for captured in context.captured_queries:
+                    self.assertNotIn(table, captured["sql"], "指定していないリレーションを読まないこと.")
+                    self.assertNotIn('"api_tag"', captured["sql"], "タグをプリフェッチしないこと.")
+
+        request = self.factory.get("/", {"fields": "id,proposal"})
+        force_authenticate(request, user=self.user)
+        response = RecordViewSet.as_view({"get": "list"})(request)
+        self.assertIn(
+            "summary", response.data["results"][0]["proposal"]["job"], "指定したリレーションは入れ子まで返すこと."
+        )
@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from rest_framework.test import APITestCase
+
+from api.models import Organization, JobCategory, Jobseeker, Job, Proposal, Record
+from api.views import RecordNotificationAllViewSet
+
+
+class RecordNotificationAllTests(APITestCase):
+    """未確認の記録の通知APIが件数のみ・差分のみを返せることを検証する"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        other_user = get_user_model().objects.create(
+            username="other", organization=self.organization
+        )
+        job = Job.objects.create(
+            job_category=JobCategory.objects.create(name="category"),
+            position="position",
+            organization=self.organization,
+        )
+        self.records = []
+        for i, (in_charge, is_checked) in enumerate(
+            [(self.user, False), (self.user, False), (self.user, True), (other_user, False)]
+        ):
+            proposal = Proposal.objects.create(
+                jobseeker=Jobseeker.objects.create(
+                    name=f"jobseeker{i}", in_charge=in_charge, organization=self.organization
+                ),
+                job=job,
+                position="proposal",
+                organization=self.organization,
+            )
+            record = Record.objects.create(
+                proposal=proposal, is_checked=is_checked, organization=self.organization
+            )
+            # 後の記録ほど新しくなるように created_at をずらす
+            Record.objects.filter(id=record.id).update(
+                created_at=timezone.now() - timedelta(hours=4 - i)
+            )
+            self.records.append(Record.objects.get(id=record.id))
+        self.view = RecordNotificationAllViewSet.as_view({"get": "list"})
+
+    def get(self, query):
+        request = self.factory.get("/", query)
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.view(request)
+        return response, context.captured_queries
+
+    def test_count_only(self):
+        """
+        正常系 1:
+        ?count_only=true では自分が担当する未確認の記録の件数だけを1回のクエリで返すこと
+        """
+        response, queries = self.get({"count_only": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(response.data, {"count": 2}, "件数のみ返ること.")
+        self.assertEqual(len(queries), 1, "1回のクエリで数えること.")
+
+    def test_since(self):
+        """
+        正常系 1:
+        ?since= 以降に作成された記録のみ、新しい順に返すこと
+        """
+        since = self.records[0].created_at + timedelta(minutes=30)
+        response, _ = self.get({"since": since.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(
+            [x["id"] for x in response.data], [str(self.records[1].id)], "差分のみ返ること."
+        )
+
+        response, _ = self.get({})
+        self.assertEqual(
+            [x["id"] for x in response.data],
+            [str(self.records[1].id), str(self.records[0].id)],
+            "新しい順に返ること.",
+        )
+
+        """
+        正常系 2:
+        レスポンスの created_at をそのまま ?since= に渡せること
+        """
+        latest = response.data[0]["created_at"]
+        response, _ = self.get({"since": latest})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(
+            [x["id"] for x in response.data], [str(self.records[1].id)], "最新の記録以降が返ること."
+        )
+
+        """
+        正常系 3:
+        since の直前の created_at で後からコミットされた記録も取りこぼさないこと
+        """
+        Record.objects.filter(id=self.records[0].id).update(
+            created_at=self.records[1].created_at - timedelta(seconds=30)
+        )
+        response, _ = self.get({"since": self.records[1].created_at.isoformat()})
+        self.assertEqual(
+            [x["id"] for x in response.data],
+            [str(self.records[1].id), str(self.records[0].id)],
+            "重なりの範囲の記録も返ること.",
+        )
+
+        """
+        異常系 1:
+        日時として解釈できない場合は 400 が返ること
+        """
+        response, _ = self.get({"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, "HTTPステータス400が返ること.")
@@ -0,0 +1,191 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from rest_framework.test import APITestCase
+
+from api.models import Organization, JobCategory, OrganizationCompany, Job
+from api.views import JobViewSet
+
+
+class JobKeywordSearchTests(APITestCase):
+    url = "".join([reverse("agent_recmii:job-list")])
+
+    def setUp(self):
+        self.factory = APIRequestFactory(enforce_csrf_checks=True)
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        job_category = JobCategory.objects.create(name="category")
+        company = OrganizationCompany.objects.create(
+            name="ｶﾌﾞｼｷｶﾞｲｼｬＡＢＣ", organization=self.organization
+        )
+        self.job_position = Job.objects.create(
+            position="Pythonエンジニア",
+            job_category=job_category,
+            organization=self.organization,
+        )
+        self.job_company = Job.objects.create(
+            position="営業",
+            organization_company=company,
+            job_category=job_category,
+            organization=self.organization,
+        )
+        self.job_other = Job.objects.create(
+            position="Python",
+            job_category=job_category,
+            organization=Organization.objects.create(name="other"),
+        )
+        self.view = JobViewSet.as_view({"get": "list"})
+
+    def get(self, query):
+        request = self.factory.get(self.url, query)
+        force_authenticate(request, user=self.user)
+        return self.view(request)
+
+    def test_search_jobs_keyword(self):
+        """
+        正常系 1:
+        全角で入力されたキーワードで半角の position が検索できること
+        """
+        response = self.get({"keyword": "ｐｙｔｈｏｎ"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(
+            [x["id"] for x in response.data["results"]],
+            [str(self.job_position.id)],
+            "自組織の求人のみ1件取得できること.",
+        )
+
+        """
+        正常系 2:
+        全角カナで入力されたキーワードで半角カナの企業名が検索できること
+        """
+        response = self.get({"keyword": "カブシキガイシャabc"})
+        self.assertEqual(
+            [x["id"] for x in response.data["results"]],
+            [str(self.job_company.id)],
+            "企業名で1件取得できること.",
+        )
+
+        """
+        正常系 3:
+        LIKE のワイルドカードはそのまま文字として検索されること
+        """
+        response = self.get({"keyword": "%"})
+        self.assertEqual(response.data["count"], 0, "0件であること.")
+
+    def test_search_jobs_relevance(self):
+        """
+        正常系 1:
+        sort=relevance の場合、一致度の高い順に並ぶこと
+        """
+        exact = Job.objects.create(
+            position="Python",
+            job_category=self.job_position.job_category,
+            organization=self.organization,
+        )
+        response = self.get({"keyword": "python", "sort": "relevance"})
+        self.assertEqual(
+            [x["id"] for x in response.data["results"]],
+            [str(exact.id), str(self.job_position.id)],
+            "一致度の高い順であること.",
+        )
+
+        """
+        正常系 2:
+        一致度の低い求人の方が新しくても、一致度の高い順に並ぶこと
+        """
+        newer = Job.objects.create(
+            position="Pythonエンジニア(リモート可)",
+            job_category=self.job_position.job_category,
+            organization=self.organization,
+        )
+        response = self.get({"keyword": "python", "sort": "relevance"})
+        self.assertEqual(
+            [x["id"] for x in response.data["results"]][0],
+            str(exact.id),
+            "一致度の最も高い求人が先頭であること.",
+        )
+        self.assertIn(str(newer.id), [x["id"] for x in response.data["results"]][1:])
+
+
+class JobFullTextSearchTests(APITestCase):
+    url = "".join([reverse("agent_recmii:job-list")])
+
+    def setUp(self):
+        self.factory = APIRequestFactory(enforce_csrf_checks=True)
+        self.organization = Organization.objects.create(name="organization")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        job_category = JobCategory.objects.create(name="category")
+        self.job_summary = Job.objects.create(
+            position="エンジニア",
+            summary="自社サービスの機械学習基盤を開発します",
+            job_category=job_category,
+            organization=self.organization,
+        )
+        self.job_position = Job.objects.create(
+            position="機械学習エンジニア",
+            job_category=job_category,
+            organization=self.organization,
+        )
+        self.job_other = Job.objects.create(
+            position="営業",
+            benefit="社内勉強会あり",
+            job_category=job_category,
+            organization=self.organization,
+        )
+        self.view = JobViewSet.as_view({"get": "list"})
+
+    def get(self, query):
+        request = self.factory.get(self.url, query)
+        force_authenticate(request, user=self.user)
+        return self.view(request)
+
+    def test_search_jobs_q(self):
+        """
+        正常系 1:
+        q で長文の項目も検索でき、position に一致するものが上位になること
+        """
+        response = self.get({"q": "機械学習"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "HTTPステータス200が返ること.")
+        self.assertEqual(
+            [x["id"] for x in response.data["results"]],
+            [str(self.job_position.id), str(self.job_summary.id)],
+            "一致度の高い順に2件取得できること.",
+        )
+
+        """
+        正常系 2:
+        更新した内容で検索できること
+        """
+        self.job_other.benefit = "書籍購入補助"
+        self.job_other.save()
+        response = self.get({"q": "書籍"})
+        self.assertEqual(
+            [x["id"] for x in response.data["results"]],
+            [str(self.job_other.id)],
+            "更新後の内容で1件取得できること.",
+        )
+
+        """
+        正常系 3:
+        一致度の低い求人の方が新しくても、一致度の高い順に並ぶこと
+        """
+        newer = Job.objects.create(
+            position="データエンジニア",
+            pfd_qualifications="機械学習の知見",
+            job_category=self.job_position.job_category,
+            organization=self.organization,
+        )
+        response = self.get({"q": "機械学習"})
+        self.assertEqual(
+            [x["id"] for x in response.data["results"]][0],
+            str(self.job_position.id),
+            "position に一致する求人が先頭であること.",
+        )
+        self.assertIn(str(newer.id), [x["id"] for x in response.data["results"]][1:])
@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+from rest_framework.test import APITestCase
+
+from api.models import (
+    Organization,
+    JobCategory,
+    OrganizationCompany,
+    Jobseeker,
+    Job,
+    Proposal,
+    Record,
+    Tag,
+)
+from api.serializers import ProposalSerializer, RecordSerializer
+from api.views import ProposalViewSet, RecordBulkUpdateView, TagViewSet
+
+
+class OrganizationModelSerializerTests(APITestCase):
+    """作成時に組織や参照先を取り直さず、参照先の id を自組織の中でまとめて確認することを検証する"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory(enforce_csrf_checks=True)
+        self.organization = Organization.objects.create(name="organization")
+        self.other_organization = Organization.objects.create(name="other")
+        self.user = get_user_model().objects.create(
+            username="user", organization=self.organization
+        )
+        self.job = Job.objects.create(
+            organization_company=OrganizationCompany.objects.create(
+                name="company", organization=self.organization
+            ),
+            job_category=JobCategory.objects.create(name="category"),
+            position="position",
+            organization=self.organization,
+        )
+        self.jobseeker = Jobseeker.objects.create(
+            name="jobseeker", organization=self.organization
+        )
+        self.tag = Tag.objects.create(name="A", organization=self.organization)
+        self.other_tag = Tag.objects.create(name="B", organization=self.other_organization)
+        self.proposal = Proposal.objects.create(
+            jobseeker=self.jobseeker,
+            job=self.job,
+            position="proposal",
+            organization=self.organization,
+        )
+
+    def request(self, view, data, method="post"):
+        request = getattr(self.factory, method)("/", data, format="json")
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = view(request)
+        return response, context.captured_queries
+
+    def test_create(self):
+        """
+        正常系 1:
+        組織やユーザーを取り直さずに作成できること
+        """
+        response, queries = self.request(
+            TagViewSet.as_view({"post": "create"}), {"name": "C"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, "HTTPステータス201が返ること.")
+        self.assertEqual(
+            Tag.objects.get(id=response.data["id"]).organization_id,
+            self.organization.id,
+            "自組織のタグとして作成されること.",
+        )
+        for captured in queries:
+            self.assertNotIn('FROM "api_organization"', captured["sql"], "組織を取り直さないこと.")
+
+        """
+        異常系 1:
+        他の組織のタグを指定した場合は 400 が返り、作成されないこと
+        """
+        data = dict(ProposalSerializer(self.proposal).data)
+        data.pop("id")
+        data["tags"] = [{"id": str(self.other_tag.id), "name": self.other_tag.name}]
+        count = Proposal.objects.count()
+        response, _ = self.request(ProposalViewSet.as_view({"post": "create"}), data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, "HTTPステータス400が返ること.")
+        self.assertIn("tags", response.data, "タグのエラーが返ること.")
+        self.assertEqual(Proposal.objects.count(), count, "作成されないこと.")
+
+    def test_bulk_validate_related_ids(self):
+        """
+        正常系 1:
+        一括更新では参照先の id を件数によらず1回のクエリで確認すること
+        """
+        records = [
+            Record.objects.create(proposal=self.proposal, organization=self.organization)
+            for _ in range(3)
+        ]
+        data = [RecordSerializer(x).data for x in records]
+        _, queries = self.request(RecordBulkUpdateView.as_view(), data, method="patch")
+        self.assertEqual(
+            len([x for x in queries if 'FROM "api_proposal"' in x["sql"]]),
+            1,
+            "提案の存在確認が1回であること.",
+        )
+
+        """
+        異常系 1:
+        他の組織の提案を指定した場合は、その件にエラーが返ること
+        """
+        other = Proposal.objects.create(
+            jobseeker=self.jobseeker,
+            job=self.job,
+            position="other",
+            organization=self.other_organization,
+        )
+        data[1] = dict(data[1], proposal=dict(data[1]["proposal"], id=str(other.id)))
+        response, _ = self.request(RecordBulkUpdateView.as_view(), data, method="patch")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, "HTTPステータス400が返ること.")
+        self.assertIn("proposal", str(response.data), "提案のエラーが返ること.")
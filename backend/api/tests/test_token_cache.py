@@ -0,0 +1,69 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api import utils
+from api.authentication.token_cache import VerifiedTokenCache
+
+
+class VerifiedTokenCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = VerifiedTokenCache(maxsize=2, max_ttl=300)
+        self.payload = {"sub": "auth0|user", "exp": int(time.time()) + 3600}
+
+    def test_decode_token_skips_verification(self):
+        """
+        正常系 1:
+        同じトークンの2回目以降は署名検証を行わずにペイロードが返ること
+        """
+        with mock.patch.object(utils, "verified_token_cache", self.cache), mock.patch.object(
+            utils.jwt, "get_unverified_header", return_value={"kid": "kid-1"}
+        ), mock.patch.object(utils.jwks_key_store, "get_key"), mock.patch.object(
+            utils.jwt, "decode", return_value=self.payload
+        ) as decode:
+            for _ in range(3):
+                payload = utils.jwt_decode_token("token")
+
+        self.assertEqual(payload, self.payload, "ペイロードが返ること")
+        self.assertEqual(decode.call_count, 1, "署名検証は1回のみであること")
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 2, "キャッシュヒットが記録されること")
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3, msg="ヒット率が記録されること")
+
+    def test_expiration(self):
+        """
+        正常系 1:
+        exp を過ぎたトークンはキャッシュから返らないこと
+        """
+        self.cache.set("token", dict(self.payload, exp=int(time.time()) - 1))
+        self.assertIsNone(self.cache.get("token"), "期限切れのトークンが返らないこと")
+
+        """
+        正常系 2:
+        max_ttl を過ぎたトークンはキャッシュから返らないこと
+        """
+        self.cache.set("token", self.payload)
+        with mock.patch.object(time, "time", return_value=time.time() + 301):
+            self.assertIsNone(self.cache.get("token"), "max_ttl を過ぎたトークンが返らないこと")
+
+    def test_lru_eviction(self):
+        """
+        正常系 1:
+        maxsize を超えた場合、最も使われていないトークンから削除されること
+        """
+        self.cache.set("token-1", self.payload)
+        self.cache.set("token-2", self.payload)
+        self.cache.get("token-1")
+        self.cache.set("token-3", self.payload)
+
+        self.assertIsNotNone(self.cache.get("token-1"), "最近使われたトークンが残ること")
+        self.assertIsNone(self.cache.get("token-2"), "最も使われていないトークンが削除されること")
+        self.assertEqual(self.cache.stats()["evictions"], 1, "削除件数が記録されること")
+
+        """
+        正常系 2:
+        返されたペイロードを変更してもキャッシュに影響しないこと
+        """
+        self.cache.get("token-1")["sub"] = "changed"
+        self.assertEqual(self.cache.get("token-1")["sub"], "auth0|user", "キャッシュが変更されないこと")
@@ -20,8 +20,11 @@ from api.views import (
     RecordViewSet,
     RecordNotificationAllViewSet,
     RecordBulkUpdateView,
+    RecordBulkCheckView,
     ManageUserView,
     JobLoadingViewSet,
+    JobLoadingBulkCreateView,
+    JobLoadingBatchViewSet,
     health_check,
 )
 
@@ -42,12 +45,15 @@ router.register("proposals", ProposalViewSet)
 router.register("records", RecordViewSet)
 router.register("record_notifications_all", RecordNotificationAllViewSet)
 router.register("job_loadings", JobLoadingViewSet)
+router.register("job_loading_batches", JobLoadingBatchViewSet)
 
 urlpatterns = [
     path("user/", ManageUserView.as_view(), name="user"),
     path("proposals/bulk_create/", ProposalBulkCreateView.as_view()),
     path("proposals/bulk_update/", ProposalBulkUpdateView.as_view()),
     path("records/bulk_update/", RecordBulkUpdateView.as_view()),
+    path("records/bulk_check/", RecordBulkCheckView.as_view()),
+    path("job_loadings/bulk_create/", JobLoadingBulkCreateView.as_view()),
     path("", include(router.urls)),
     path("health-check", health_check),
 ]
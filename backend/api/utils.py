@@ -1,37 +1,48 @@
-from django.contrib.auth import authenticate
-import json
 import jwt
-import requests
 
 import environ
 
+from .authentication.jwks import JWKSKeyStore
+from .authentication.token_cache import VerifiedTokenCache
+
 env = environ.Env()
 env.read_env(".env")
 
+jwks_key_store = JWKSKeyStore(
+    "{}/.well-known/jwks.json".format(env("JWT_ISSUER")),
+    ttl=env.int("JWKS_CACHE_TTL", default=600),
+    max_stale=env.int("JWKS_CACHE_MAX_STALE", default=3600),
+    min_refresh_interval=env.int("JWKS_MIN_REFRESH_INTERVAL", default=30),
+)
+
+verified_token_cache = VerifiedTokenCache(
+    maxsize=env.int("JWT_VERIFIED_TOKEN_CACHE_SIZE", default=1024),
+    max_ttl=env.int("JWT_VERIFIED_TOKEN_CACHE_TTL", default=300),
+)
+
 
 def jwt_get_username_from_payload_handler(payload):
-    username = payload.get("sub").replace("|", ".")
-    authenticate(remote_user=username)
-    return username
+    # ユーザーの取得・初回ログイン時の作成は api.authentication.backends で行う
+    return payload.get("sub").replace("|", ".")
 
 
 def jwt_decode_token(token):
-    header = jwt.get_unverified_header(token)
-    jwks = requests.get("{}/.well-known/jwks.json".format(env("JWT_ISSUER"))).json()
-    public_key = None
-    for jwk in jwks["keys"]:
-        if jwk["kid"] == header["kid"]:
-            public_key = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
+    # 同じトークンは署名・クレームの検証済みの結果を再利用する (exp を過ぎたものは再検証される)
+    payload = verified_token_cache.get(token)
+    if payload is not None:
+        return payload
 
-    if public_key is None:
-        raise Exception("Public key not found.")
+    header = jwt.get_unverified_header(token)
+    public_key = jwks_key_store.get_key(header.get("kid"))
 
     issuer = "{}/".format(env("JWT_ISSUER"))
 
-    return jwt.decode(
+    payload = jwt.decode(
         token,
         public_key,
         audience=env("JWT_AUDIENCE"),
         issuer=issuer,
         algorithms=["RS256"],
     )
+    verified_token_cache.set(token, payload)
+    return payload
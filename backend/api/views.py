@@ -1,15 +1,16 @@
 from django.contrib.auth import get_user_model
 from django.http import JsonResponse
-from django.db.models import Q, OuterRef, Subquery, Count
+from django.db.models import Q, Count, Exists, OuterRef
 
+from datetime import timedelta
 from functools import wraps
 import jwt
 
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework import generics, viewsets, mixins, status
+from rest_framework import generics, viewsets, mixins, serializers, status
 from rest_framework.response import Response
-from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from django.db import connection, transaction
 
 from .models import (
     Company,
@@ -19,9 +20,11 @@ from .models import (
     Jobseeker,
     Job,
     Proposal,
+    ProposalTag,
     Record,
     JobseekerHistoryNotification,
     JobLoading,
+    JobLoadingBatch,
 )
 from .serializers import (
     UserSerializer,
@@ -34,14 +37,26 @@ from .serializers import (
     JobSerializer,
     ProposalSerializer,
     RecordSerializer,
+    RecordBulkCheckSerializer,
+    JobCompactSerializer,
+    ProposalCompactSerializer,
+    RecordCompactSerializer,
+    JobseekerProposalCompactSerializer,
     JobseekerJobseekerHistoryNotificationSerializer,
     JobseekerProposalSerializer,
     JobseekerJobseekerSerializer,
     JobseekerRecordSerializer,
     JobseekerOrganizationCompanySerializer,
     JobLoadingSerializer,
+    JobLoadingBulkCreateSerializer,
+    JobLoadingBatchSerializer,
 )
+from .authentication.backends import JSONWebTokenAuthentication
+from .mixins import CompactViewMixin
 from .pagination import StandardResultsSetPagination
+from .filters import filter_jobs_by_salary
+from .jobloading import batch as job_loading_batch
+from .search import filter_jobs_by_keyword, filter_jobs_by_search_query
 from .tasks import (
     exec_mail_agent_longtime,
     exec_mail_jobseeker_proposal,
@@ -50,6 +65,37 @@ from .tasks import (
 )
 
 
+# ?view=compact で読む列 (api.serializers の *CompactSerializer が返す項目)
+JOB_COMPACT_ONLY = (
+    "organization_company__name",
+    "job_category__name",
+    "position",
+    "layer",
+    "min_salary",
+    "max_salary",
+    "employment_status",
+    "remote",
+    "source_url",
+    "is_archive",
+    "created_at",
+    "updated_at",
+)
+PROPOSAL_COMPACT_ONLY = (
+    "jobseeker__name",
+    "intention",
+    "is_favorite",
+    "is_public",
+    "is_checked",
+    "position",
+    "is_appeal_layer",
+    "is_appeal_remote",
+    "published_at",
+    "created_at",
+    "updated_at",
+    *[f"job__{x}" for x in JOB_COMPACT_ONLY],
+)
+
+
 def get_token_auth_header(request):
     """Obtains the Access Token from the Authorization Header"""
     auth = request.META.get("HTTP_AUTHORIZATION", None)
@@ -172,15 +218,21 @@ class JobCategoryViewSet(viewsets.ModelViewSet):
 
 # @method_decorator(requires_scope('read:current_user'), name='dispatch')
 class OrganizationJobCategoryViewSet(viewsets.ModelViewSet):
-    queryset = JobCategory.objects.prefetch_related("job").order_by("name").all()
+    queryset = JobCategory.objects.order_by("name").all()
     serializer_class = JobCategorySerializer
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
+        # 求人は複数あるので JOIN + DISTINCT ではなく EXISTS で絞り込む
         queryset = self.queryset.filter(
-            job__organization=self.request.user.organization
-        ).distinct()
+            Exists(
+                Job.objects.filter(
+                    job_category=OuterRef("pk"),
+                    organization=self.request.user.organization,
+                )
+            )
+        )
         return queryset
 
 
@@ -201,7 +253,7 @@ class OrganizationCompanyViewSet(viewsets.ModelViewSet):
         if self.request.query_params.get("company_id", None) is not None:
             queryset = queryset.filter(
                 Q(company__id__exact=self.request.query_params.get("company_id", None))
-            ).distinct()
+            )
         return queryset
 
     def create(self, request, *args, **kwargs):
@@ -253,7 +305,6 @@ class TagViewSet(viewsets.ModelViewSet):
 class JobseekerViewSet(viewsets.ModelViewSet):
     queryset = (
         Jobseeker.objects.select_related("in_charge", "organization")
-        .prefetch_related("proposals")
         .order_by("created_at")
         .reverse()
         .all()
@@ -273,7 +324,7 @@ class JobseekerViewSet(viewsets.ModelViewSet):
                         "keyword", None
                     )
                 )
-            ).distinct()
+            )
 
         return queryset
 
@@ -281,9 +332,7 @@ class JobseekerViewSet(viewsets.ModelViewSet):
 # @method_decorator(requires_scope('read:current_user'), name='dispatch')
 class JobseekerAllViewSet(viewsets.ModelViewSet):
     queryset = (
-        Jobseeker.objects.select_related("in_charge", "organization")
-        .prefetch_related("proposals")
-        .all()
+        Jobseeker.objects.select_related("in_charge", "organization").all()
     )
     serializer_class = JobseekerSerializer
     authentication_classes = (JSONWebTokenAuthentication,)
@@ -322,19 +371,21 @@ class JobseekerAllViewSet(viewsets.ModelViewSet):
 
 
 # @method_decorator(requires_scope('read:current_user'), name='dispatch')
-class JobViewSet(viewsets.ModelViewSet):
+class JobViewSet(CompactViewMixin, viewsets.ModelViewSet):
     queryset = (
         Job.objects.select_related(
-            "organization_company",
+            "organization_company__company",
             "job_category",
             "organization",
         )
-        .prefetch_related("proposal_set")
-        .order_by("created_at")
-        .reverse()
+        .defer("search_vector")
+        .order_by("-created_at")
         .all()
     )
     serializer_class = JobSerializer
+    compact_serializer_class = JobCompactSerializer
+    compact_select_related = ("organization_company", "job_category")
+    compact_only = JOB_COMPACT_ONLY
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     pagination_class = StandardResultsSetPagination
@@ -346,14 +397,18 @@ class JobViewSet(viewsets.ModelViewSet):
         elif self.request.query_params.get("is_archive", None) == "false":
             queryset = queryset.filter(is_archive__exact=False)
         if self.request.query_params.get("keyword", None) is not None:
-            queryset = queryset.filter(
-                Q(
-                    organization_company__name__icontains=self.request.query_params.get(
-                        "keyword", None
-                    )
-                )
-                | Q(position__icontains=self.request.query_params.get("keyword", None))
-            ).distinct()
+            # NOTE: icontains だと UPPER(...) LIKE となりトライグラムインデックスが使えないため、
+            #       normalize(..., NFKC) ILIKE で検索する. 全角・半角の違いも吸収される.
+            queryset = filter_jobs_by_keyword(
+                queryset, self.request.query_params.get("keyword", None)
+            )
+            if self.request.query_params.get("sort", None) == "relevance":
+                queryset = queryset.order_by("-keyword_rank", "-created_at")
+        if self.request.query_params.get("q", None):
+            # summary や応募資格などの長文も対象にした全文検索. 一致度の高い順に返す
+            queryset = filter_jobs_by_search_query(
+                queryset, self.request.query_params.get("q", None)
+            ).order_by("-search_rank", "-created_at")
         if self.request.query_params.getlist("job_category[]", None) is not None:
             if len(self.request.query_params.getlist("job_category[]", None)) > 0:
                 queryset = queryset.filter(
@@ -363,70 +418,12 @@ class JobViewSet(viewsets.ModelViewSet):
                 )
         if (
             self.request.query_params.get("min_salary", None) is not None
-            and self.request.query_params.get("max_salary", None) is not None
-        ):
-            if int(self.request.query_params.get("min_salary", None)) <= int(
-                self.request.query_params.get("max_salary", None)
-            ):
-                queryset = (
-                    queryset.exclude(
-                        (
-                            Q(
-                                min_salary__gte=self.request.query_params.get(
-                                    "max_salary", None
-                                )
-                            )
-                            & Q(min_salary__isnull=False)
-                        )
-                        | (
-                            Q(
-                                max_salary__lte=self.request.query_params.get(
-                                    "min_salary", None
-                                )
-                            )
-                            & Q(max_salary__isnull=False)
-                        )
-                    )
-                    .filter(Q(max_salary__isnull=False) | Q(min_salary__isnull=False))
-                    .distinct()
-                )
-            else:
-                queryset = Job.objects.none()
-        elif (
-            self.request.query_params.get("min_salary", None) is None
-            and self.request.query_params.get("max_salary", None) is not None
+            or self.request.query_params.get("max_salary", None) is not None
         ):
-            queryset = (
-                queryset.exclude(
-                    (
-                        Q(
-                            min_salary__gte=self.request.query_params.get(
-                                "max_salary", None
-                            )
-                        )
-                        & Q(min_salary__isnull=False)
-                    )
-                )
-                .filter(Q(max_salary__isnull=False) | Q(min_salary__isnull=False))
-                .distinct()
-            )
-        elif (
-            self.request.query_params.get("min_salary", None) is not None
-            and self.request.query_params.get("max_salary", None) is None
-        ):
-            queryset = (
-                queryset.exclude(
-                    (
-                        Q(
-                            max_salary__lte=self.request.query_params.get(
-                                "min_salary", None
-                            )
-                        )
-                        & Q(max_salary__isnull=False)
-                    )
-                )
-                .filter(Q(max_salary__isnull=False) | Q(min_salary__isnull=False))
-                .distinct()
+            queryset = filter_jobs_by_salary(
+                queryset,
+                self.request.query_params.get("min_salary", None),
+                self.request.query_params.get("max_salary", None),
             )
         if self.request.query_params.get("layer", None) is not None:
             queryset = queryset.filter(
@@ -436,48 +433,44 @@ class JobViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(
                 remote__exact=self.request.query_params.get("remote", None),
             )
-        if self.request.query_params.getlist("tags[]", None):
-            latest_proposal_subquery = (
-                Proposal.objects.filter(job=OuterRef("pk"))
-                .order_by("-created_at")
-                .values("id")[:1]
-            )
-            queryset = (
-                queryset.filter(proposal=Subquery(latest_proposal_subquery))
-                .annotate(
-                    matching_tags_count=Count(
-                        "proposal__tags",
-                        filter=Q(
-                            proposal__tags__id__in=self.request.query_params.getlist(
-                                "tags[]", None
-                            )
-                        ),
-                    ),
-                )
-                .filter(
-                    matching_tags_count=len(
-                        self.request.query_params.getlist("tags[]", None)
-                    ),
-                )
+        tags = self.request.query_params.getlist("tags[]", None)
+        if tags:
+            # 最新の提案 (JobLatestProposal) のうち、指定タグの件数が一致するもの
+            matching_proposals = (
+                ProposalTag.objects.filter(tag__in=tags)
+                .values("proposal")
+                .annotate(matching_tags_count=Count("id"))
+                .filter(matching_tags_count=len(tags))
+                .values("proposal")
             )
+            queryset = queryset.filter(latest_proposal__proposal__in=matching_proposals)
 
         return queryset
 
 
 # @method_decorator(requires_scope('read:current_user'), name='dispatch')
-class ProposalViewSet(viewsets.ModelViewSet):
+class ProposalViewSet(CompactViewMixin, viewsets.ModelViewSet):
     queryset = (
         Proposal.objects.select_related(
-            "jobseeker",
-            "job",
+            "jobseeker__in_charge",
+            "job__organization_company__company",
+            "job__job_category",
             "organization",
         )
         .prefetch_related("tags")
+        .defer("job__search_vector")
         .order_by("created_at")
         .reverse()
         .all()
     )
     serializer_class = ProposalSerializer
+    compact_serializer_class = ProposalCompactSerializer
+    compact_select_related = (
+        "jobseeker",
+        "job__organization_company",
+        "job__job_category",
+    )
+    compact_only = PROPOSAL_COMPACT_ONLY
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
@@ -504,58 +497,73 @@ class ProposalBulkCreateView(generics.CreateAPIView):
         return Response(serializer.data)
 
 
-# Note: the way using self.perform_update throws the error: "bulk_update() can only be used with concrete fields"
-#       It looks due to the limitation of the UpdateAPIView's build_update, so just update proposals one by one.
 # @method_decorator(requires_scope('read:current_user'), name='dispatch')
 class ProposalBulkUpdateView(generics.UpdateAPIView):
     http_method_names = ["patch"]
+    # タグは ProposalTag をまとめて引いて差分を取るので prefetch しない
+    queryset = ProposalViewSet.queryset.prefetch_related(None)
     serializer_class = ProposalSerializer
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
+    def get_queryset(self):
+        return self.queryset.filter(organization=self.request.user.organization)
+
+    def get_serializer_context(self):
+        # 参照先の id は1件ずつではなく、全件まとめて確認する
+        return {**super().get_serializer_context(), "batch_related_ids": True}
+
     def partial_update(self, request, *args, **kwargs):
         proposal_data_list = request.data["proposals"]
-        updated_data = []
-        with transaction.atomic():
-            for proposal_data in proposal_data_list:
-                proposal_id = proposal_data.get("id")
-                if proposal_id is None:
-                    transaction.set_rollback(True)
-                    return Response(
-                        {"detail": "Each proposal data must contain 'id' field."},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+        if any(x.get("id") is None for x in proposal_data_list):
+            return Response(
+                {"detail": "Each proposal data must contain 'id' field."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-                try:
-                    proposal = Proposal.objects.get(id=proposal_id)
-                except Proposal.DoesNotExist:
-                    transaction.set_rollback(True)
-                    return Response(
-                        {"detail": f"Proposal with ID {proposal_id} not found."},
-                        status=status.HTTP_404_NOT_FOUND,
-                    )
+        # 対象の提案はまとめて1回で引き、検証は1件ずつ行う (最初のエラーを返す)
+        proposals = self.get_queryset().in_bulk(
+            [Proposal._meta.pk.to_python(x["id"]) for x in proposal_data_list]
+        )
+        instances = []
+        validated_data = []
+        for proposal_data in proposal_data_list:
+            proposal_id = proposal_data["id"]
+            proposal = proposals.get(Proposal._meta.pk.to_python(proposal_id))
+            if proposal is None:
+                return Response(
+                    {"detail": f"Proposal with ID {proposal_id} not found."},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
 
-                serializer = self.get_serializer(
-                    proposal, data=proposal_data, partial=True
+            serializer = self.get_serializer(proposal, data=proposal_data, partial=True)
+            if not serializer.is_valid():
+                return Response(
+                    {"detail": serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
-                if not serializer.is_valid():
-                    transaction.set_rollback(True)
-                    return Response(
-                        {"detail": serializer.errors},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+            instances.append(proposal)
+            validated_data.append(serializer.validated_data)
 
-                serializer.save()
-                updated_data.append(serializer.data)
+        serializer = self.get_serializer(many=True)
+        errors = [x for x in serializer.child.validate_related_ids(validated_data) if x]
+        if errors:
+            return Response({"detail": errors[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            serializer.update(instances, validated_data)
 
             if request.data["is_email"]:
                 exec_mail_jobseeker_proposal.delay(request.data["jobseeker_id"])
 
-        return Response(updated_data, status=status.HTTP_200_OK)
+        return Response(
+            self.get_serializer(instances, many=True).data, status=status.HTTP_200_OK
+        )
 
 
 # @method_decorator(requires_scope('read:current_user'), name='dispatch')
 class RecordViewSet(
+    CompactViewMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
@@ -564,14 +572,33 @@ class RecordViewSet(
 ):
     queryset = (
         Record.objects.select_related(
-            "proposal",
+            "proposal__jobseeker__in_charge",
+            "proposal__job__organization_company__company",
+            "proposal__job__job_category",
             "organization",
         )
+        .prefetch_related("proposal__tags")
+        .defer("proposal__job__search_vector")
         .order_by("created_at")
         .reverse()
         .all()
     )
     serializer_class = RecordSerializer
+    compact_serializer_class = RecordCompactSerializer
+    compact_select_related = (
+        "proposal__jobseeker",
+        "proposal__job__organization_company",
+        "proposal__job__job_category",
+    )
+    compact_only = (
+        "before_record_at",
+        "is_long_time",
+        "is_checked",
+        "trigger",
+        "created_at",
+        "updated_at",
+        *[f"proposal__{x}" for x in PROPOSAL_COMPACT_ONLY],
+    )
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     pagination_class = StandardResultsSetPagination
@@ -585,18 +612,20 @@ class RecordViewSet(
                         "keyword", None
                     )
                 )
-            ).distinct()
+            )
         return queryset
 
 
 # @method_decorator(requires_scope('read:current_user'), name='dispatch')
 class RecordBulkUpdateView(generics.UpdateAPIView):
+    queryset = RecordViewSet.queryset
     serializer_class = RecordSerializer
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def update(self, request, *args, **kwargs):
-        instances = Record.objects.filter(
+        instances = self.queryset.filter(
+            organization=self.request.user.organization,
             id__in=[x["id"] for x in request.data],
         )
         serializer = self.get_serializer(instances, data=request.data, many=True)
@@ -605,6 +634,42 @@ class RecordBulkUpdateView(generics.UpdateAPIView):
         return Response(serializer.data)
 
 
+# @method_decorator(requires_scope('read:current_user'), name='dispatch')
+class RecordBulkCheckView(generics.GenericAPIView):
+    """
+    request.data = {
+        "ids": ["<record id>", ...],
+        "is_checked": true,
+    }
+    値が変わった記録の id だけを返す
+    """
+
+    serializer_class = RecordBulkCheckSerializer
+    authentication_classes = (JSONWebTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def patch(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # 1回の UPDATE で済ませ、変更した行の id だけを RETURNING で受け取る
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {Record._meta.db_table} SET is_checked = %s, updated_at = now() "
+                "WHERE id = ANY(%s::uuid[]) AND organization_id = %s AND is_checked IS DISTINCT FROM %s "
+                "RETURNING id",
+                [
+                    serializer.validated_data["is_checked"],
+                    [str(x) for x in serializer.validated_data["ids"]],
+                    request.user.organization_id,
+                    serializer.validated_data["is_checked"],
+                ],
+            )
+            ids = [str(row[0]) for row in cursor.fetchall()]
+
+        return Response({"ids": ids}, status=status.HTTP_200_OK)
+
+
 # @method_decorator(requires_scope('read:current_user'), name='dispatch')
 class RecordNotificationAllViewSet(
     mixins.RetrieveModelMixin,
@@ -613,13 +678,25 @@ class RecordNotificationAllViewSet(
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = Record.objects.select_related(
-        "proposal",
-        "organization",
-    ).all()
+    queryset = (
+        Record.objects.select_related(
+            "proposal__jobseeker__in_charge",
+            "proposal__job__organization_company__company",
+            "proposal__job__job_category",
+            "organization",
+        )
+        .prefetch_related("proposal__tags")
+        .defer("proposal__job__search_vector")
+        .order_by("-created_at")
+        .all()
+    )
     serializer_class = RecordSerializer
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    # ?since= には ISO 8601 か、レスポンスの created_at (分単位) をそのまま渡せる
+    since_field = serializers.DateTimeField(input_formats=["iso-8601", "%Y/%m/%d %H:%M"])
+    # 後からコミットされた記録を取りこぼさないよう、since より少し前から返す. クライアントは id で重複を除く
+    since_overlap = timedelta(seconds=60)
 
     def get_queryset(self):
         queryset = self.queryset.filter(
@@ -628,6 +705,15 @@ class RecordNotificationAllViewSet(
             is_checked=False,
         )
 
+        # ?since= 前回のポーリングで受け取った最新の created_at 以降 (重なりを含む) の記録のみ
+        since = self.request.query_params.get("since", None)
+        if since is not None:
+            try:
+                since_at = self.since_field.to_internal_value(since)
+            except ValidationError as e:
+                raise ValidationError({"since": e.detail})
+            queryset = queryset.filter(created_at__gte=since_at - self.since_overlap)
+
         if self.request.query_params.get("keyword", None) is not None:
             queryset = queryset.filter(
                 Q(
@@ -635,13 +721,21 @@ class RecordNotificationAllViewSet(
                         "keyword", None
                     )
                 )
-            ).distinct()
+            )
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        # ?count_only=true バッジ表示用に件数だけを返す (記録のシリアライズをしない)
+        if request.query_params.get("count_only", None) == "true":
+            queryset = self.filter_queryset(self.get_queryset())
+            return Response({"count": queryset.count()})
+        return super().list(request, *args, **kwargs)
+
 
 # @method_decorator(requires_scope('read:current_user'), name='dispatch')
 class JobseekerProposalViewSet(
+    CompactViewMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
@@ -649,15 +743,20 @@ class JobseekerProposalViewSet(
 ):
     queryset = (
         Proposal.objects.select_related(
-            "jobseeker",
-            "job",
+            "job__organization_company__company",
+            "job__job_category",
             "organization",
         )
+        .prefetch_related("tags")
+        .defer("job__search_vector")
         .order_by("published_at")
         .reverse()
         .all()
     )
     serializer_class = JobseekerProposalSerializer
+    compact_serializer_class = JobseekerProposalCompactSerializer
+    compact_select_related = ("job__organization_company", "job__job_category")
+    compact_only = tuple(x for x in PROPOSAL_COMPACT_ONLY if x != "jobseeker__name")
     permission_classes = (AllowAny,)
 
     def get_queryset(self):
@@ -678,9 +777,7 @@ class JobseekerJobseekerViewSet(
     viewsets.GenericViewSet,
 ):
     queryset = (
-        Jobseeker.objects.select_related("in_charge", "organization")
-        .prefetch_related("proposals")
-        .all()
+        Jobseeker.objects.select_related("in_charge", "organization").all()
     )
     serializer_class = JobseekerJobseekerSerializer
     permission_classes = (AllowAny,)
@@ -738,7 +835,7 @@ class JobseekerOrganizationCompanyViewSet(
         if self.request.query_params.get("company_id", None) is not None:
             queryset = queryset.filter(
                 Q(company__id__exact=self.request.query_params.get("company_id", None))
-            ).distinct()
+            )
         return queryset
 
 
@@ -777,3 +874,66 @@ class JobLoadingViewSet(viewsets.ModelViewSet):
         instance.is_deleted = True
         instance.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class JobLoadingBulkCreateView(generics.GenericAPIView):
+    """
+    request.data = {
+        "source_urls": ["https://example.com", ...],
+    }
+    同じドメインへの同時実行数を抑えて取り込み、進捗は job_loading_batches/<id>/ で確認する
+    """
+
+    serializer_class = JobLoadingBulkCreateSerializer
+    authentication_classes = (JSONWebTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        source_urls = serializer.validated_data["source_urls"]
+
+        with transaction.atomic():
+            batch = JobLoadingBatch.objects.create(
+                organization_id=request.user.organization_id,
+                user_id=request.user.id,
+                total=len(source_urls),
+            )
+            job_loadings = JobLoading.objects.bulk_create(
+                [
+                    JobLoading(
+                        organization_id=request.user.organization_id,
+                        user_id=request.user.id,
+                        source_url=source_url,
+                        batch=batch,
+                    )
+                    for source_url in source_urls
+                ]
+            )
+        job_loading_batch.dispatch(job_loadings)
+
+        batch.completed = 0
+        batch.error = 0
+        return Response(
+            {
+                **JobLoadingBatchSerializer(batch).data,
+                "job_loadings": JobLoadingSerializer(job_loadings, many=True).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+# @method_decorator(requires_scope('read:current_user'), name='dispatch')
+class JobLoadingBatchViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    # 件数は batch_id の索引で数える
+    queryset = JobLoadingBatch.objects.annotate(
+        completed=Count("job_loadings", filter=Q(job_loadings__is_completed=True)),
+        error=Count("job_loadings", filter=Q(job_loadings__is_error=True)),
+    ).all()
+    serializer_class = JobLoadingBatchSerializer
+    authentication_classes = (JSONWebTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        queryset = self.queryset.filter(organization=self.request.user.organization)
+        return queryset
@@ -9,8 +9,24 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "recmii.settings.local")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+if settings.DEBUG:
+    # runserver と同様に開発時は admin の静的ファイルも配信する
+    django_application = ASGIStaticFilesHandler(django_application)
+
+# get_asgi_application() で Django をセットアップしてから読み込む
+from api.jobloading import events  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # 求人取り込みの進捗 (Server-Sent Events) は Django を通さずに流し続ける
+    jobloading_id = events.match(scope)
+    if jobloading_id is not None:
+        return await events.job_loading_events(scope, receive, send, jobloading_id)
+    return await django_application(scope, receive, send)